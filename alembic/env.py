@@ -12,7 +12,7 @@ from app.database import Base
 #-----------------
 #Importar modelos
 #----------------
-from app.models import User, ExcelUploadLog
+from app.models import User, ExcelUploadLog, ExcelUploadMetrics, UploadStatsRollup, ResourceVersion
 
 # Cargar variables del entorno (.env)
 from dotenv import load_dotenv
@@ -0,0 +1,39 @@
+"""rss maxima del proceso
+
+Revision ID: 4c1b8e7d2a90
+Revises: 7539fc701e25
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1b8e7d2a90'
+down_revision: Union[str, None] = '7539fc701e25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # El valor era la RSS del proceso muestreada, no el pico de la carga
+    with op.batch_alter_table('excel_upload_metrics') as batch_op:
+        batch_op.alter_column(
+            'peak_memory_bytes',
+            new_column_name='max_process_rss_bytes',
+            existing_type=sa.BigInteger(),
+            existing_nullable=True
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('excel_upload_metrics') as batch_op:
+        batch_op.alter_column(
+            'max_process_rss_bytes',
+            new_column_name='peak_memory_bytes',
+            existing_type=sa.BigInteger(),
+            existing_nullable=True
+        )
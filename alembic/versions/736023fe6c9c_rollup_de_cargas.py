@@ -0,0 +1,36 @@
+"""rollup de cargas
+
+Revision ID: 736023fe6c9c
+Revises: 90898a5e22e7
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '736023fe6c9c'
+down_revision: Union[str, None] = '90898a5e22e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_stats_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('uploads', sa.Integer(), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('successful_rows', sa.Integer(), nullable=False),
+    sa.Column('failed_rows', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket_start', name='uq_rollup_granularity_bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_stats_rollups')
@@ -0,0 +1,36 @@
+"""cancelacion de cargas
+
+Revision ID: 7539fc701e25
+Revises: e26f3d4917ec
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7539fc701e25'
+down_revision: Union[str, None] = 'e26f3d4917ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+OLD_STATUSES = sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', name='uploadstatusenum')
+NEW_STATUSES = sa.Enum('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED', 'CANCELLED', name='uploadstatusenum')
+
+
+def upgrade() -> None:
+    # batch: en SQLite recrea la tabla, en MySQL es un ALTER TABLE normal
+    with op.batch_alter_table('excel_upload_logs') as batch_op:
+        batch_op.alter_column('status', existing_type=OLD_STATUSES, type_=NEW_STATUSES, existing_nullable=False)
+        batch_op.add_column(sa.Column('cancel_requested_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("UPDATE excel_upload_logs SET status = 'FAILED' WHERE status = 'CANCELLED'")
+    with op.batch_alter_table('excel_upload_logs') as batch_op:
+        batch_op.drop_column('cancel_requested_at')
+        batch_op.alter_column('status', existing_type=NEW_STATUSES, type_=OLD_STATUSES, existing_nullable=False)
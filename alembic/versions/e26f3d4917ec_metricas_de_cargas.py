@@ -0,0 +1,38 @@
+"""metricas de cargas
+
+Revision ID: e26f3d4917ec
+Revises: f23b3db9a2c5
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e26f3d4917ec'
+down_revision: Union[str, None] = 'f23b3db9a2c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('excel_upload_metrics',
+    sa.Column('upload_id', sa.Integer(), nullable=False),
+    sa.Column('parse_seconds', sa.Float(), nullable=False),
+    sa.Column('validation_seconds', sa.Float(), nullable=False),
+    sa.Column('dedup_seconds', sa.Float(), nullable=False),
+    sa.Column('insert_seconds', sa.Float(), nullable=False),
+    sa.Column('total_seconds', sa.Float(), nullable=False),
+    sa.Column('rows_per_second', sa.Float(), nullable=False),
+    sa.Column('peak_memory_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('db_statements', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['excel_upload_logs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('upload_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('excel_upload_metrics')
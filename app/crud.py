@@ -1,10 +1,13 @@
+import os
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
-from sqlalchemy import func, or_, desc
+from sqlalchemy import func, or_, desc, select, insert, update, delete
 from sqlalchemy import text 
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 from app import schemas, models
 from app.utils.logger_config import logger
+from app.utils.etag import mark_changed, USERS
+from app.utils.fast_json import rows_as_dicts
 
 
 # ===================================
@@ -214,6 +217,7 @@ def create_user(db: Session, user: schemas.UserCreate) -> Optional[models.User]:
                 raise ValueError("Error al crear instancia de usuario")
             
             db.add(db_user)
+            mark_changed(db, USERS)
             db.commit()
             db.refresh(db_user)
             
@@ -313,6 +317,34 @@ def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[models.User]
         raise
 
 
+def get_user_rows(db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Variante liviana de get_users para listados: selecciona solo las
+    columnas de UserResponse con Core, sin cargar objetos ORM.
+    
+    Args:
+        db: Sesión de base de datos
+        skip: Número de registros a saltar
+        limit: Máximo de registros a retornar
+        
+    Returns:
+        List[Dict]: Filas con id, name y email
+        
+    Raises:
+        ValueError: Parámetros inválidos
+    """
+    if not _validate_pagination_params(skip, limit):
+        raise ValueError("Parámetros de paginación inválidos")
+    
+    result = db.execute(
+        select(models.User.id, models.User.name, models.User.email)
+        .order_by(models.User.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return rows_as_dicts(result)
+
+
 def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
     """
     Busca un usuario por su ID.
@@ -497,6 +529,7 @@ def update_user(db: Session, db_user: models.User, user: schemas.UserCreate) ->
         try:
             db_user.name = user.name.strip()
             db_user.email = new_email
+            mark_changed(db, USERS)
             
             db.commit()
             db.refresh(db_user)
@@ -584,6 +617,7 @@ def delete_user(db: Session, db_user: models.User) -> bool:
         # Eliminar usuario
         try:
             db.delete(db_user)
+            mark_changed(db, USERS)
             db.commit()
             
             logger.info(f"Usuario eliminado | ID: {user_id} | Nombre: '{user_name}' | Email: '{user_email}'")
@@ -780,4 +814,418 @@ def email_exists(db: Session, email: str) -> bool:
     
     except Exception as e:
         logger.error(f"Error en email_exists: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+# ===================================
+# OPERACIONES MASIVAS
+# ===================================
+
+# Máximo de ítems por petición y tamaño de cada transacción
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+# Códigos de error por ítem
+BULK_INVALID_NAME = "invalid_name"
+BULK_DUPLICATE_EMAIL = "duplicate_email"
+BULK_DUPLICATE_IN_REQUEST = "duplicate_in_request"
+BULK_NOT_FOUND = "not_found"
+BULK_NOTHING_TO_UPDATE = "nothing_to_update"
+BULK_DB_ERROR = "db_error"
+
+
+class BulkResult:
+    """
+    Acumula el resultado por ítem de una operación masiva
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.ids: List[Optional[int]] = [None] * total
+        self.errors: List[Tuple[int, str]] = []
+
+    def ok(self, index: int, user_id: Optional[int]):
+        self.ids[index] = user_id
+
+    def fail(self, index: int, code: str):
+        self.errors.append((index, code))
+
+    def to_dict(self) -> Dict[str, Any]:
+        failed = len(self.errors)
+        return {
+            "total": self.total,
+            "succeeded": self.total - failed,
+            "failed": failed,
+            "ids": self.ids,
+            "errors": sorted(self.errors)
+        }
+
+
+def _chunks(items: list, size: int):
+
+    """Divide una lista en bloques de tamaño size"""
+
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _is_valid_bulk_name(name: str) -> bool:
+
+    """Mismas reglas que _validate_user_data, sin loguear cada ítem"""
+
+    return 2 <= len(name) <= models.User.name.type.length and not name.isdigit()
+
+
+def _bulk_item_error(db_error: SQLAlchemyError) -> str:
+
+    """Código por ítem de un error de BD en el reintento: la única restricción es el email"""
+
+    return BULK_DUPLICATE_EMAIL if isinstance(db_error, IntegrityError) else BULK_DB_ERROR
+
+
+def _bulk_create_one_by_one(db: Session, to_insert: List[Tuple[int, str, str]], result: BulkResult):
+    """
+    Reintento de un bloque de creación que falló: cada ítem en un savepoint
+    y un solo commit al final, para que cada uno reciba su resultado real.
+    """
+    created = []
+    for index, name, email in to_insert:
+        try:
+            with db.begin_nested():
+                user_id = db.execute(
+                    insert(models.User).values(name=name, email=email, is_active=True)
+                ).inserted_primary_key[0]
+            created.append((index, user_id))
+        except SQLAlchemyError as db_error:
+            logger.error(f"Error de BD al crear usuario {email}: {str(db_error)}")
+            result.fail(index, _bulk_item_error(db_error))
+    
+    try:
+        if created:
+            mark_changed(db, USERS)
+        db.commit()
+    except SQLAlchemyError as db_error:
+        logger.error(f"Error de BD al confirmar reintento de creación: {str(db_error)}")
+        db.rollback()
+        for index, _ in created:
+            result.fail(index, BULK_DB_ERROR)
+        return
+    
+    for index, user_id in created:
+        result.ok(index, user_id)
+
+
+def bulk_create_users(db: Session, users: List[schemas.UserCreate]) -> Dict[str, Any]:
+    """
+    Crea usuarios en bloque: una consulta de duplicados y un INSERT
+    multi-fila por bloque, con un commit por bloque. Si el INSERT del
+    bloque falla, se reintenta ítem por ítem (ver _bulk_create_one_by_one).
+    
+    Args:
+        db: Sesión de base de datos
+        users: Usuarios a crear
+        
+    Returns:
+        Dict: Resultado compacto (ver BulkResult)
+    """
+    result = BulkResult(len(users))
+    candidates = []
+    seen_emails = set()
+    
+    for index, user in enumerate(users):
+        name = (user.name or "").strip()
+        email = str(user.email).strip().lower()
+        
+        if not _is_valid_bulk_name(name):
+            result.fail(index, BULK_INVALID_NAME)
+        elif email in seen_emails:
+            result.fail(index, BULK_DUPLICATE_IN_REQUEST)
+        else:
+            seen_emails.add(email)
+            candidates.append((index, name, email))
+    
+    for chunk in _chunks(candidates, BULK_CHUNK_SIZE):
+        try:
+            emails = [email for _, _, email in chunk]
+            existing = {
+                email.lower()
+                for email in db.scalars(
+                    select(models.User.email).where(models.User.email.in_(emails))
+                )
+            }
+        except SQLAlchemyError as db_error:
+            logger.error(f"Error de BD al verificar emails en bloque: {str(db_error)}")
+            db.rollback()
+            for index, _, _ in chunk:
+                result.fail(index, BULK_DB_ERROR)
+            continue
+        
+        to_insert = []
+        for index, name, email in chunk:
+            if email in existing:
+                result.fail(index, BULK_DUPLICATE_EMAIL)
+            else:
+                to_insert.append((index, name, email))
+        
+        if not to_insert:
+            continue
+        
+        try:
+            db.execute(
+                insert(models.User),
+                [{"name": name, "email": email, "is_active": True} for _, name, email in to_insert]
+            )
+            inserted_ids = {
+                email.lower(): user_id
+                for email, user_id in db.execute(
+                    select(models.User.email, models.User.id).where(
+                        models.User.email.in_([email for _, _, email in to_insert])
+                    )
+                )
+            }
+            mark_changed(db, USERS)
+            db.commit()
+            
+            for index, _, email in to_insert:
+                result.ok(index, inserted_ids.get(email))
+        
+        except SQLAlchemyError as db_error:
+            logger.error(
+                f"Error de BD al insertar bloque de {len(to_insert)} usuarios, reintentando por ítem: {str(db_error)}"
+            )
+            db.rollback()
+            _bulk_create_one_by_one(db, to_insert, result)
+    
+    summary = result.to_dict()
+    logger.info(f"Creación masiva: {summary['succeeded']} creados, {summary['failed']} fallidos")
+    return summary
+
+
+def _bulk_update_one_by_one(db: Session, to_update: List[Tuple[int, int, Dict[str, Any]]], result: BulkResult):
+    """
+    Reintento de un bloque de actualización que falló: cada ítem en un
+    savepoint y un solo commit al final. Aquí no hay valores provisionales,
+    así que un intercambio de emails cuyo bloque falló por otro motivo
+    termina en duplicate_email para ambos usuarios.
+    """
+    updated = []
+    for index, user_id, values in to_update:
+        try:
+            with db.begin_nested():
+                db.execute(update(models.User).where(models.User.id == user_id).values(**values))
+            updated.append((index, user_id))
+        except SQLAlchemyError as db_error:
+            logger.error(f"Error de BD al actualizar usuario {user_id}: {str(db_error)}")
+            result.fail(index, _bulk_item_error(db_error))
+    
+    try:
+        if updated:
+            mark_changed(db, USERS)
+        db.commit()
+    except SQLAlchemyError as db_error:
+        logger.error(f"Error de BD al confirmar reintento de actualización: {str(db_error)}")
+        db.rollback()
+        for index, _ in updated:
+            result.fail(index, BULK_DB_ERROR)
+        return
+    
+    for index, user_id in updated:
+        result.ok(index, user_id)
+
+
+def bulk_update_users(db: Session, items: List[schemas.UserBulkUpdateItem]) -> Dict[str, Any]:
+    """
+    Actualiza usuarios en bloque (UPDATE por clave primaria en lote),
+    con un commit por bloque. Se admite intercambiar emails entre usuarios
+    del mismo bloque. Si el bloque falla, se reintenta ítem por ítem.
+    
+    Args:
+        db: Sesión de base de datos
+        items: Cambios por usuario (solo se actualizan los campos enviados)
+        
+    Returns:
+        Dict: Resultado compacto (ver BulkResult)
+    """
+    result = BulkResult(len(items))
+    candidates = []
+    seen_ids = set()
+    seen_emails = set()
+    
+    for index, item in enumerate(items):
+        if item.id is None or item.id <= 0:
+            result.fail(index, BULK_NOT_FOUND)
+            continue
+        
+        if item.id in seen_ids:
+            result.fail(index, BULK_DUPLICATE_IN_REQUEST)
+            continue
+        
+        values = {}
+        if item.name is not None:
+            name = item.name.strip()
+            if not _is_valid_bulk_name(name):
+                result.fail(index, BULK_INVALID_NAME)
+                continue
+            values["name"] = name
+        
+        if item.email is not None:
+            email = str(item.email).strip().lower()
+            if email in seen_emails:
+                result.fail(index, BULK_DUPLICATE_IN_REQUEST)
+                continue
+            values["email"] = email
+        
+        if not values:
+            result.fail(index, BULK_NOTHING_TO_UPDATE)
+            continue
+        
+        seen_ids.add(item.id)
+        if "email" in values:
+            seen_emails.add(values["email"])
+        candidates.append((index, item.id, values))
+    
+    for chunk in _chunks(candidates, BULK_CHUNK_SIZE):
+        try:
+            found_ids = set(db.scalars(
+                select(models.User.id).where(models.User.id.in_([user_id for _, user_id, _ in chunk]))
+            ))
+            new_emails = [values["email"] for _, _, values in chunk if "email" in values]
+            owners = {}
+            if new_emails:
+                owners = {
+                    email.lower(): user_id
+                    for email, user_id in db.execute(
+                        select(models.User.email, models.User.id).where(models.User.email.in_(new_emails))
+                    )
+                }
+        except SQLAlchemyError as db_error:
+            logger.error(f"Error de BD al verificar usuarios en bloque: {str(db_error)}")
+            db.rollback()
+            for index, _, _ in chunk:
+                result.fail(index, BULK_DB_ERROR)
+            continue
+        
+        #------------------------------------------------------------
+        # Un email ocupado por otro usuario del mismo bloque que también
+        # cambia de email queda libre (intercambios). Agrupar por columnas
+        # modificadas: cada grupo es un executemany
+        #------------------------------------------------------------
+        releasing = {user_id for _, user_id, values in chunk if "email" in values and user_id in found_ids}
+        while True:
+            # Si quien cede su email no puede tomar el nuevo, tampoco lo cede
+            blocked = set()
+            for _, user_id, values in chunk:
+                owner = owners.get(values.get("email"))
+                if owner is not None and owner != user_id and owner not in releasing:
+                    blocked.add(user_id)
+            if not blocked & releasing:
+                break
+            releasing -= blocked
+        
+        to_update = []
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for index, user_id, values in chunk:
+            if user_id not in found_ids:
+                result.fail(index, BULK_NOT_FOUND)
+                continue
+            if user_id in blocked:
+                result.fail(index, BULK_DUPLICATE_EMAIL)
+                continue
+            to_update.append((index, user_id, values))
+            groups.setdefault(tuple(sorted(values)), []).append({"id": user_id, **values})
+        
+        if not to_update:
+            continue
+        
+        # Quien cede su email a otro ítem pasa antes por un valor provisional
+        # único: el índice único se comprueba fila a fila durante el UPDATE
+        swapped = [
+            {"id": owners[values["email"]], "email": f"~{owners[values['email']]}@bulk.swap"}
+            for _, user_id, values in to_update
+            if owners.get(values.get("email")) not in (None, user_id)
+        ]
+        
+        try:
+            if swapped:
+                db.execute(update(models.User), swapped)
+            for params in groups.values():
+                db.execute(update(models.User), params)
+            mark_changed(db, USERS)
+            db.commit()
+            
+            for index, user_id, _ in to_update:
+                result.ok(index, user_id)
+        
+        except SQLAlchemyError as db_error:
+            logger.error(
+                f"Error de BD al actualizar bloque de {len(to_update)} usuarios, reintentando por ítem: {str(db_error)}"
+            )
+            db.rollback()
+            _bulk_update_one_by_one(db, to_update, result)
+    
+    summary = result.to_dict()
+    logger.info(f"Actualización masiva: {summary['succeeded']} actualizados, {summary['failed']} fallidos")
+    return summary
+
+
+def bulk_delete_users(db: Session, user_ids: List[int]) -> Dict[str, Any]:
+    """
+    Elimina usuarios en bloque con un DELETE ... WHERE id IN por bloque.
+    
+    Args:
+        db: Sesión de base de datos
+        user_ids: IDs a eliminar
+        
+    Returns:
+        Dict: Resultado compacto (ver BulkResult)
+    """
+    result = BulkResult(len(user_ids))
+    candidates = []
+    seen_ids = set()
+    
+    for index, user_id in enumerate(user_ids):
+        if user_id is None or user_id <= 0:
+            result.fail(index, BULK_NOT_FOUND)
+        elif user_id in seen_ids:
+            result.fail(index, BULK_DUPLICATE_IN_REQUEST)
+        else:
+            seen_ids.add(user_id)
+            candidates.append((index, user_id))
+    
+    for chunk in _chunks(candidates, BULK_CHUNK_SIZE):
+        try:
+            found_ids = set(db.scalars(
+                select(models.User.id).where(models.User.id.in_([user_id for _, user_id in chunk]))
+            ))
+            
+            to_delete = []
+            for index, user_id in chunk:
+                if user_id in found_ids:
+                    to_delete.append((index, user_id))
+                else:
+                    result.fail(index, BULK_NOT_FOUND)
+            
+            if not to_delete:
+                continue
+            
+            db.execute(
+                delete(models.User)
+                .where(models.User.id.in_([user_id for _, user_id in to_delete]))
+                .execution_options(synchronize_session=False)
+            )
+            mark_changed(db, USERS)
+            db.commit()
+            
+            for index, user_id in to_delete:
+                result.ok(index, user_id)
+        
+        except SQLAlchemyError as db_error:
+            logger.error(f"Error de BD al eliminar bloque de usuarios: {str(db_error)}")
+            db.rollback()
+            failed_indexes = {index for index, _ in result.errors}
+            for index, _ in chunk:
+                if index not in failed_indexes:
+                    result.fail(index, BULK_DB_ERROR)
+    
+    summary = result.to_dict()
+    logger.info(f"Eliminación masiva: {summary['succeeded']} eliminados, {summary['failed']} fallidos")
+    return summary
@@ -1,7 +1,12 @@
 import os
+import itertools
+import threading
+import time
+from fastapi import Request, Response
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
+from app.utils.metrics import instrument_engine
 
 # Cargar variables del archivo .env
 load_dotenv()
@@ -15,12 +20,102 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("No se encontró DATABASE_URL en las variables de entorno")
 
+# Réplicas de solo lectura (opcional), separadas por coma
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+
+# Segundos que un cliente lee del primario después de escribir
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = "rw_primary_until"
+
+# El frontend (otro origen, sin withCredentials) no devuelve la cookie:
+# guarda esta cabecera de las respuestas de escritura y la reenvía
+READ_YOUR_WRITES_HEADER = "X-Primary-Until"
+
 # Crear motor de conexión
 engine = create_engine(DATABASE_URL, echo=True)
 
 # Crear sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Checkouts y espera del pool para /metrics
+instrument_engine(engine, "primary")
+
+#---------------------------------------
+# Réplicas: un motor y una sesión por URL
+#---------------------------------------
+replica_engines = []
+ReplicaSessions = []
+_replica_cycle = None
+_replica_lock = threading.Lock()
+
+
+def configure_replicas(urls):
+    """
+    Crea un motor y un sessionmaker por URL de réplica y reinicia el
+    round-robin. Se llama al importar con DATABASE_REPLICA_URLS; las
+    pruebas lo usan para apuntar a otro archivo SQLite.
+    """
+    global replica_engines, ReplicaSessions, _replica_cycle
+
+    for replica_engine in replica_engines:
+        replica_engine.dispose()
+
+    engines = [create_engine(url, echo=True) for url in urls]
+    for index, replica_engine in enumerate(engines):
+        instrument_engine(replica_engine, f"replica{index}")
+
+    with _replica_lock:
+        replica_engines = engines
+        ReplicaSessions = [
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+            for replica_engine in engines
+        ]
+        _replica_cycle = itertools.cycle(ReplicaSessions) if ReplicaSessions else None
+
+
+configure_replicas(DATABASE_REPLICA_URLS)
+
+
+def get_read_sessionmaker() -> sessionmaker:
+
+    """Siguiente réplica en round-robin, o el primario si no hay réplicas"""
+
+    with _replica_lock:
+        if _replica_cycle is None:
+            return SessionLocal
+        return next(_replica_cycle)
+
+
+def _wrote_recently(request: Request) -> bool:
+    """
+    True si el cliente escribió hace menos de READ_YOUR_WRITES_SECONDS,
+    según la cabecera X-Primary-Until que reenvía o, si no, la cookie
+    """
+    value = request.headers.get(READ_YOUR_WRITES_HEADER) or request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if not value:
+        return False
+    try:
+        until = float(value)
+    except ValueError:
+        return False
+    now = time.time()
+    # El cliente controla el valor: no puede fijar el primario por más tiempo
+    return now < until <= now + READ_YOUR_WRITES_SECONDS
+
+
+def read_sessionmaker_for(request: Request) -> sessionmaker:
+
+    """Sessionmaker de lectura para una petición (respeta read-your-writes)"""
+
+    if _wrote_recently(request):
+        return SessionLocal
+    return get_read_sessionmaker()
+
+
 # Dependencia para FastAPI
 def get_db():
     db = SessionLocal()
@@ -28,3 +123,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_write_db(response: Response):
+    """
+    Sesión sobre el primario para endpoints que escriben.
+    Marca al cliente para que sus próximas lecturas vayan al primario.
+    """
+    if replica_engines and READ_YOUR_WRITES_SECONDS > 0:
+        until = str(time.time() + READ_YOUR_WRITES_SECONDS)
+        response.headers[READ_YOUR_WRITES_HEADER] = until
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            until,
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            samesite="lax"
+        )
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Sesión de solo lectura: usa una réplica, salvo que el cliente
+    haya escrito hace poco (read-your-writes)
+    """
+    db = read_sessionmaker_for(request)()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -5,7 +5,7 @@ Ejecutar: python init_db.py
 
 
 from app.database import engine, Base
-from app.models import User, ExcelUploadLog
+from app.models import User, ExcelUploadLog, ExcelUploadMetrics, UploadStatsRollup, ResourceVersion
 from app.utils.logger_config import logger
 
 def init_database():
@@ -21,6 +21,9 @@ def init_database():
         logger.info("Tablas creada exitosamente")
         logger.info(" - users")
         logger.info(" - excel_upload_logs")
+        logger.info(" - excel_upload_metrics")
+        logger.info(" - upload_stats_rollups")
+        logger.info(" - resource_versions")
         
         #verifica tablas creadas
         from sqlalchemy import inspect
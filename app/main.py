@@ -1,12 +1,17 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.websockets.manager import WebSocketManager
-from app.database import engine, Base
-from app.models import User, ExcelUploadLog
-from app.routers import users, health, excel_upload
+from app.database import engine, Base, READ_YOUR_WRITES_HEADER
+from app.models import User, ExcelUploadLog, ExcelUploadMetrics, UploadStatsRollup, ResourceVersion
+from app.routers import users, health, excel_upload, upload_sessions
 from app.utils.logger_config import logger
+from app.utils import log_tail, metrics, profiling, startup
+from typing import Optional
+import asyncio
+import os
 import time
 
 app = FastAPI(
@@ -28,8 +33,64 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # El frontend lee X-Primary-Until para reenviarlo (read-your-writes)
+    expose_headers=[READ_YOUR_WRITES_HEADER],
 )
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    
+    """Latencia por ruta y peticiones en curso para /metrics"""
+    
+    method = request.method
+    metrics.http_requests_in_flight.inc(method=method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_requests_in_flight.dec(method=method)
+        # Plantilla de la ruta (/logs/{upload_id}), no la URL, para acotar etiquetas
+        route = request.scope.get("route")
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start,
+            method=method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+
+
+#----------------------------------------------------------------------
+# Perfilado por petición (X-Profile + X-Profile-Token). Solo se registra
+# si PROFILE_TOKEN está configurado, así que apagado no cuesta nada.
+#----------------------------------------------------------------------
+if profiling.ENABLED:
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next):
+        if not profiling.is_requested(request):
+            return await call_next(request)
+        
+        if not profiling.try_begin():
+            return JSONResponse(
+                status_code=409,
+                content={"error": "Ya hay un perfil en curso; intente de nuevo cuando termine"}
+            )
+        try:
+            profile = profiling.RequestProfile(f"{request.method}_{request.url.path}")
+            profile.start()
+            try:
+                response = await call_next(request)
+            finally:
+                # Detener el muestreador y escribir el archivo bloquean: fuera del loop
+                path = await run_in_threadpool(profile.stop)
+        finally:
+            profiling.end()
+        response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+
+
 #------------------
 # WebSocket Manager
 #3-----------------
@@ -70,44 +131,26 @@ async def websocket_progress_endpoint(websocket: WebSocket):
 
 @app.on_event("startup")
 async def startup_event():
-    
-    """Inicializar aplicación y conectar a base de datos"""
-    
+    """
+    Inicializar aplicación. La conexión, la revisión del esquema y el
+    precalentamiento del pool corren en segundo plano: /health/live
+    responde de inmediato y /health/ready cuando todo está listo.
+    """
     logger.info("=" * 60)
     logger.info("Aplicación FastAPI iniciada")
     logger.info("=" * 60)
     
-    #Intentar conectar a la base de datos con reintentos
     logger.info("Intentanto conectar a la base de datos")
-    max_retries = 30
-    retry_delay = 2
-    
-    for attempt in range(1, max_retries + 1):
-        try:
-            #Intentar crear/verificar tablas
-            Base.metadata.create_all(bind=engine)
-            logger.info("Conexión de base de datos exitosa")
-            logger.info("Tabla creadas/verificadas correctamente")
-            break
-        except Exception as e:
-            if attempt < max_retries:
-                logger.warning(f"Intento {attempt}/{max_retries}: "
-                               f"Espera que MySQL esté lista... (reintentando en {retry_delay}s)")
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"No se pudo conectar a la base de datos despues de {max_retries} intentos")
-                logger.error(f"Error: {str(e)}")
-                raise Exception(f"Error fatal: No se puede establecer conexión con la base de datos. " f"Verifica que el servicio MySQL este corriendo y la credenciales sean correctas")
-    
-    logger.info("=" *  60)
-    logger.info("Aplicación FastAPI iniciada correctamente")
+    app.state.startup_task = asyncio.create_task(startup.initialize())
     logger.info(f"WebSockect Manager: {websocket_manager}")
-    logger.info("= * 60")
             
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Cerrando aplicación...")
+    startup_task = getattr(app.state, "startup_task", None)
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
     await websocket_manager.disconnect_all()
     logger.info("Aplicación cerrada correctamente")
 
@@ -117,6 +160,7 @@ async def shutdown_event():
 app.include_router(health.router)
 app.include_router(users.router)
 app.include_router(excel_upload.router)
+app.include_router(upload_sessions.router)
 
 
 @app.get("/api/endpoints", tags=["System"])
@@ -137,20 +181,58 @@ async def list_endpoints():
 
 
 @app.get("/api/system/logs", tags=["System"])
-async def get_system_logs(lines: int = 50):
-    """Obtiene las últimas N líneas de logs"""
-    try:
-        log_file = "logs/app.log"
-        with open(log_file, "r", encoding="utf-8") as f:
-            log_lines = f.readlines()
-        recent_logs = log_lines[-lines:]
-        return {
-            "total_lines": len(log_lines),
-            "lines_returned": len(recent_logs),
-            "logs": [line.strip() for line in recent_logs]
-        }
-    except FileNotFoundError:
+async def get_system_logs(
+    lines: int = 50,
+    level: Optional[str] = None,
+    contains: Optional[str] = None,
+    include_rotated: bool = True
+):
+    """Obtiene las últimas N líneas de logs (leyendo desde el final del archivo)"""
+    if lines <= 0:
+        lines = 50
+    elif lines > 5000:
+        lines = 5000
+    
+    files = log_tail.log_files(include_rotated)
+    if not files:
         raise HTTPException(status_code=404, detail="Archivo de logs no encontrado")
+    
+    recent_logs = await run_in_threadpool(log_tail.tail, lines, level, contains, include_rotated)
+    return {
+        "files": files,
+        "lines_returned": len(recent_logs),
+        "logs": recent_logs
+    }
+
+
+# Segundos sin líneas antes de enviar un comentario SSE de keep-alive
+SSE_HEARTBEAT_SECONDS = 15
+
+
+@app.get("/api/system/logs/stream", tags=["System"])
+async def stream_system_logs(
+    request: Request,
+    level: Optional[str] = None,
+    contains: Optional[str] = None
+):
+    """Sigue el log en tiempo real (Server-Sent Events)"""
+    
+    async def event_stream():
+        # follow() emite None tras SSE_HEARTBEAT_SECONDS sin líneas: se responde con un ping
+        lines = log_tail.follow(level, contains, heartbeat=SSE_HEARTBEAT_SECONDS)
+        try:
+            async for line in lines:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n" if line is None else f"data: {line}\n\n"
+        finally:
+            await lines.aclose()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 #------------------
 # Manejo de errores
@@ -182,6 +264,14 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.get("/metrics", tags=["System"])
+async def metrics_endpoint():
+    
+    """Métricas del proceso en formato de texto de Prometheus"""
+    
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/", tags=["Root"])
 async def root():
     return {
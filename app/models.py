@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Boolean, Integer, String, DateTime, Text, Enum as SQLEnum, func
+from sqlalchemy import Column, Boolean, Integer, BigInteger, Float, String, DateTime, Text, ForeignKey, Enum as SQLEnum, UniqueConstraint, func
+from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
 import enum
@@ -11,6 +12,7 @@ class UploadStatusEnum(str, enum.Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 #-----------------------------------------------------------------
 # Modelo de usuario (si lo necesitas para relacionar más adelante)
 #------------------------------------------------------------------
@@ -48,6 +50,12 @@ class ExcelUploadLog(Base):
     failed_rows = Column(Integer, default=0, nullable=False)
     error_message = Column(Text, nullable=True)
 
+    # POST /uploads/{id}/cancel: la ingesta lo consulta entre bloques
+    cancel_requested_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Métricas de rendimiento de la carga (tabla complementaria)
+    metrics = relationship("ExcelUploadMetrics", uselist=False, back_populates="upload_log")
+
     def __repr__(self):
         return f"<ExcelUploadLog(id={self.id}, filename='{self.filename}', status={self.status})>"
 
@@ -56,3 +64,75 @@ class ExcelUploadLog(Base):
         if self.total_rows == 0:
             return 0.0
         return round((self.successful_rows / self.total_rows) * 100, 2)
+
+
+#--------------------------------------------------
+# Métricas por carga: tiempos por fase y throughput
+#--------------------------------------------------
+class ExcelUploadMetrics(Base):
+    """
+    Tiempos por fase, filas por segundo, RSS máxima del proceso y sentencias SQL
+    de cada ingesta, para diagnosticar cargas lentas después del hecho
+    """
+    __tablename__ = "excel_upload_metrics"
+
+    upload_id = Column(Integer, ForeignKey("excel_upload_logs.id", ondelete="CASCADE"), primary_key=True)
+
+    parse_seconds = Column(Float, default=0.0, nullable=False)
+    validation_seconds = Column(Float, default=0.0, nullable=False)
+    dedup_seconds = Column(Float, default=0.0, nullable=False)
+    insert_seconds = Column(Float, default=0.0, nullable=False)
+    total_seconds = Column(Float, default=0.0, nullable=False)
+
+    rows_per_second = Column(Float, default=0.0, nullable=False)
+    # Máximo de la RSS del proceso entre muestreos (no es el pico propio de la carga)
+    max_process_rss_bytes = Column(BigInteger, nullable=True)
+    db_statements = Column(Integer, default=0, nullable=False)
+
+    upload_log = relationship("ExcelUploadLog", back_populates="metrics")
+
+    def __repr__(self):
+        return f"<ExcelUploadMetrics(upload_id={self.upload_id}, total={self.total_seconds}s)>"
+
+
+#-----------------------------------------------------
+# Rollup por hora/día para los gráficos de historial
+#-----------------------------------------------------
+class UploadStatsRollup(Base):
+    """
+    Acumulados de cargas por intervalo de tiempo (hora o día).
+    Se actualiza de forma incremental al terminar cada carga.
+    """
+    __tablename__ = "upload_stats_rollups"
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", name="uq_rollup_granularity_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+
+    uploads = Column(Integer, default=0, nullable=False)
+    total_rows = Column(Integer, default=0, nullable=False)
+    successful_rows = Column(Integer, default=0, nullable=False)
+    failed_rows = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<UploadStatsRollup({self.granularity} {self.bucket_start}, uploads={self.uploads})>"
+
+
+#------------------------------------------------------------
+# Versiones por recurso (para ETag en endpoints de lectura)
+#------------------------------------------------------------
+class ResourceVersion(Base):
+    """
+    Contador que se incrementa en la misma transacción que cada escritura
+    sobre un recurso (usuarios, logs de carga)
+    """
+    __tablename__ = "resource_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<ResourceVersion({self.name}={self.version})>"
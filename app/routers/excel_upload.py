@@ -1,17 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-import pandas as pd
-import asyncio
-from datetime import datetime
+from sqlalchemy import func, select, insert
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Iterator, List, Optional, Tuple, Union
+import os
+import time
+from datetime import datetime, timedelta
 
 
-from app.database import get_db
-from app.models import User, ExcelUploadLog, UploadStatusEnum
-from app.schemas import ExcelPreviewResponse, UploadLogResponse, UploadProgressResponse
+from app.database import get_read_db, get_write_db
+from app.models import User, ExcelUploadLog, ExcelUploadMetrics, UploadStatusEnum
+from app.schemas import ExcelPreviewResponse, UploadLogResponse, UploadLogDetailResponse, UploadProgressResponse, UploadHistoryResponse, ValidationRuleSet, DryRunResponse
 from app.utils.excel_processor import ExcelProcessor
-from app.utils.logger_config import logger
+from app.utils.decompression import DecompressionBudgetError
+from app.utils.workbook_inspector import WorkbookInspectionError
+from fastapi.concurrency import run_in_threadpool
+from app.utils.logger_config import logger, LogSampler
+from app.utils.stats_cache import stats_cache
+from app.utils import upload_rollup, etag, profiling, validation_rules
+from app.utils.fast_json import FastJSONResponse, rows_as_dicts
+from app.utils.ingest_metrics import IngestMetrics
+from app.utils.parse_cache import ParsedFile, parse_cache, content_key
+from app.utils import columnar_spill, upload_cancel
+from app.utils.columnar_spill import SpilledUpload
+from app.utils.admin_auth import require_admin
+from app.utils.validation_rules import ValidationPlan
+from app.utils.lazy_imports import pd, np
+from app.utils import metrics as app_metrics
 
 router = APIRouter(prefix="/api/excel", tags=["Excel Upload"])
 
@@ -31,10 +46,10 @@ async def validate_excel_file(file: UploadFile = File(...)):
             )
             
         #Validar extensión
-        if not file.filename.endswith(('.xlsx', '.xls')):
+        if not file.filename.lower().endswith(ExcelProcessor.SUPPORTED_EXTENSIONS):
             raise HTTPException(
                 status_code=400,
-                detail="El archivo debe ser formato Excel (.xlsx o .xls)"
+                detail="El archivo debe ser Excel (.xlsx o .xls), CSV (.csv o .csv.gz) o .zip"
         )
     
         # Validar tamaño
@@ -52,11 +67,28 @@ async def validate_excel_file(file: UploadFile = File(...)):
             detail=f"El archivo excede el tamaño máximo permitido de 10 MB"
         )
     
-        return {
+        # Hojas y filas estimadas sin parsear el libro (solo .xlsx)
+        try:
+            workbook = await ExcelProcessor.inspect_file(file)
+        except WorkbookInspectionError as e:
+            logger.warning(f"Archivo {file.filename} no es un .xlsx válido: {str(e)}")
+            raise HTTPException(
+                status_code=400,
+                detail="No se puede leer el archivo Excel. Verificar que no este corrupto."
+            )
+        
+        response = {
             "message": "Archivo válido",
             "filename": file.filename,
             "size_ok": is_valid_size
         }
+        if workbook is not None:
+            response.update(
+                sheets=workbook["sheets"],
+                total_sheets=len(workbook["sheets"]),
+                shared_strings_bytes=workbook["shared_strings"]["bytes"]
+            )
+        return response
         
     except HTTPException:
         raise
@@ -80,7 +112,11 @@ async def get_excel_sheets(file: UploadFile = File(...)):
                 detail="No se proporciona ningun archivo"
             )
             
-        sheet_names = await ExcelProcessor.get_sheet_names(file)
+        workbook = await ExcelProcessor.inspect_file(file)
+        if workbook is not None:
+            sheet_names = [sheet["name"] for sheet in workbook["sheets"]]
+        else:
+            sheet_names = await ExcelProcessor.get_sheet_names(file)
         
         if not sheet_names or len(sheet_names) == 0:
             raise HTTPException(
@@ -88,11 +124,17 @@ async def get_excel_sheets(file: UploadFile = File(...)):
                 detail="El archivo Excel no contiene hojas validas"
             )
             
-        return {
+        response = {
             "sheets": sheet_names,
             "total": len(sheet_names)
         }
-    except Exception as e:
+        if workbook is not None:
+            response.update(
+                details=workbook["sheets"],
+                shared_strings=workbook["shared_strings"]
+            )
+        return response
+    except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error al leer hojas de Excel: {str(e)}")
@@ -102,10 +144,43 @@ async def get_excel_sheets(file: UploadFile = File(...)):
         )
 
 
+# Filas por página del preview
+PREVIEW_DEFAULT_LIMIT = 50
+PREVIEW_MAX_LIMIT = 500
+
+
+def _preview_response(entry: ParsedFile, offset: int, limit: int, errors_only: bool) -> ExcelPreviewResponse:
+    
+    """Página del preview desde el archivo cacheado (crea los modelos solo de la página)"""
+    
+    validation, invalid_positions = entry.validation()
+    positions, matching_rows = entry.page(offset, limit, errors_only)
+    
+    return ExcelPreviewResponse(
+        total_rows=len(entry.df),
+        preview_rows=ExcelProcessor.preview_rows(entry.df, validation, positions),
+        columns=entry.df.columns.tolist(),
+        has_errors=len(invalid_positions) > 0,
+        preview_id=entry.key,
+        offset=offset,
+        limit=limit,
+        errors_only=errors_only,
+        matching_rows=matching_rows,
+        invalid_rows=len(invalid_positions)
+    )
+
+
 @router.post("/preview", response_model=ExcelPreviewResponse)
-async def preview_excel_data(file: UploadFile = File(...)):
+async def preview_excel_data(
+    file: UploadFile = File(...),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_DEFAULT_LIMIT, ge=1, le=PREVIEW_MAX_LIMIT),
+    errors_only: bool = Query(False, description="Solo filas con errores")
+):
     """
-    Muestra un preview de los datos del Excel con validaciones
+    Muestra un preview de los datos del Excel con validaciones.
+    El archivo parseado queda en caché: las siguientes páginas se piden
+    con GET /preview/{preview_id} sin volver a enviarlo.
     """
     
     try:
@@ -114,62 +189,18 @@ async def preview_excel_data(file: UploadFile = File(...)):
                 status_code=400,
                 detail="No se proporcionó ningun archivo"
             )
-
-        #Leer Excel
-        try:
-            df = await ExcelProcessor.read_excel(file)
-        except Exception as e:
-            logger.error(f"Error al leer Excel: {str(e)}")
-            raise HTTPException(
-                status_code=400,
-                detail="No se puede leer el archivo Excel. Verificar que no este corrupto."
-            )
-            
-        if df is None or df.empty:
-            raise HTTPException(
-                status_code=400,
-                detail="El archivo Excel esta vacio o no contiene datos validos"
-            )
-            
-            
-        # Validar estructura
-        try:
-            is_valid, errors = ExcelProcessor.validate_structure(df)
-        except Exception as e:
-            logger.error(f"Error al validar estructura: {str(e)}")
-            raise HTTPException(
-                status_code=400,
-                detail="Error al validar la estructura del el archhivo"
-            )
-            
-        if not is_valid:
-            if errors:
-                raise HTTPException(status_code=400, detail={"errors": errors})
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="La estructura del archivo no es valida"
-                )
         
+        entry = await _parse_upload_cached(file)
         
         # Obtener preview con validaciones
         try:
-            preview_rows = ExcelProcessor.get_preview(df, max_rows=50)
+            return await run_in_threadpool(_preview_response, entry, offset, limit, errors_only)
         except Exception as e:
             logger.error(f"Error al generar preview: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail="Erro al generar la vista previa"
             )
-        
-        has_errors = any(not row.is_valid for row in preview_rows) if preview_rows else False
-        
-        return ExcelPreviewResponse(
-            total_rows=len(df),
-            preview_rows=preview_rows,
-            columns=df.columns.tolist(),
-            has_errors=has_errors
-        )
     
     except HTTPException:
         raise
@@ -181,11 +212,158 @@ async def preview_excel_data(file: UploadFile = File(...)):
         )
 
 
+@router.get("/preview/{preview_id}", response_model=ExcelPreviewResponse)
+async def get_preview_page(
+    preview_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_DEFAULT_LIMIT, ge=1, le=PREVIEW_MAX_LIMIT),
+    errors_only: bool = Query(False, description="Solo filas con errores")
+):
+    """
+    Otra página de un preview ya parseado (sin volver a leer el archivo)
+    """
+    entry = parse_cache.get(preview_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="El preview expiró o no existe; vuelva a enviar el archivo"
+        )
+    return await run_in_threadpool(_preview_response, entry, offset, limit, errors_only)
+
+
+def _check_parsed_dataframe(df: "pd.DataFrame"):
+    
+    """Rechaza con 400 un DataFrame vacío o sin las columnas requeridas"""
+    
+    if df is None or df.empty:
+        raise HTTPException(
+            status_code=400,
+            detail="El archivo Excel esta vacío"
+        )
+        
+    try:
+        is_valid, errors = ExcelProcessor.validate_structure(df)
+    except Exception as e:
+        logger.error(f"Error a validar estructura: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al validar la estructra del archivo"
+        )
+    
+    if not is_valid:
+        if errors:
+            raise HTTPException(status_code=400, detail={"errors": errors})
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail="La estructura del archivo no es valida."
+            )
+
+
+async def _parse_upload_cached(file: UploadFile) -> ParsedFile:
+    """
+    Parsea la carga, o la toma de la caché si ya se envió el mismo archivo
+    (p. ej. /preview y después /upload). Solo se cachean archivos válidos.
+    """
+    await file.seek(0)
+    key = await run_in_threadpool(content_key, file.file)
+    entry = parse_cache.get(key)
+    if entry is not None:
+        return entry
+    
+    parse_started = time.perf_counter()
+    try:
+        df = await run_in_threadpool(ExcelProcessor.read_upload, file.file, file.filename)
+    except DecompressionBudgetError as e:
+        logger.warning(f"Carga rechazada por presupuesto de descompresión: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error al leer Excel: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail="No se puede leer el archivo Excel"
+        )
+    
+    _check_parsed_dataframe(df)
+    return parse_cache.put(key, file.filename, df, time.perf_counter() - parse_started)
+
+
+def _ingest_columns(df: "pd.DataFrame", plan: Optional[ValidationPlan] = None) -> "pd.DataFrame":
+    
+    """Vista del DataFrame con las columnas que el plan de validación necesita"""
+    
+    plan = plan or validation_rules.current_plan()
+    columns = [column for column in plan.columns if column in df.columns]
+    return df[columns]
+
+
+async def _start_ingest(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    df: "pd.DataFrame",
+    filename: str,
+    parse_seconds: float
+) -> ExcelUploadLog:
+    """
+    Crea el log de carga y programa la ingesta en background.
+    Compartido por /upload y la finalización de cargas por partes.
+    """
+    try:
+        upload_log = ExcelUploadLog(
+            filename=filename,
+            status=UploadStatusEnum.PROCESSING,
+            total_rows=len(df)
+        )
+        db.add(upload_log)
+        etag.mark_changed(db, etag.UPLOAD_LOGS)
+        db.commit()
+        db.refresh(upload_log)
+        stats_cache.invalidate()
+        
+    except Exception as e:
+        logger.error(f"Error al crear log de carga: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail="Error al iniciar el registro de carga"
+        )
+    
+    # Las columnas que usan las reglas se vuelcan a disco en formato
+    # columnar: la carga en cola no retiene el DataFrame y la ingesta la
+    # lee por bloques con mmap. El volcado fija las reglas: si cambian
+    # antes de la ingesta, la carga se valida con las que eligieron las
+    # columnas
+    plan = validation_rules.current_plan()
+    try:
+        path = await run_in_threadpool(
+            columnar_spill.spill_dataframe, _ingest_columns(df, plan), upload_log.id, plan.rule_set
+        )
+    except Exception as e:
+        logger.error(f"Error al volcar la carga {upload_log.id} a disco: {str(e)}")
+        _mark_upload_as_failed(db, upload_log.id, "No se pudo preparar la carga para procesar")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al preparar la carga para procesar"
+        )
+    
+    background_tasks.add_task(
+        process_excel_data_safe,
+        spill_path=path,
+        upload_log_id=upload_log.id,
+        parse_seconds=parse_seconds,
+        # Con X-Profile + token también se perfila la ingesta en background
+        profile=profiling.is_requested(request)
+    )
+    return upload_log
+
+
 @router.post("/upload")
 async def upload_excel_data(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Carga los datos del Excel a la base de datos
@@ -197,66 +375,13 @@ async def upload_excel_data(
                 status_code=400,
                 detail="No se proporcionó ningun archivo"
             )
-        # Leer y validar Excel
-        try:
-            df = await ExcelProcessor.read_excel(file)
-        except Exception as e:
-            logger.error(f"Error al leer Excel: {str(e)}")
-            raise HTTPException(
-                status_code=400,
-                detail="No se puede leer el archivo Excel"
-            )
-            
-        if df is None or df.empty:
-            raise HTTPException(
-                status_code=400,
-                detail="El archivo Excel esta vacío"
-            )
-            
-        try:
-            is_valid, errors = ExcelProcessor.validate_structure(df)
-        except Exception as e:
-            logger.error(f"Error a validar estructura: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail="Error al validar la estructra del archivo"
-            )
-        
-        if not is_valid:
-            if errors:
-                raise HTTPException(status_code=400, detail={"errors": errors})
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="La estructura del archivo no es valida."
-                )
-        
-        # Crear log de carga
-        try:
-            upload_log = ExcelUploadLog(
-                filename=file.filename,
-                status=UploadStatusEnum.PROCESSING,
-                total_rows=len(df)
-        )
-            db.add(upload_log)
-            db.commit()
-            db.refresh(upload_log)
-            
-        except Exception as e:
-            logger.error(f"Error al crear log de carga: {str(e)}")
-            db.rollback()
-            raise HTTPException(
-                status_code=500,
-                detail="Error al iniciar el registro de carga"
-            )
+        # Leer y validar Excel (el tiempo de parseo se guarda en las métricas);
+        # si el archivo ya pasó por /preview se reutiliza el parseo
+        entry = await _parse_upload_cached(file)
+        df = entry.df
         
-        #Procesae en backgroud - Converti Dataframe  a dict para serialización
-        df_dict = df.to_dict('records')
-        background_tasks.add_task(
-            process_excel_data_safe,
-            df_records=df_dict,
-            upload_log_id=upload_log.id
-        )
+        upload_log = await _start_ingest(db, background_tasks, request, df, file.filename, entry.parse_seconds)
+        parse_cache.discard(entry.key)
         
         return {
             "message": "Cerga iniciada existosamente",
@@ -272,9 +397,10 @@ async def upload_excel_data(
         #Intentar marcar del log como fallido si existe
         if upload_log and upload_log.id:
             try:
-                upload_log.status = UploadStatusEnum.FAILED
-                upload_log.error_message = str(e)
-                db.commit()
+                _finalize_upload_log(
+                    db, upload_log, UploadStatusEnum.FAILED,
+                    error_message=str(e)
+                )
             except Exception as db_error:
                 logger.error(f"Error al actualizar log de fallo: {str(db_error)}")
                 db.rollback()
@@ -285,38 +411,150 @@ async def upload_excel_data(
             
         )
 
+# Emails por consulta IN al buscar los ya registrados
+DRY_RUN_BATCH_SIZE = 1000
+
+DUPLICATE_IN_FILE_MESSAGE = "Email duplicado en el archivo"
+EXISTING_IN_DB_MESSAGE = "Email ya registrado"
+
+
+def _dry_run(df: "pd.DataFrame", db: Session, max_errors: int) -> dict:
+    """
+    Valida todas las filas como lo haría la ingesta, sin escribir:
+    reglas (vectorizadas), emails repetidos dentro del archivo y emails
+    ya registrados (consultas IN por lotes). Corre en el threadpool.
+    """
+    validation = ExcelProcessor.validate_dataframe(df)
+    emails = pd.Series(validation.values['email'])
+    valid = validation.valid
+    
+    # Como en la ingesta: la primera aparición válida gana, las demás fallan
+    duplicated = valid & emails.where(valid).duplicated(keep='first').to_numpy()
+    candidates = valid & ~duplicated
+    
+    existing = set()
+    unique_emails = emails[candidates].unique().tolist()
+    for start in range(0, len(unique_emails), DRY_RUN_BATCH_SIZE):
+        batch = unique_emails[start:start + DRY_RUN_BATCH_SIZE]
+        existing.update(
+            email.lower()
+            for email in db.scalars(select(User.email).where(User.email.in_(batch)))
+        )
+    in_db = candidates & emails.isin(existing).to_numpy()
+    
+    problems = ~valid | duplicated | in_db
+    positions = np.flatnonzero(problems)
+    names = validation.values['name']
+    errors = []
+    for position in positions[:max_errors]:
+        messages = validation.messages_for(position)
+        if duplicated[position]:
+            messages.append(DUPLICATE_IN_FILE_MESSAGE)
+        if in_db[position]:
+            messages.append(EXISTING_IN_DB_MESSAGE)
+        errors.append({
+            # +2 porque Excel empieza en 1 y hay header
+            "row_number": int(df.index[position]) + 2,
+            "name": names[position],
+            "email": emails.iat[position],
+            "errors": messages,
+        })
+    
+    return {
+        "total_rows": len(df),
+        "valid_rows": validation.valid_count,
+        "invalid_rows": validation.invalid_count,
+        "duplicates_in_file": int(duplicated.sum()),
+        "existing_in_db": int(in_db.sum()),
+        "would_insert": int((candidates & ~in_db).sum()),
+        "violations": validation.violation_counts(),
+        "errors": errors,
+        "errors_truncated": len(positions) > max_errors,
+    }
+
+
+@router.post("/dry-run", response_model=DryRunResponse)
+async def dry_run_excel_data(
+    file: UploadFile = File(...),
+    max_errors: int = Query(100, ge=0, le=5000, description="Filas con error a devolver"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Valida el archivo completo sin cargar nada: resumen de errores por
+    regla, duplicados en el archivo y emails ya existentes en la BD
+    """
+    if not file or not file.filename:
+        raise HTTPException(
+            status_code=400,
+            detail="No se proporcionó ningun archivo"
+        )
+    
+    parse_started = time.perf_counter()
+    df = (await _parse_upload_cached(file)).df
+    parse_seconds = time.perf_counter() - parse_started
+    
+    check_started = time.perf_counter()
+    try:
+        result = await run_in_threadpool(_dry_run, df, db, max_errors)
+    except Exception as e:
+        logger.error(f"Error en validación completa de {file.filename}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Error al validar el archivo"
+        )
+    check_seconds = time.perf_counter() - check_started
+    
+    logger.info(
+        f"Dry-run de {file.filename}: {result['total_rows']} filas, "
+        f"{result['would_insert']} se insertarían ({parse_seconds:.2f}s parseo, {check_seconds:.2f}s validación)"
+    )
+    return {
+        **result,
+        "filename": file.filename,
+        "parse_seconds": round(parse_seconds, 3),
+        "check_seconds": round(check_seconds, 3),
+    }
+
+
 # ============================================
 # NUEVO ENDPOINT: ESTADÍSTICAS
 # ============================================
 @router.get("/stats")
-async def get_upload_stats(db: Session = Depends(get_db)):
+async def get_upload_stats(
+    request: Request,
+    response: Response,
+    read: Tuple[int, Session] = Depends(etag.versioned_read_db(etag.UPLOAD_LOGS))
+):
     """
     Obtiene estadísticas de las cargas de Excel
     """
+    version, db = read
     try:
         logger.info("Obteniendo estadísticas de cargas...")
         
-        # Estadísticas totales con validación
-        try:
-            total_uploads = db.query(func.count(ExcelUploadLog.id)).scalar()
-            total_uploads = int(total_uploads) if total_uploads is not None else 0
-        except Exception as e:
-            logger.error(f"Error al obtener total de cargas: {str(e)}")
-            total_uploads = 0
+        # ETag a partir de la versión de los logs (sin tocar la tabla de logs)
+        stats_etag = etag.build_etag("stats", version)
+        if etag.is_not_modified(request, stats_etag):
+            return etag.not_modified_response(stats_etag)
+        etag.set_etag_headers(response, stats_etag)
         
-        try:
-            total_successful = db.query(func.sum(ExcelUploadLog.successful_rows)).scalar()
-            total_successful = int(total_successful) if total_successful is not None else 0
-        except Exception as e:
-            logger.error(f"Error al obtener filas exitosas: {str(e)}")
-            total_successful = 0
+        cached = stats_cache.get(version)
+        if cached is not None:
+            return cached
         
+        # Estadísticas totales en una sola consulta
         try:
-            total_failed = db.query(func.sum(ExcelUploadLog.failed_rows)).scalar()
-            total_failed = int(total_failed) if total_failed is not None else 0
+            total_uploads, total_successful, total_failed = db.query(
+                func.count(ExcelUploadLog.id),
+                func.coalesce(func.sum(ExcelUploadLog.successful_rows), 0),
+                func.coalesce(func.sum(ExcelUploadLog.failed_rows), 0)
+            ).one()
+            total_uploads = int(total_uploads or 0)
+            total_successful = int(total_successful or 0)
+            total_failed = int(total_failed or 0)
         except Exception as e:
-            logger.error(f"Error al obtener filas fallidas: {str(e)}")
-            total_failed = 0
+            logger.error(f"Error al obtener totales de cargas: {str(e)}")
+            total_uploads, total_successful, total_failed = 0, 0, 0
         
         logger.info(f"Total uploads: {total_uploads}, Exitosas: {total_successful}, Fallidas: {total_failed}")
         
@@ -324,7 +562,13 @@ async def get_upload_stats(db: Session = Depends(get_db)):
         recent_uploads = []
         try:
             recent_uploads = (
-                db.query(ExcelUploadLog)
+                db.query(
+                    ExcelUploadLog.id,
+                    ExcelUploadLog.filename,
+                    ExcelUploadLog.uploaded_at,
+                    ExcelUploadLog.successful_rows,
+                    ExcelUploadLog.failed_rows
+                )
                 .order_by(ExcelUploadLog.uploaded_at.desc())
                 .limit(10)
                 .all()
@@ -367,15 +611,16 @@ async def get_upload_stats(db: Session = Depends(get_db)):
         
         logger.info(f"Datos de gráficos: {len(chart_data['labels'])} cargas")
         
-        response = {
+        stats = {
             'total_uploads': total_uploads,
             'total_successful': total_successful,
             'total_failed': total_failed,
             'chart_data': chart_data
         }
         
+        stats_cache.set(version, stats)
         logger.info(" Estadísticas obtenidas exitosamente")
-        return response
+        return stats
         
     except Exception as e:
         logger.error(f"Error crítico al obtener estadísticas: {str(e)}", exc_info=True)
@@ -385,31 +630,97 @@ async def get_upload_stats(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/stats/history", response_model=UploadHistoryResponse)
+async def get_upload_history(
+    from_date: Optional[datetime] = Query(None, alias="from"),
+    to_date: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = "day",
+    db: Session = Depends(get_read_db)
+):
+    """
+    Historial de cargas por hora o día, servido desde la tabla de rollups
+    """
+    if granularity not in upload_rollup.GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail="granularity debe ser 'hour' o 'day'"
+        )
+    
+    to_date = to_date or datetime.now()
+    from_date = from_date or (to_date - timedelta(days=30))
+    
+    if from_date > to_date:
+        raise HTTPException(
+            status_code=400,
+            detail="'from' debe ser anterior a 'to'"
+        )
+    
+    if to_date - from_date > upload_rollup.max_range(granularity):
+        raise HTTPException(
+            status_code=400,
+            detail="El rango solicitado es demasiado grande para esa granularidad"
+        )
+    
+    try:
+        buckets = upload_rollup.get_history(db, from_date, to_date, granularity)
+    except Exception as e:
+        logger.error(f"Error al obtener historial de cargas: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error al obtener el historial de cargas"
+        )
+    
+    label_format = '%Y-%m-%d %H:00' if granularity == "hour" else '%Y-%m-%d'
+    
+    return UploadHistoryResponse(
+        granularity=granularity,
+        labels=[b.bucket_start.strftime(label_format) for b in buckets],
+        uploads=[b.uploads for b in buckets],
+        total_rows=[b.total_rows for b in buckets],
+        successful=[b.successful_rows for b in buckets],
+        failed=[b.failed_rows for b in buckets]
+    )
+
+
 @router.get("/logs", response_model=List[UploadLogResponse])
 async def get_upload_logs(
+    request: Request,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    read: Tuple[int, Session] = Depends(etag.versioned_read_db(etag.UPLOAD_LOGS))
 ):
     """
     Obtiene el historial de cargas
     """
+    version, db = read
     try:
         if limit <= 0:
             limit = 50
         elif limit > 500:
             limit = 500
         
-        logs = (
-            db.query(ExcelUploadLog)
+        logs_etag = etag.build_etag(etag.UPLOAD_LOGS, version, limit)
+        if etag.is_not_modified(request, logs_etag):
+            return etag.not_modified_response(logs_etag)
+        
+        # Columnas planas + orjson: sin objetos ORM ni modelos pydantic por fila
+        result = db.execute(
+            select(
+                ExcelUploadLog.id,
+                ExcelUploadLog.filename,
+                ExcelUploadLog.uploaded_at,
+                ExcelUploadLog.status,
+                ExcelUploadLog.total_rows,
+                ExcelUploadLog.successful_rows,
+                ExcelUploadLog.failed_rows,
+                ExcelUploadLog.error_message
+            )
             .order_by(ExcelUploadLog.uploaded_at.desc())
             .limit(limit)
-            .all()
         )
         
-        if not logs:
-            return []
-        
-        return logs
+        response = FastJSONResponse(rows_as_dicts(result))
+        etag.set_etag_headers(response, logs_etag)
+        return response
     
     except Exception as e:
         logger.error(f"Error al obtener logs: {str(e)}")
@@ -419,8 +730,8 @@ async def get_upload_logs(
         )
 
 
-@router.get("/logs/{upload_id}", response_model=UploadLogResponse)
-async def get_upload_log(upload_id: int, db: Session = Depends(get_db)):
+@router.get("/logs/{upload_id}", response_model=UploadLogDetailResponse)
+async def get_upload_log(upload_id: int, db: Session = Depends(get_read_db)):
     """
     Obtiene el detalle de una carga específica
     """
@@ -451,13 +762,140 @@ async def get_upload_log(upload_id: int, db: Session = Depends(get_db)):
         )
 
 
-def process_excel_data_safe(df_records: list, upload_log_id: int):
+@router.post("/uploads/{upload_id}/cancel", status_code=202)
+async def cancel_upload(upload_id: int, db: Session = Depends(get_write_db)):
     """
-    Versión segura de process_excel_data que crea su propia sesión de BD
+    Pide cancelar una carga en curso; la respuesta solo confirma que se
+    registró el pedido. La ingesta lo revisa antes de confirmar cada
+    tramo (INGEST_CHUNK_SIZE filas): descarta ese tramo y deja el log en
+    "cancelled", con las filas de tramos anteriores ya insertadas. Si el
+    pedido llega después del último tramo, la carga termina "completed".
+    El estado final se consulta en GET /logs/{upload_id}.
+    """
+    try:
+        if upload_id <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="ID de carga inválido"
+            )
+        
+        log = db.query(ExcelUploadLog).filter(ExcelUploadLog.id == upload_id).first()
+        
+        if not log:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Log con ID {upload_id} no encontrado"
+            )
+        
+        # Si no se marcó, o terminó mientras tanto o ya estaba marcada
+        # (pedirlo dos veces no es error)
+        if log.status not in upload_rollup.FINAL_STATUSES and not upload_cancel.request_cancel(db, upload_id):
+            db.refresh(log)
+        
+        if log.status in upload_rollup.FINAL_STATUSES:
+            raise HTTPException(
+                status_code=409,
+                detail=f"La carga ya terminó con estado {log.status.value}"
+            )
+        
+        logger.info(f"Cancelación solicitada para la carga {upload_id}")
+        
+        return {
+            "message": "Cancelación solicitada; se aplica antes del siguiente tramo si la carga no terminó antes",
+            "upload_id": upload_id,
+            "status": "cancel_requested"
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al cancelar carga {upload_id}: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail="Error al cancelar la carga"
+        )
+
+
+@router.post("/uploads/{upload_id}/profile", status_code=202)
+async def profile_upload(upload_id: int, request: Request):
+    """
+    Perfila con cProfile lo que queda de una ingesta en curso, desde su
+    siguiente bloque; el perfil queda en PROFILE_DIR como ingest_{id}.
+    Requiere X-Profile-Token. Solo lo atiende el proceso que corre la
+    ingesta: con varios workers los demás responden 409.
+    """
+    if not profiling.ENABLED:
+        raise HTTPException(status_code=404, detail="El perfilado no está habilitado")
+
+    if not profiling.token_is_valid(request):
+        raise HTTPException(status_code=403, detail="Token de perfilado inválido")
+
+    if not profiling.request_ingest_profile(upload_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"La carga {upload_id} no se está procesando en este proceso"
+        )
+
+    logger.info(f"Perfilado solicitado para la carga {upload_id}")
+
+    return {
+        "message": "Perfilado solicitado",
+        "upload_id": upload_id,
+        "status": "profiling"
+    }
+
+
+@router.get("/validation-rules", response_model=ValidationRuleSet)
+async def get_validation_rules():
+    """
+    Conjunto de reglas de validación activo
+    """
+    return validation_rules.current_rule_set()
+
+
+@router.put("/validation-rules", response_model=ValidationRuleSet, dependencies=[Depends(require_admin)])
+async def update_validation_rules(rule_set: ValidationRuleSet):
+    """
+    Reemplaza el conjunto de reglas (requiere X-Admin-Token). Se compila
+    antes de guardarlo, así que una regla inválida no afecta a las cargas
+    en curso.
+    """
+    try:
+        # La prueba previa de las expresiones regulares corre en un subproceso
+        saved = await run_in_threadpool(validation_rules.save_rule_set, rule_set.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"Reglas de validación actualizadas: {len(saved['rules'])} reglas")
+    return saved
+
+
+@router.delete("/validation-rules", response_model=ValidationRuleSet, dependencies=[Depends(require_admin)])
+async def reset_validation_rules():
+    """
+    Vuelve a las reglas por defecto (requiere X-Admin-Token)
+    """
+    validation_rules.reset_rule_set()
+    return validation_rules.current_rule_set()
+
+
+def process_excel_data_safe(
+    spill_path: str,
+    upload_log_id: int,
+    parse_seconds: float = 0.0,
+    profile: bool = False
+):
+    """
+    Versión segura de process_excel_data que crea su propia sesión de BD.
+    Lee la carga del volcado en disco y lo borra al terminar.
     """
     from app.database import SessionLocal
     
     db = None
+    app_metrics.upload_active_jobs.inc()
+    # POST /uploads/{id}/cancel en este proceso activa el evento sin ir a la BD
+    upload_cancel.register(upload_log_id)
     try:
         # Crear nueva sesión de BD para el background task
         db = SessionLocal()
@@ -466,21 +904,19 @@ def process_excel_data_safe(df_records: list, upload_log_id: int):
             logger.error("No se pudo crear sesión de base de datos")
             return
         
-        # Convertir records de vuelta a DataFrame
-        try:
-            df = pd.DataFrame(df_records)
-        except Exception as e:
-            logger.error(f"Error al reconstruir DataFrame: {str(e)}")
-            _mark_upload_as_failed(db, upload_log_id, "Error al procesar datos")
-            return
-        
-        if df.empty:
-            logger.error("DataFrame vacío en background task")
+        spilled = SpilledUpload(spill_path)
+        if len(spilled) == 0:
+            logger.error("Volcado vacío en background task")
             _mark_upload_as_failed(db, upload_log_id, "No hay datos para procesar")
             return
         
-        # Procesar datos
-        process_excel_data(df, upload_log_id, db)
+        # Las reglas fijadas al volcar (o las activas si el volcado no las trae)
+        plan = ValidationPlan(spilled.rule_set) if spilled.rule_set else None
+        
+        # Procesar datos midiendo fases y sentencias SQL de este hilo
+        metrics = IngestMetrics(parse_seconds=parse_seconds)
+        with profiling.profile_ingest(upload_log_id, profile), metrics.track_statements():
+            process_excel_data(spilled, upload_log_id, db, metrics=metrics, plan=plan)
         
     except Exception as e:
         logger.error(f"Error crítico en background task: {str(e)}", exc_info=True)
@@ -491,6 +927,9 @@ def process_excel_data_safe(df_records: list, upload_log_id: int):
                 logger.error(f"Error al marcar carga como fallida: {str(mark_error)}")
     
     finally:
+        app_metrics.upload_active_jobs.dec()
+        upload_cancel.unregister(upload_log_id)
+        columnar_spill.remove(spill_path)
         if db:
             try:
                 db.close()
@@ -498,6 +937,56 @@ def process_excel_data_safe(df_records: list, upload_log_id: int):
                 logger.error(f"Error al cerrar sesión de BD: {str(e)}")
 
 
+def _finalize_upload_log(
+    db: Session,
+    upload_log: ExcelUploadLog,
+    status: UploadStatusEnum,
+    successful: Optional[int] = None,
+    failed: Optional[int] = None,
+    error_message: Optional[str] = None,
+    metrics: Optional[IngestMetrics] = None
+):
+    """
+    Cierra el log de una carga: guarda el estado final, actualiza los
+    rollups de historial e invalida la caché de estadísticas
+    """
+    already_final = upload_log.status in upload_rollup.FINAL_STATUSES
+    
+    upload_log.status = status
+    if successful is not None:
+        upload_log.successful_rows = successful
+    if failed is not None:
+        upload_log.failed_rows = failed
+    if error_message is not None:
+        upload_log.error_message = error_message[:500]  # Limitar longitud
+    
+    # Cada carga se suma a los rollups una sola vez
+    if not already_final:
+        upload_rollup.apply_upload(
+            db,
+            upload_log.uploaded_at,
+            upload_log.total_rows,
+            upload_log.successful_rows,
+            upload_log.failed_rows
+        )
+    
+    metrics_values = None
+    if metrics is not None:
+        metrics.rows = upload_log.total_rows or 0
+        metrics_values = metrics.as_model_kwargs()
+        db.merge(ExcelUploadMetrics(upload_id=upload_log.id, **metrics_values))
+    
+    etag.mark_changed(db, etag.UPLOAD_LOGS)
+    db.commit()
+    stats_cache.invalidate()
+    
+    if not already_final:
+        app_metrics.upload_rows.inc(upload_log.successful_rows or 0, result="successful")
+        app_metrics.upload_rows.inc(upload_log.failed_rows or 0, result="failed")
+    if metrics_values is not None:
+        app_metrics.upload_rows_per_second.set(metrics_values["rows_per_second"])
+
+
 def _mark_upload_as_failed(db: Session, upload_log_id: int, error_message: str):
     """
     Función auxiliar para marcar una carga como fallida
@@ -508,9 +997,10 @@ def _mark_upload_as_failed(db: Session, upload_log_id: int, error_message: str):
         ).first()
         
         if upload_log:
-            upload_log.status = UploadStatusEnum.FAILED
-            upload_log.error_message = error_message[:500]  # Limitar longitud
-            db.commit()
+            _finalize_upload_log(
+                db, upload_log, UploadStatusEnum.FAILED,
+                error_message=error_message
+            )
         else:
             logger.error(f"No se encontró upload_log con ID {upload_log_id}")
     
@@ -522,17 +1012,102 @@ def _mark_upload_as_failed(db: Session, upload_log_id: int, error_message: str):
             pass
 
 
-def process_excel_data(df: pd.DataFrame, upload_log_id: int, db: Session):
+# Filas por bloque de la ingesta: una consulta de duplicados, un INSERT
+# multi-fila y un commit por bloque
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+
+# Filas que se leen del volcado y se validan juntas; validar bloques de
+# INGEST_CHUNK_SIZE repetiría el costo fijo de cada regla demasiadas veces
+INGEST_READ_ROWS = max(int(os.getenv("INGEST_READ_ROWS", "20000")), INGEST_CHUNK_SIZE)
+
+
+def _check_cancel_before_commit(db: Session, upload_id: Optional[int]):
+    """
+    Con upload_id, lanza UploadCancelled si se pidió cancelar la carga.
+    Va justo antes del commit del tramo: quien la atrapa hace rollback y
+    el tramo no queda insertado.
+    """
+    if upload_id is not None and upload_cancel.is_requested(db, upload_id, lock=True):
+        raise upload_cancel.UploadCancelled()
+
+
+def _insert_chunk(db: Session, rows: List[dict], row_log: LogSampler, upload_id: Optional[int] = None) -> int:
     """
-    Procesa los datos del Excel e inserta en la base de datos
+    Inserta un bloque con un INSERT multi-fila y un commit. Si el bloque
+    falla (p. ej. otra carga insertó el mismo email entre la consulta y
+    el INSERT), se reintenta fila por fila, cada una en un savepoint y
+    con un solo commit al final, para no perder las válidas.
+    Con upload_id, una cancelación pedida antes del commit lo impide.
+    Retorna cuántas filas se insertaron.
     """
+    try:
+        db.execute(insert(User), rows)
+        etag.mark_changed(db, etag.USERS)
+        _check_cancel_before_commit(db, upload_id)
+        db.commit()
+        return len(rows)
+    except SQLAlchemyError as e:
+        row_log.error("error_bloque", "Error al insertar bloque de %d filas, reintentando por fila: %s", len(rows), e)
+        db.rollback()
+    
+    inserted = 0
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(User), row)
+            inserted += 1
+        except SQLAlchemyError as e:
+            row_log.error("error_insercion", "Error al crear usuario %s: %s", row["email"], e)
+    
+    if inserted:
+        etag.mark_changed(db, etag.USERS)
+    _check_cancel_before_commit(db, upload_id)
+    db.commit()
+    return inserted
+
+
+def _iter_ingest_blocks(source: Union["pd.DataFrame", SpilledUpload]) -> Iterator["pd.DataFrame"]:
+    
+    """Bloques de INGEST_READ_ROWS filas de un DataFrame o de un volcado en disco"""
+    
+    if isinstance(source, SpilledUpload):
+        yield from source.iter_chunks(INGEST_READ_ROWS)
+        return
+    for start in range(0, len(source), INGEST_READ_ROWS):
+        yield source.iloc[start:start + INGEST_READ_ROWS]
+
+
+def process_excel_data(
+    source: Union["pd.DataFrame", SpilledUpload],
+    upload_log_id: int,
+    db: Session,
+    metrics: Optional[IngestMetrics] = None,
+    plan: Optional[ValidationPlan] = None
+):
+    """
+    Procesa los datos del Excel e inserta en la base de datos.
+    source es el DataFrame o el volcado columnar de la carga; se lee un
+    bloque de INGEST_READ_ROWS filas a la vez, donde la validación y los
+    duplicados son máscaras sobre columnas. Cada bloque se inserta en
+    tramos de INGEST_CHUNK_SIZE con una consulta de emails existentes y un
+    INSERT multi-fila. Un email repetido en un bloque posterior ya está en
+    la BD y cuenta como existente. Todos los bloques se validan con plan
+    (por defecto, el conjunto activo al empezar).
+    """
+    metrics = metrics or IngestMetrics()
+    plan = plan or validation_rules.current_plan()
     successful = 0
     failed = 0
-    total = len(df)
+    total = len(source) if source is not None else 0
+    # Filas de los bloques ya terminados (para el resumen si se cancela)
+    offset = handled = 0
+    
+    # Un resumen por carga en lugar de una línea por fila
+    row_log = LogSampler(logger)
     
     try:
         # Validar datos iniciales
-        if df is None or df.empty:
+        if total == 0:
             raise ValueError("DataFrame vacío o None")
         
         if upload_log_id <= 0:
@@ -540,85 +1115,77 @@ def process_excel_data(df: pd.DataFrame, upload_log_id: int, db: Session):
         
         logger.info(f"Iniciando procesamiento de {total} filas para upload_log {upload_log_id}")
         
-        for idx, row in df.iterrows():
-            try:
-                # Validar fila
-                row_dict = row.to_dict()
-                
-                if not row_dict:
-                    logger.warning(f"Fila {idx + 2} vacía, saltando...")
-                    failed += 1
-                    continue
-                
-                try:
-                    validated_row = ExcelProcessor.validate_row(row_dict, idx + 2)
-                except Exception as e:
-                    logger.error(f"Error al validar fila {idx + 2}: {str(e)}")
-                    failed += 1
-                    continue
-                
-                if not validated_row:
-                    logger.warning(f"Fila {idx + 2}: validación retornó None")
-                    failed += 1
-                    continue
-                
-                if not validated_row.is_valid:
-                    logger.warning(f"Fila {idx + 2}: datos inválidos")
-                    failed += 1
-                    continue
+        for block in _iter_ingest_blocks(source):
+            handled = offset
+            if upload_cancel.is_requested(db, upload_log_id):
+                raise upload_cancel.UploadCancelled()
+            # POST /uploads/{id}/profile: el perfil empieza en este bloque
+            profiling.checkpoint()
+            
+            with metrics.phase("validation"):
+                validation = plan.evaluate(block)
+                names = validation.values['name']
+                emails = validation.values['email']
+                candidates = validation.valid & (names != "") & (emails != "")
                 
-                # Validar que tenga los campos necesarios
-                if not hasattr(validated_row, 'email') or not validated_row.email:
-                    logger.warning(f"Fila {idx + 2}: email faltante")
-                    failed += 1
-                    continue
+                # Solo la primera aparición de cada email dentro del bloque
+                repeated = candidates & pd.Series(emails).where(candidates).duplicated(keep='first').to_numpy()
+                candidates &= ~repeated
+            
+            for position in np.flatnonzero(~validation.valid):
+                row_log.warning(
+                    "datos_invalidos", "Fila %d: datos inválidos (%s)",
+                    block.index[position] + 2, ", ".join(validation.codes_for(position))
+                )
+            for position in np.flatnonzero(repeated):
+                row_log.warning("email_duplicado_archivo", "Fila %d: email %s repetido en el archivo", block.index[position] + 2, emails[position])
+            
+            block_positions = np.flatnonzero(candidates)
+            for start in range(0, len(block), INGEST_CHUNK_SIZE):
+                # Un tramo ya confirmado no se deshace; la cancelación se
+                # revisa antes del commit de cada tramo (_insert_chunk)
+                handled = offset + start
                 
-                if not hasattr(validated_row, 'name') or not validated_row.name:
-                    logger.warning(f"Fila {idx + 2}: nombre faltante")
-                    failed += 1
+                lo, hi = np.searchsorted(block_positions, [start, start + INGEST_CHUNK_SIZE])
+                positions = block_positions[lo:hi]
+                if len(positions) == 0:
                     continue
                 
-                # Verificar si el email ya existe
+                # Verificar qué emails del tramo ya existen (una consulta)
+                chunk_emails = emails[positions].tolist()
                 try:
-                    existing_user = db.query(User).filter(
-                        User.email == validated_row.email
-                    ).first()
-                except Exception as e:
-                    logger.error(f"Error al consultar usuario existente: {str(e)}")
-                    failed += 1
-                    continue
-                
-                if existing_user:
-                    logger.warning(f"Fila {idx + 2}: email {validated_row.email} ya existe")
-                    failed += 1
+                    with metrics.phase("dedup"):
+                        existing = {
+                            email.lower()
+                            for email in db.scalars(select(User.email).where(User.email.in_(chunk_emails)))
+                        }
+                except SQLAlchemyError as e:
+                    row_log.error("error_consulta", "Error al consultar usuarios existentes: %s", e)
+                    db.rollback()
                     continue
                 
-                # Crear nuevo usuario
-                try:
-                    new_user = User(
-                        name=validated_row.name,
-                        email=validated_row.email
-                    )
-                    db.add(new_user)
-                    db.commit()
-                    successful += 1
-                    logger.info(f"Fila {idx + 2}: usuario creado exitosamente")
-                
-                except Exception as e:
-                    logger.error(f"Error al crear usuario en fila {idx + 2}: {str(e)}")
-                    failed += 1
-                    try:
-                        db.rollback()
-                    except Exception as rollback_error:
-                        logger.error(f"Error en rollback: {str(rollback_error)}")
+                rows = []
+                for name, email in zip(names[positions].tolist(), chunk_emails):
+                    if email in existing:
+                        row_log.warning("email_duplicado", "Email %s ya existe", email)
+                    else:
+                        rows.append({"name": name, "email": email, "is_active": True})
                 
-            except Exception as row_error:
-                logger.error(f"Error inesperado en fila {idx + 2}: {str(row_error)}")
-                failed += 1
-                try:
-                    db.rollback()
-                except:
-                    pass
+                if rows:
+                    with metrics.phase("insert"):
+                        successful += _insert_chunk(db, rows, row_log, upload_log_id)
+            offset += len(block)
+            metrics.sample_memory()
+        
+        # Cada fila termina insertada o fallida
+        failed = total - successful
+        
+        # Todo ya está confirmado: una cancelación que llega ahora no aplica
+        if upload_cancel.is_requested(db, upload_log_id):
+            logger.info(f"La cancelación de la carga {upload_log_id} llegó después del último tramo: queda completada")
+        
+        row_log.summary(f"Resumen de filas de la carga {upload_log_id}")
+        metrics.sample_memory()
         
         # Actualizar log con resultados
         try:
@@ -627,10 +1194,11 @@ def process_excel_data(df: pd.DataFrame, upload_log_id: int, db: Session):
             ).first()
             
             if upload_log:
-                upload_log.status = UploadStatusEnum.COMPLETED
-                upload_log.successful_rows = successful
-                upload_log.failed_rows = failed
-                db.commit()
+                _finalize_upload_log(
+                    db, upload_log, UploadStatusEnum.COMPLETED,
+                    successful=successful, failed=failed,
+                    metrics=metrics
+                )
                 logger.info(f"Carga completada: {successful} exitosos, {failed} fallidos")
             else:
                 logger.error(f"No se encontró upload_log con ID {upload_log_id} para actualizar")
@@ -642,149 +1210,54 @@ def process_excel_data(df: pd.DataFrame, upload_log_id: int, db: Session):
             except:
                 pass
     
-    except Exception as e:
-        logger.error(f"Error crítico en procesamiento de Excel: {str(e)}", exc_info=True)
+    except upload_cancel.UploadCancelled:
+        # Descarta el INSERT del tramo en curso, que aún no se confirmó;
+        # los tramos anteriores ya están confirmados y se quedan
+        db.rollback()
+        failed = handled - successful
+        row_log.summary(f"Resumen de filas de la carga {upload_log_id}")
+        logger.info(f"Carga {upload_log_id} cancelada tras {handled} de {total} filas")
         
-        # Intentar marcar como fallido
         try:
             upload_log = db.query(ExcelUploadLog).filter(
                 ExcelUploadLog.id == upload_log_id
             ).first()
             
             if upload_log:
-                upload_log.status = UploadStatusEnum.FAILED
-                upload_log.error_message = str(e)[:500]
-                upload_log.successful_rows = successful
-                upload_log.failed_rows = failed
-                db.commit()
+                _finalize_upload_log(
+                    db, upload_log, UploadStatusEnum.CANCELLED,
+                    successful=successful, failed=failed,
+                    error_message=f"Cancelada por el usuario tras procesar {handled} de {total} filas",
+                    metrics=metrics
+                )
         
         except Exception as update_error:
-            logger.error(f"Error al actualizar log de fallo: {str(update_error)}")
+            logger.error(f"Error al actualizar log de cancelación: {str(update_error)}")
             try:
                 db.rollback()
             except:
                 pass
-
-
-async def process_excel_data_with_progress(
-    df: pd.DataFrame, 
-    upload_log_id: int, 
-    db: Session,
-    websocket_manager
-):
-    """
-    Procesa los datos del Excel con WebSocket (versión mejorada)
-    """
-    successful = 0
-    failed = 0
-    total = len(df)
-    
-    try:
-        if df is None or df.empty:
-            raise ValueError("DataFrame vacío")
-        
-        if not websocket_manager:
-            raise ValueError("WebSocket manager no disponible")
-        
-        for idx, row in df.iterrows():
-            try:
-                # Validar fila
-                validated_row = ExcelProcessor.validate_row(row.to_dict(), idx + 2)
-                
-                if not validated_row or not validated_row.is_valid:
-                    failed += 1
-                else:
-                    # Verificar duplicados
-                    existing_user = db.query(User).filter(
-                        User.email == validated_row.email
-                    ).first()
-                    
-                    if existing_user:
-                        failed += 1
-                    else:
-                        # Crear usuario
-                        new_user = User(
-                            name=validated_row.name,
-                            email=validated_row.email
-                        )
-                        db.add(new_user)
-                        db.commit()
-                        successful += 1
-                
-                # Enviar progreso
-                current = idx + 1
-                percentage = (current / total) * 100
-                
-                try:
-                    await websocket_manager.send_progress({
-                        "current": current,
-                        "total": total,
-                        "percentage": round(percentage, 2),
-                        "successful": successful,
-                        "failed": failed,
-                        "status": "processing"
-                    })
-                except Exception as ws_error:
-                    logger.error(f"Error al enviar progreso por WebSocket: {str(ws_error)}")
-                
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Error en fila {idx + 2}: {str(e)}")
-                failed += 1
-                try:
-                    db.rollback()
-                except:
-                    pass
-        
-        # Actualizar log final
-        try:
-            upload_log = db.query(ExcelUploadLog).filter(
-                ExcelUploadLog.id == upload_log_id
-            ).first()
-            
-            if upload_log:
-                upload_log.status = UploadStatusEnum.COMPLETED
-                upload_log.successful_rows = successful
-                upload_log.failed_rows = failed
-                db.commit()
-        except Exception as e:
-            logger.error(f"Error al actualizar log: {str(e)}")
-        
-        # Enviar progreso final
-        try:
-            await websocket_manager.send_progress({
-                "current": total,
-                "total": total,
-                "percentage": 100,
-                "successful": successful,
-                "failed": failed,
-                "status": "completed"
-            })
-        except Exception as ws_error:
-            logger.error(f"Error al enviar progreso final: {str(ws_error)}")
-        
-        logger.info(f"Carga completada: {successful} exitosos, {failed} fallidos")
     
     except Exception as e:
-        logger.error(f"Error crítico: {str(e)}", exc_info=True)
+        logger.error(f"Error crítico en procesamiento de Excel: {str(e)}", exc_info=True)
         
+        # Intentar marcar como fallido
         try:
             upload_log = db.query(ExcelUploadLog).filter(
                 ExcelUploadLog.id == upload_log_id
             ).first()
             
             if upload_log:
-                upload_log.status = UploadStatusEnum.FAILED
-                upload_log.error_message = str(e)
-                db.commit()
-        except:
-            pass
+                _finalize_upload_log(
+                    db, upload_log, UploadStatusEnum.FAILED,
+                    successful=successful, failed=failed,
+                    error_message=str(e),
+                    metrics=metrics
+                )
         
-        try:
-            await websocket_manager.send_progress({
-                "status": "failed",
-                "error": str(e)
-            })
-        except:
-            pass
\ No newline at end of file
+        except Exception as update_error:
+            logger.error(f"Error al actualizar log de fallo: {str(update_error)}")
+            try:
+                db.rollback()
+            except:
+                pass
\ No newline at end of file
@@ -1,5 +1,9 @@
 # app/routers/health.py
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.utils.startup import readiness, ping_database
+from app.utils.metrics import upload_active_jobs
 
 router = APIRouter()  # Crea un grupo de rutas
 
@@ -9,3 +13,40 @@ def health_check():
     Endpoint simple para verificar el estado del servidor.
     """
     return {"status": "ok"}
+
+
+@router.get("/health/live", tags=["Health"])
+async def liveness():
+    """
+    Liveness: el proceso responde y el event loop no está bloqueado.
+    No toca la base de datos para que una caída de MySQL no reinicie la app.
+    """
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness: arranque terminado (conexión, esquema y pool) y la base
+    responde ahora mismo. 503 mientras no se pueda recibir tráfico.
+    """
+    checks = readiness.snapshot()
+
+    if readiness.ready:
+        try:
+            await run_in_threadpool(ping_database)
+        except Exception as e:
+            checks["database"] = {"ok": False, "detail": f"sin conexión: {e}"}
+
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "worker": {
+                "ready_after_seconds": readiness.ready_after,
+                "active_upload_jobs": int(upload_active_jobs.value()),
+            },
+        }
+    )
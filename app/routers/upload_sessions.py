@@ -0,0 +1,192 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+import time
+
+from app.database import get_write_db
+from app.schemas import UploadSessionCreate, UploadSessionResponse, UploadChunkResponse, ExcelPreviewResponse
+from app.utils import chunked_upload
+from app.utils.chunked_upload import UploadSessionError
+from app.utils.excel_processor import ExcelProcessor
+from app.utils.decompression import DecompressionBudgetError
+from app.utils.logger_config import logger
+from app.utils.parse_cache import ParsedFile, parse_cache, session_key
+from app.routers.excel_upload import (
+    _check_parsed_dataframe, _start_ingest, _preview_response,
+    PREVIEW_DEFAULT_LIMIT, PREVIEW_MAX_LIMIT
+)
+
+#---------------------------------------------------------------------
+# Carga por partes: crear sesión, PUT de cada parte (reintentable) y
+# finalizar. El archivo nunca pasa completo por memoria.
+#---------------------------------------------------------------------
+router = APIRouter(prefix="/api/excel/upload-sessions", tags=["Excel Upload"])
+
+
+def _http_error(error: UploadSessionError) -> HTTPException:
+    return HTTPException(status_code=error.status_code, detail=error.detail)
+
+
+@router.post("", response_model=UploadSessionResponse, status_code=201)
+def create_upload_session(payload: UploadSessionCreate):
+    """
+    Crea una sesión de carga por partes
+    """
+    try:
+        meta = chunked_upload.create_session(payload.filename, payload.total_size, payload.total_chunks)
+    except UploadSessionError as e:
+        raise _http_error(e)
+    logger.info(f"Sesión de carga creada: {meta['session_id']} ({meta['filename']})")
+    return chunked_upload.get_status(meta["session_id"])
+
+
+@router.get("/{session_id}", response_model=UploadSessionResponse)
+def get_upload_session(session_id: str):
+    """
+    Estado de la sesión: partes recibidas, para reanudar una carga cortada
+    """
+    try:
+        return chunked_upload.get_status(session_id)
+    except UploadSessionError as e:
+        raise _http_error(e)
+
+
+@router.put("/{session_id}/chunks/{index}", response_model=UploadChunkResponse)
+async def put_upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    chunk_sha256: Optional[str] = Header(default=None, alias="X-Chunk-SHA256")
+):
+    """
+    Recibe una parte como cuerpo binario y la escribe directo a disco.
+    Repetir el PUT del mismo índice reemplaza la parte (idempotente).
+    """
+    # Rechazo temprano si el cliente declara un tamaño mayor al permitido
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > chunked_upload.UPLOAD_CHUNK_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"La parte excede {chunked_upload.UPLOAD_CHUNK_MAX_BYTES} bytes"
+        )
+    
+    try:
+        return await chunked_upload.write_chunk(session_id, index, request.stream(), chunk_sha256)
+    except UploadSessionError as e:
+        raise _http_error(e)
+
+
+async def _parse_session(session_id: str, require_declared: bool = False) -> ParsedFile:
+    """
+    Ensambla y parsea el archivo de la sesión, o lo toma de la caché.
+    Se llama con la sesión reservada (claim_finalize).
+    """
+    key = session_key(session_id)
+    entry = parse_cache.get(key)
+    if entry is not None:
+        return entry
+    
+    path = await run_in_threadpool(chunked_upload.assemble, session_id, require_declared)
+    filename = chunked_upload.filename_of(session_id)
+    parse_started = time.perf_counter()
+    try:
+        try:
+            df = await run_in_threadpool(ExcelProcessor.read_upload, path, filename)
+        except DecompressionBudgetError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error al leer Excel de la sesión {session_id}: {str(e)}")
+            raise HTTPException(
+                status_code=400,
+                detail="No se puede leer el archivo Excel"
+            )
+        _check_parsed_dataframe(df)
+    except HTTPException:
+        # El archivo no sirve: la sesión vuelve a aceptar partes para corregirlo
+        await run_in_threadpool(chunked_upload.discard_assembled, session_id)
+        raise
+    
+    return parse_cache.put(key, filename, df, time.perf_counter() - parse_started)
+
+
+@router.get("/{session_id}/preview", response_model=ExcelPreviewResponse)
+async def preview_upload_session(
+    session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_DEFAULT_LIMIT, ge=1, le=PREVIEW_MAX_LIMIT),
+    errors_only: bool = Query(False, description="Solo filas con errores")
+):
+    """
+    Preview paginado del archivo de la sesión antes de finalizarla. Exige
+    total_chunks declarado y todas las partes; desde el primer preview la
+    sesión no acepta más partes. El parseo queda en caché para las
+    siguientes páginas y para finalizar.
+    """
+    try:
+        if chunked_upload.finalized_upload_id(session_id) is not None:
+            raise HTTPException(status_code=409, detail="La sesión ya fue finalizada")
+        entry = parse_cache.get(session_key(session_id))
+        if entry is None:
+            if not chunked_upload.claim_finalize(session_id):
+                raise HTTPException(status_code=409, detail="La sesión se está ensamblando o finalizando")
+            try:
+                entry = await _parse_session(session_id, require_declared=True)
+            finally:
+                chunked_upload.release_finalize(session_id)
+    except UploadSessionError as e:
+        raise _http_error(e)
+    return await run_in_threadpool(_preview_response, entry, offset, limit, errors_only)
+
+
+@router.post("/{session_id}/finalize")
+async def finalize_upload_session(
+    session_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_write_db)
+):
+    """
+    Ensambla las partes en disco, valida el Excel e inicia la ingesta.
+    Finalizar otra vez una sesión ya finalizada devuelve el mismo upload_id.
+    """
+    try:
+        upload_id = chunked_upload.finalized_upload_id(session_id)
+        if upload_id is not None:
+            return {"message": "La sesión ya fue finalizada", "upload_id": upload_id}
+        
+        if not chunked_upload.claim_finalize(session_id):
+            raise HTTPException(status_code=409, detail="La sesión se está finalizando")
+        
+        try:
+            # Si ya se pidió el preview de la sesión, el archivo está parseado
+            entry = await _parse_session(session_id)
+            df = entry.df
+            
+            upload_log = await _start_ingest(db, background_tasks, request, df, entry.filename, entry.parse_seconds)
+            chunked_upload.mark_finalized(session_id, upload_log.id)
+            parse_cache.discard(entry.key)
+        finally:
+            chunked_upload.release_finalize(session_id)
+        
+        return {
+            "message": "Cerga iniciada existosamente",
+            "upload_id": upload_log.id,
+            "total_rows": len(df)
+        }
+    
+    except UploadSessionError as e:
+        raise _http_error(e)
+
+
+@router.delete("/{session_id}")
+def delete_upload_session(session_id: str):
+    """
+    Cancela la sesión y borra las partes recibidas
+    """
+    try:
+        chunked_upload.delete_session(session_id)
+    except UploadSessionError as e:
+        raise _http_error(e)
+    parse_cache.discard(session_key(session_id))
+    return {"message": "Sesión eliminada", "session_id": session_id}
@@ -1,10 +1,14 @@
 from sqlalchemy.exc import SQLAlchemyError
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Tuple
+from datetime import datetime
 from app import crud, schemas
-from app.database import get_db
+from app.database import get_read_db, get_write_db, read_sessionmaker_for
 from app.utils.logger_config import logger
+from app.utils import etag, user_export
+from app.utils.fast_json import FastJSONResponse
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -13,11 +17,26 @@ router = APIRouter(prefix="/users", tags=["Users"])
 # GET - Obtener todos los usuarios
 # ---------------------------
 @router.get("/", response_model=List[schemas.UserResponse])
-def get_users(db: Session = Depends(get_db)):
+def get_users(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    read: Tuple[int, Session] = Depends(etag.versioned_read_db(etag.USERS))
+):
+    version, db = read
     try:
-        users = crud.get_users(db)
+        users_etag = etag.build_etag(etag.USERS, version, skip, limit)
+        if etag.is_not_modified(request, users_etag):
+            return etag.not_modified_response(users_etag)
+        
+        users = crud.get_user_rows(db, skip=skip, limit=limit)
         logger.info(f"Se obtuvieron {len(users)} usuarios")
-        return users
+        
+        response = FastJSONResponse(users)
+        etag.set_etag_headers(response, users_etag)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except SQLAlchemyError as e:
         logger.error(f"Error de base de datos al obtener usuarios: {e}")
         raise HTTPException(status_code=500, detail="Error al obtener usuarios")
@@ -30,7 +49,7 @@ def get_users(db: Session = Depends(get_db)):
 # POST - Crear usuario
 # ---------------------------
 @router.post("/", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+def create_user(user: schemas.UserCreate, db: Session = Depends(get_write_db)):
     try:
         # Validar si ya existe el correo
         existing_user = crud.get_user_by_email(db, user.email)
@@ -51,11 +70,83 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Error al crear usuario")
 
 
+# ---------------------------
+# GET - Exportar todos los usuarios (CSV o XLSX)
+# ---------------------------
+EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv; charset=utf-8", user_export.iter_users_csv),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        user_export.iter_users_xlsx
+    ),
+}
+
+
+@router.get("/export")
+def export_users(request: Request, export_format: str = Query("csv", alias="format")):
+    export_format = export_format.lower()
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format debe ser 'csv' o 'xlsx'")
+
+    media_type, generator = EXPORT_MEDIA_TYPES[export_format]
+    filename = f"usuarios_sena_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    logger.info(f"Exportando usuarios en formato {export_format}")
+
+    return StreamingResponse(
+        generator(read_sessionmaker_for(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ---------------------------
+# Operaciones masivas (antes de las rutas con {user_id})
+# ---------------------------
+def _check_bulk_size(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="La lista de ítems está vacía")
+    if count > crud.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {crud.BULK_MAX_ITEMS} ítems por petición"
+        )
+
+
+@router.post("/bulk", response_model=schemas.BulkOperationResponse)
+def bulk_create_users(payload: schemas.UserBulkCreateRequest, db: Session = Depends(get_write_db)):
+    _check_bulk_size(len(payload.items))
+    try:
+        return crud.bulk_create_users(db, payload.items)
+    except Exception as e:
+        logger.error(f"Error inesperado en creación masiva: {e}")
+        raise HTTPException(status_code=500, detail="Error en la creación masiva de usuarios")
+
+
+@router.patch("/bulk", response_model=schemas.BulkOperationResponse)
+def bulk_update_users(payload: schemas.UserBulkUpdateRequest, db: Session = Depends(get_write_db)):
+    _check_bulk_size(len(payload.items))
+    try:
+        return crud.bulk_update_users(db, payload.items)
+    except Exception as e:
+        logger.error(f"Error inesperado en actualización masiva: {e}")
+        raise HTTPException(status_code=500, detail="Error en la actualización masiva de usuarios")
+
+
+@router.delete("/bulk", response_model=schemas.BulkOperationResponse)
+def bulk_delete_users(payload: schemas.UserBulkDeleteRequest, db: Session = Depends(get_write_db)):
+    _check_bulk_size(len(payload.ids))
+    try:
+        return crud.bulk_delete_users(db, payload.ids)
+    except Exception as e:
+        logger.error(f"Error inesperado en eliminación masiva: {e}")
+        raise HTTPException(status_code=500, detail="Error en la eliminación masiva de usuarios")
+
+
 # ---------------------------
 # PUT - Actualizar usuario por ID
 # ---------------------------
 @router.put("/{user_id}", response_model=schemas.UserResponse)
-def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_db)):
+def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(get_write_db)):
     try:
         db_user = crud.get_user_by_id(db, user_id)
         if not db_user:
@@ -84,7 +175,7 @@ def update_user(user_id: int, user: schemas.UserCreate, db: Session = Depends(ge
 # DELETE - Eliminar usuario por ID
 # ---------------------------
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, db: Session = Depends(get_write_db)):
     try:
         db_user = crud.get_user_by_id(db, user_id)
         if not db_user:
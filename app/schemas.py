@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Tuple, Union, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,40 @@ class UserResponse(UserBase):
 
     class Config:
         from_attributes = True
+
+
+#------------------------
+#     USERS (MASIVO)
+#------------------------
+class UserBulkCreateRequest(BaseModel):
+    items: List[UserCreate]
+
+
+class UserBulkUpdateItem(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+
+
+class UserBulkUpdateRequest(BaseModel):
+    items: List[UserBulkUpdateItem]
+
+
+class UserBulkDeleteRequest(BaseModel):
+    ids: List[int]
+
+
+class BulkOperationResponse(BaseModel):
+    """
+    Resultado compacto de una operación masiva.
+    ids va alineado con la entrada (None si el ítem falló) y
+    errors contiene pares [índice, código] solo para los fallidos.
+    """
+    total: int
+    succeeded: int
+    failed: int
+    ids: List[Optional[int]]
+    errors: List[Tuple[int, str]]
         
 #-----------------------------
 #         ENUMS
@@ -29,6 +63,7 @@ class UploadStatusEnum(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
     
 #-----------------------------
 #       EXCEL PREVIEW
@@ -58,6 +93,13 @@ class ExcelPreviewResponse(BaseModel):
     columns: List[str]
     has_errors: bool
     sheet_name: Optional[str] = None
+    # Paginación sobre el archivo completo (GET /preview/{preview_id})
+    preview_id: Optional[str] = None
+    offset: int = 0
+    limit: Optional[int] = None
+    errors_only: bool = False
+    matching_rows: Optional[int] = None
+    invalid_rows: Optional[int] = None
     
 class Config:
     from_attributes = True
@@ -124,6 +166,31 @@ class UploadLogResponse(BaseModel):
         from_attributes = True
 
 
+class UploadMetricsResponse(BaseModel):
+    """
+    Tiempos por fase y throughput de una carga
+    """
+    parse_seconds: float
+    validation_seconds: float
+    dedup_seconds: float
+    insert_seconds: float
+    total_seconds: float
+    rows_per_second: float
+    max_process_rss_bytes: Optional[int] = None
+    db_statements: int
+
+    class Config:
+        from_attributes = True
+
+
+class UploadLogDetailResponse(UploadLogResponse):
+    """
+    Detalle de una carga, con sus métricas si ya terminó
+    """
+    cancel_requested_at: Optional[datetime] = None
+    metrics: Optional[UploadMetricsResponse] = None
+
+
 # ---------------------
 #          STATS
 # ---------------------
@@ -145,4 +212,100 @@ class UploadStatsResponse(BaseModel):
     total_uploads: int
     total_successful: int
     total_failed: int
-    chart_data: ChartData
\ No newline at end of file
+    chart_data: ChartData
+
+class UploadHistoryResponse(BaseModel):
+    """
+    Historial de cargas agrupado por hora o día (desde los rollups)
+    """
+    granularity: str
+    labels: List[str]
+    uploads: List[int]
+    total_rows: List[int]
+    successful: List[int]
+    failed: List[int]
+
+
+# ---------------------
+#   CARGA POR PARTES
+# ---------------------
+class UploadSessionCreate(BaseModel):
+    """
+    Inicio de una carga por partes. total_size y total_chunks son
+    opcionales; si se envían, se verifican al finalizar.
+    """
+    filename: str
+    total_size: Optional[int] = Field(default=None, ge=1)
+    total_chunks: Optional[int] = Field(default=None, ge=1)
+
+
+class UploadSessionResponse(BaseModel):
+    """
+    Estado de una sesión de carga por partes (para reanudar)
+    """
+    session_id: str
+    filename: str
+    total_size: Optional[int] = None
+    total_chunks: Optional[int] = None
+    max_bytes: int
+    chunk_max_bytes: int
+    received_chunks: List[int] = []
+    received_bytes: int = 0
+    finalized: bool = False
+    upload_id: Optional[int] = None
+
+
+class UploadChunkResponse(BaseModel):
+    index: int
+    size: int
+    sha256: str
+
+
+# ---------------------------
+#   REGLAS DE VALIDACIÓN
+# ---------------------------
+class ValidationRule(BaseModel):
+    """
+    Regla declarativa sobre una columna. check: required, min_length,
+    max_length, pattern, not_numeric, allowed_domains, blocked_domains
+    o one_of; value según el chequeo (entero, regex o lista).
+    """
+    code: Optional[str] = None
+    column: str
+    check: str
+    value: Optional[Union[int, str, List[str]]] = None
+    message: Optional[str] = None
+
+
+class ValidationRuleSet(BaseModel):
+    lowercase: List[str] = []
+    rules: List[ValidationRule]
+
+
+# ---------------------------
+#   VALIDACIÓN COMPLETA (DRY-RUN)
+# ---------------------------
+class DryRunRowError(BaseModel):
+    row_number: int
+    name: str
+    email: str
+    errors: List[str]
+
+
+class DryRunResponse(BaseModel):
+    """
+    Resultado de validar el archivo completo sin escribir nada.
+    would_insert es lo que insertaría /upload con la BD en su estado actual.
+    """
+    filename: str
+    total_rows: int
+    valid_rows: int
+    invalid_rows: int
+    duplicates_in_file: int
+    existing_in_db: int
+    would_insert: int
+    violations: Dict[str, int]
+    errors: List[DryRunRowError]
+    errors_truncated: bool
+    parse_seconds: float
+    check_seconds: float
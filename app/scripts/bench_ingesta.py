@@ -0,0 +1,299 @@
+"""
+Benchmark de la ingesta de archivos grandes: ExcelProcessor + process_excel_data
+sobre SQLite temporal, con archivos generados por generar_datos_prueba.
+
+Cada tamaño corre en un subproceso aparte para que la memoria pico (RSS)
+sea la de ese caso y no la acumulada. Compara contra los baselines
+guardados y termina con código 1 si hay regresión.
+
+Uso:
+    python -m app.scripts.bench_ingesta                       # 1k y 10k, xlsx
+    python -m app.scripts.bench_ingesta --sizes 1000,10000,100000,1000000
+    python -m app.scripts.bench_ingesta --format csv --save-baselines
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "bench_ingesta_baselines.json")
+
+DEFAULT_SIZES = "1000,10000"
+
+# Regresión: menos filas/s o más memoria que el baseline más esta tolerancia
+DEFAULT_TOLERANCE = 0.25
+
+
+def peak_rss_bytes() -> int:
+    import resource
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(
+    rows: int,
+    file_format: str,
+    duplicates: float,
+    invalid: float,
+    extra_columns: int,
+    seed: int,
+    trace_memory: bool = False
+) -> dict:
+
+    """Ejecuta un caso en este proceso y retorna los tiempos por etapa"""
+
+    work_dir = tempfile.mkdtemp(prefix="bench_ingesta_")
+    # Antes de importar app: nunca tocar la base configurada
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["SPILL_DIR"] = os.path.join(work_dir, "spill")
+
+    import gc
+    import logging
+    import tracemalloc
+    from app.database import Base, engine, SessionLocal
+    from app.models import ExcelUploadLog, UploadStatusEnum
+    from app.routers.excel_upload import process_excel_data, _ingest_columns
+    from app.utils.columnar_spill import SpilledUpload, spill_dataframe
+    from app.utils.excel_processor import ExcelProcessor
+    from app.utils.ingest_metrics import IngestMetrics
+    from app.scripts.generar_datos_prueba import write_file
+    from app.utils.lazy_imports import warm_up
+
+    logging.getLogger("sqlalchemy.engine.Engine").disabled = True
+    logging.getLogger("mi_proyecto_logger").setLevel(logging.WARNING)
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        stages = {}
+
+        path = os.path.join(work_dir, f"usuarios.{file_format}")
+        start = time.perf_counter()
+        write_file(
+            path, rows,
+            duplicate_ratio=duplicates, invalid_ratio=invalid,
+            extra_columns=extra_columns, seed=seed
+        )
+        generate_seconds = time.perf_counter() - start
+
+        file_bytes = os.path.getsize(path)
+        # pandas se importa en el primer uso: que no cuente como parseo
+        warm_up()
+
+        start = time.perf_counter()
+        df = ExcelProcessor.read_upload(path, os.path.basename(path))
+        stages["parse"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        is_valid, errors = ExcelProcessor.validate_structure(df)
+        stages["structure"] = time.perf_counter() - start
+        if not is_valid:
+            raise RuntimeError(f"Estructura inválida: {errors}")
+
+        # Memoria asignada desde aquí hasta el final de la ingesta (sin el parseo).
+        # Las colecciones de generación 0 del GC sirven de proxy de objetos
+        # contenedores creados (una cada ~700 asignaciones netas)
+        if trace_memory:
+            tracemalloc.start()
+        gc_collections = gc.get_stats()[0]["collections"]
+
+        db = SessionLocal()
+        try:
+            upload_log = ExcelUploadLog(
+                filename=os.path.basename(path),
+                status=UploadStatusEnum.PROCESSING,
+                total_rows=len(df)
+            )
+            db.add(upload_log)
+            db.commit()
+
+            # Misma entrega que hace /upload al background task: volcado a
+            # disco y lectura por bloques; el DataFrame ya no se retiene
+            start = time.perf_counter()
+            spilled = SpilledUpload(spill_dataframe(_ingest_columns(df), upload_log.id))
+            df = None
+            stages["handoff"] = time.perf_counter() - start
+
+            metrics = IngestMetrics(parse_seconds=stages["parse"])
+            start = time.perf_counter()
+            with metrics.track_statements():
+                process_excel_data(spilled, upload_log.id, db, metrics=metrics)
+            stages["ingest"] = time.perf_counter() - start
+            gc_collections = gc.get_stats()[0]["collections"] - gc_collections
+            traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+
+            db.refresh(upload_log)
+            successful, failed = upload_log.successful_rows, upload_log.failed_rows
+        finally:
+            db.close()
+
+        stages["validation"] = metrics.seconds["validation"]
+        stages["dedup"] = metrics.seconds["dedup"]
+        stages["insert"] = metrics.seconds["insert"]
+
+        pipeline_seconds = stages["parse"] + stages["structure"] + stages["handoff"] + stages["ingest"]
+        return {
+            "rows": rows,
+            "format": file_format,
+            "file_bytes": file_bytes,
+            "generate_seconds": round(generate_seconds, 3),
+            "stages": {name: round(value, 3) for name, value in stages.items()},
+            "pipeline_seconds": round(pipeline_seconds, 3),
+            "rows_per_second": round(rows / pipeline_seconds, 1) if pipeline_seconds else 0.0,
+            "successful_rows": successful,
+            "failed_rows": failed,
+            "db_statements": metrics.db_statements,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "traced_peak_bytes": traced_peak,
+            "gc_gen0_collections": gc_collections,
+        }
+    finally:
+        engine.dispose()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_in_subprocess(rows: int, args) -> dict:
+    command = [
+        sys.executable, "-m", "app.scripts.bench_ingesta",
+        "--case", str(rows),
+        "--format", args.format,
+        "--duplicates", str(args.duplicates),
+        "--invalid", str(args.invalid),
+        "--extra-columns", str(args.extra_columns),
+        "--seed", str(args.seed),
+    ] + (["--trace-memory"] if args.trace_memory else [])
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falló el caso de {rows} filas:\n{completed.stderr[-2000:]}")
+    # El resultado es la última línea de la salida estándar
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def baseline_key(result: dict) -> str:
+    return f"{result['format']}:{result['rows']}"
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES_FILE):
+        return {}
+    with open(BASELINES_FILE, encoding="utf-8") as f:
+        return json.load(f).get("cases", {})
+
+
+def save_baselines(results: list):
+    cases = load_baselines()
+    for result in results:
+        cases[baseline_key(result)] = {
+            "rows_per_second": result["rows_per_second"],
+            "peak_rss_bytes": result["peak_rss_bytes"],
+        }
+    with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "machine": f"{platform.machine()} / {platform.python_version()} / {os.cpu_count()} CPU",
+            "cases": dict(sorted(cases.items())),
+        }, f, indent=2)
+        f.write("\n")
+
+
+def check_regressions(results: list, tolerance: float) -> list:
+
+    """Mensajes de regresión (lista vacía si todo está dentro de la tolerancia)"""
+
+    baselines = load_baselines()
+    regressions = []
+    for result in results:
+        baseline = baselines.get(baseline_key(result))
+        if not baseline:
+            continue
+        min_speed = baseline["rows_per_second"] * (1 - tolerance)
+        max_rss = baseline["peak_rss_bytes"] * (1 + tolerance)
+        if result["rows_per_second"] < min_speed:
+            regressions.append(
+                f"{baseline_key(result)}: {result['rows_per_second']} filas/s "
+                f"(baseline {baseline['rows_per_second']})"
+            )
+        if result["peak_rss_bytes"] > max_rss:
+            regressions.append(
+                f"{baseline_key(result)}: RSS pico {result['peak_rss_bytes'] / 2**20:.0f} MB "
+                f"(baseline {baseline['peak_rss_bytes'] / 2**20:.0f} MB)"
+            )
+    return regressions
+
+
+def print_table(results: list):
+    stage_names = ["parse", "structure", "handoff", "validation", "dedup", "insert", "ingest"]
+    traced = any(result.get("traced_peak_bytes") is not None for result in results)
+    print(
+        f"{'caso':<14}" + "".join(f"{name:>11}" for name in stage_names)
+        + f"{'filas/s':>11}{'RSS MB':>9}{'GC gen0':>9}"
+        + (f"{'traza MB':>10}{'B/fila':>9}" if traced else "")
+    )
+    for result in results:
+        line = (
+            f"{baseline_key(result):<14}"
+            + "".join(f"{result['stages'][name]:>11.3f}" for name in stage_names)
+            + f"{result['rows_per_second']:>11.1f}{result['peak_rss_bytes'] / 2**20:>9.0f}"
+            + f"{result.get('gc_gen0_collections', 0):>9}"
+        )
+        if traced:
+            line += f"{result['traced_peak_bytes'] / 2**20:>10.1f}{result['traced_peak_bytes'] / result['rows']:>9.0f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta de archivos grandes")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamaños separados por coma")
+    parser.add_argument("--format", choices=("xlsx", "csv"), default="xlsx")
+    parser.add_argument("--duplicates", type=float, default=0.05)
+    parser.add_argument("--invalid", type=float, default=0.05)
+    parser.add_argument("--extra-columns", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baselines", action="store_true", help="Guarda los resultados como baseline")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    parser.add_argument(
+        "--trace-memory", action="store_true",
+        help="Mide con tracemalloc la memoria pico de entrega + ingesta (más lento)"
+    )
+    parser.add_argument("--case", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(
+            args.case, args.format, args.duplicates, args.invalid, args.extra_columns, args.seed,
+            trace_memory=args.trace_memory
+        )))
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = [run_in_subprocess(rows, args) for rows in sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    if args.save_baselines:
+        save_baselines(results)
+        print(f"Baselines guardados en {BASELINES_FILE}")
+        return
+
+    regressions = check_regressions(results, args.tolerance)
+    if regressions:
+        print("Regresiones:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print("Sin regresiones respecto a los baselines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark de los endpoints de listado: ruta ORM + pydantic (anterior)
+contra select() de Core + orjson (actual), con páginas de 10k filas.
+
+Usa una base SQLite temporal, nunca la configurada en DATABASE_URL.
+Uso: python -m app.scripts.bench_listados [filas] [repeticiones]
+"""
+
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench_listados_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+from app.database import Base, engine, SessionLocal
+from app.models import User, ExcelUploadLog, UploadStatusEnum
+from app.schemas import UserResponse, UploadLogResponse
+from app import crud
+from app.utils.fast_json import FastJSONResponse, rows_as_dicts
+
+logging.getLogger("sqlalchemy.engine.Engine").disabled = True
+
+
+def seed(rows: int):
+
+    """Crea rows usuarios y rows logs de carga"""
+
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"Usuario {i}", "email": f"usuario{i}@sena.edu.co", "is_active": True}
+            for i in range(rows)
+        ])
+        conn.execute(insert(ExcelUploadLog), [
+            {
+                "filename": f"carga_{i}.xlsx",
+                "uploaded_at": now - timedelta(minutes=i),
+                "status": UploadStatusEnum.COMPLETED,
+                "total_rows": 100,
+                "successful_rows": 90,
+                "failed_rows": 10,
+            }
+            for i in range(rows)
+        ])
+
+
+def time_it(fn, repeats: int) -> float:
+
+    """Mediana en milisegundos"""
+
+    samples = []
+    for _ in range(repeats):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return statistics.median(samples)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    seed(rows)
+
+    users_adapter = TypeAdapter(List[UserResponse])
+    logs_adapter = TypeAdapter(List[UploadLogResponse])
+
+    def users_orm(db):
+        users = db.query(User).order_by(User.id).limit(rows).all()
+        payload = users_adapter.dump_python(users_adapter.validate_python(users), mode="json")
+        return json.dumps(payload).encode("utf-8")
+
+    def users_lean(db):
+        return FastJSONResponse(crud.get_user_rows(db, skip=0, limit=rows)).body
+
+    def logs_orm(db):
+        logs = db.query(ExcelUploadLog).order_by(ExcelUploadLog.uploaded_at.desc()).limit(rows).all()
+        payload = logs_adapter.dump_python(logs_adapter.validate_python(logs), mode="json")
+        return json.dumps(payload).encode("utf-8")
+
+    def logs_lean(db):
+        result = db.execute(
+            select(
+                ExcelUploadLog.id, ExcelUploadLog.filename, ExcelUploadLog.uploaded_at,
+                ExcelUploadLog.status, ExcelUploadLog.total_rows, ExcelUploadLog.successful_rows,
+                ExcelUploadLog.failed_rows, ExcelUploadLog.error_message
+            ).order_by(ExcelUploadLog.uploaded_at.desc()).limit(rows)
+        )
+        return FastJSONResponse(rows_as_dicts(result)).body
+
+    print(f"Filas por página: {rows} | repeticiones: {repeats}")
+    print(f"{'endpoint':<20}{'ORM+pydantic (ms)':>20}{'Core+orjson (ms)':>20}{'mejora':>10}")
+    for name, old, new in (("GET /users/", users_orm, users_lean), ("GET /api/excel/logs", logs_orm, logs_lean)):
+        old_ms = time_it(old, repeats)
+        new_ms = time_it(new, repeats)
+        print(f"{name:<20}{old_ms:>20.1f}{new_ms:>20.1f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        engine.dispose()
+        shutil.rmtree(_tmp_dir, ignore_errors=True)
@@ -0,0 +1,116 @@
+"""
+Generador determinista de archivos de usuarios para pruebas de carga.
+La misma semilla produce siempre el mismo archivo.
+
+Uso:
+    python -m app.scripts.generar_datos_prueba salida.xlsx --rows 10000 \
+        --duplicates 0.05 --invalid 0.05 --extra-columns 3 --seed 42
+"""
+
+import argparse
+import csv
+import os
+import random
+from typing import Iterator, List
+
+FIRST_NAMES = [
+    "Ana", "Carlos", "María", "Juan", "Laura", "Andrés", "Sofía", "Diego",
+    "Valentina", "Santiago", "Camila", "Felipe", "Daniela", "Julián", "Paula",
+]
+LAST_NAMES = [
+    "Gómez", "Rodríguez", "Martínez", "López", "García", "Pérez", "Sánchez",
+    "Ramírez", "Torres", "Díaz", "Vargas", "Rojas", "Moreno", "Castro",
+]
+
+# Formas de invalidar una fila con las reglas actuales de ExcelProcessor
+INVALID_NAMES = ["", "A", "12345", None]
+
+
+def generate_rows(
+    rows: int,
+    duplicate_ratio: float = 0.0,
+    invalid_ratio: float = 0.0,
+    extra_columns: int = 0,
+    seed: int = 42
+) -> Iterator[List]:
+    """
+    Genera filas [name, email, extra_1, ...] sin encabezado.
+    Las duplicadas repiten el email de una fila válida anterior.
+    """
+    rng = random.Random(seed)
+    emails: List[str] = []
+
+    for index in range(rows):
+        roll = rng.random()
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        email = f"usuario{index}@sena.edu.co"
+
+        if roll < invalid_ratio:
+            name = rng.choice(INVALID_NAMES)
+        elif roll < invalid_ratio + duplicate_ratio and emails:
+            email = emails[rng.randrange(len(emails))]
+        else:
+            emails.append(email)
+
+        extras = [f"dato_{index}_{column}" for column in range(extra_columns)]
+        yield [name, email] + extras
+
+
+def header(extra_columns: int) -> List[str]:
+    return ["name", "email"] + [f"extra_{column + 1}" for column in range(extra_columns)]
+
+
+def write_file(path: str, rows: int, **options) -> str:
+
+    """Escribe el archivo (.xlsx o .csv según la extensión) y retorna la ruta"""
+
+    extra_columns = options.get("extra_columns", 0)
+    generated = generate_rows(rows, **options)
+
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header(extra_columns))
+            writer.writerows(generated)
+        return path
+
+    if not path.endswith(".xlsx"):
+        raise ValueError("La salida debe ser .xlsx o .csv")
+
+    # write_only mantiene la memoria constante incluso con 1M de filas
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("usuarios")
+    sheet.append(header(extra_columns))
+    for row in generated:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera archivos de usuarios sintéticos")
+    parser.add_argument("output", help="Ruta de salida (.xlsx o .csv)")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Proporción de emails repetidos")
+    parser.add_argument("--invalid", type=float, default=0.0, help="Proporción de filas inválidas")
+    parser.add_argument("--extra-columns", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.duplicates + args.invalid > 1:
+        parser.error("--duplicates + --invalid no puede superar 1")
+
+    write_file(
+        args.output,
+        args.rows,
+        duplicate_ratio=args.duplicates,
+        invalid_ratio=args.invalid,
+        extra_columns=args.extra_columns,
+        seed=args.seed
+    )
+    print(f"Generado: {args.output} ({args.rows} filas, {os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Mide el arranque en frío de la app: tiempo de `import app.main` y RSS
+base del proceso, y lo que cuesta después cargar la pila de datos
+(pandas + openpyxl). Cada medición corre en un proceso nuevo.
+
+Compara contra el baseline guardado y termina con código 1 si el
+arranque o la memoria base empeoran más que la tolerancia.
+
+Uso:
+    python -m app.scripts.medir_arranque                 # 5 repeticiones
+    python -m app.scripts.medir_arranque --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "medir_arranque_baseline.json")
+
+DEFAULT_TOLERANCE = 0.25
+
+# Prefijo de la línea de resultado (el logger también escribe en stdout)
+RESULT_PREFIX = "RESULTADO "
+
+# Código que corre en el proceso hijo; imprime una línea JSON
+_PROBE = """
+import json, logging, sys, time
+start = time.perf_counter()
+import app.main
+import_seconds = time.perf_counter() - start
+from app.utils.ingest_metrics import current_memory_bytes
+from app.utils import lazy_imports
+base_rss = current_memory_bytes()
+data_stack_at_import = lazy_imports.data_stack_loaded()
+start = time.perf_counter()
+lazy_imports.warm_up()
+print(RESULT_PREFIX + json.dumps({
+    "import_seconds": import_seconds,
+    "base_rss_bytes": base_rss,
+    "data_stack_at_import": data_stack_at_import,
+    "data_stack_seconds": time.perf_counter() - start,
+    "data_stack_rss_bytes": current_memory_bytes() - base_rss,
+}))
+"""
+
+
+def measure_once() -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'arranque.db')}")
+        completed = subprocess.run(
+            [sys.executable, "-c", f"RESULT_PREFIX = {RESULT_PREFIX!r}\n" + _PROBE],
+            capture_output=True, text=True, env=env
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr[-2000:])
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError("El proceso de medición no devolvió resultado")
+
+
+def measure(repeats: int) -> dict:
+
+    """Mediana de cada valor sobre repeats procesos nuevos"""
+
+    samples = [measure_once() for _ in range(repeats)]
+    return {
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "base_rss_bytes": int(statistics.median(s["base_rss_bytes"] for s in samples)),
+        "data_stack_at_import": any(s["data_stack_at_import"] for s in samples),
+        "data_stack_seconds": round(statistics.median(s["data_stack_seconds"] for s in samples), 3),
+        "data_stack_rss_bytes": int(statistics.median(s["data_stack_rss_bytes"] for s in samples)),
+    }
+
+
+def check_regressions(result: dict, tolerance: float) -> list:
+    if not os.path.exists(BASELINE_FILE):
+        return []
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        baseline = json.load(f)["result"]
+
+    regressions = []
+    if result["data_stack_at_import"]:
+        regressions.append("pandas/openpyxl se importan al cargar app.main")
+    for key in ("import_seconds", "base_rss_bytes"):
+        if result[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {result[key]} (baseline {baseline[key]})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque y RSS base de la app")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    result = measure(args.repeats)
+    print(f"import app.main:        {result['import_seconds']:.3f}s")
+    print(f"RSS base:               {result['base_rss_bytes'] / 2**20:.1f} MB")
+    print(f"pandas al importar:     {'sí' if result['data_stack_at_import'] else 'no'}")
+    print(f"carga pandas+openpyxl:  {result['data_stack_seconds']:.3f}s, "
+          f"+{result['data_stack_rss_bytes'] / 2**20:.1f} MB")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({
+                "machine": f"{platform.machine()} / {platform.python_version()} / {os.cpu_count()} CPU",
+                "result": result,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Baseline guardado en {BASELINE_FILE}")
+        return
+
+    regressions = check_regressions(result, args.tolerance)
+    if regressions:
+        print("Regresiones:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    print("Sin regresiones respecto al baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Aplica las migraciones de Alembic pendientes ("alembic upgrade head"),
+esperando a que la base acepte conexiones. Lo ejecuta docker-entrypoint.sh
+antes de arrancar uvicorn; /health/ready exige la revisión head.
+Con DB_CREATE_ALL activo no hace nada (las tablas las crea la app).
+Uso: python -m app.scripts.migrar
+"""
+
+import sys
+import time
+
+from app.utils import startup
+from app.utils.logger_config import logger
+
+
+def wait_for_database() -> bool:
+    for attempt in range(1, startup.DB_CONNECT_RETRIES + 1):
+        try:
+            startup.ping_database()
+            return True
+        except Exception as e:
+            logger.warning(f"Migraciones: intento {attempt}/{startup.DB_CONNECT_RETRIES} sin conexión: {e}")
+            if attempt < startup.DB_CONNECT_RETRIES:
+                time.sleep(startup.DB_CONNECT_RETRY_DELAY)
+    return False
+
+
+def main() -> int:
+    if startup.DB_CREATE_ALL:
+        print("DB_CREATE_ALL activo: no se aplican migraciones")
+        return 0
+
+    if not wait_for_database():
+        print("No se pudo conectar a la base de datos para migrar", file=sys.stderr)
+        return 1
+
+    from alembic import command
+    from sqlalchemy import inspect
+
+    # Tablas creadas con create_all y sin revisión: upgrade intentaría crearlas
+    # de nuevo. Hay que marcar una vez la revisión que corresponde al esquema
+    if not startup._database_revisions() and inspect(startup.engine).has_table("users"):
+        print(
+            "La base tiene tablas pero no revisión de Alembic (creada con DB_CREATE_ALL). "
+            "Marca la revisión de su esquema con 'alembic stamp <revisión>' y vuelve a migrar",
+            file=sys.stderr
+        )
+        return 1
+
+    command.upgrade(startup.alembic_config(), "head")
+    print(f"Base en la revisión {', '.join(startup._database_revisions())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Generador de carga HTTP + WebSocket con asyncio (httpx y websockets).
+
+Mezcla CRUD de usuarios, listado de /users, sondeo de /api/excel/stats,
+cargas de Excel concurrentes y cientos de suscriptores de /ws/progress.
+Reporta p50/p95/p99, throughput y tasa de errores por operación, y el
+retardo de entrega WebSocket medido como ida y vuelta ping/pong.
+
+Uso:
+    python -m app.scripts.prueba_carga --scenario mixto
+    python -m app.scripts.prueba_carga --scenario mixto --start-server \
+        --output resultados/mixto_abc123.json --compare resultados/mixto_base.json
+
+Los escenarios son JSON en app/scripts/escenarios_carga/ (o una ruta).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+SCENARIOS_DIR = os.path.join(os.path.dirname(__file__), "escenarios_carga")
+
+DEFAULT_SCENARIO = {
+    "base_url": "http://127.0.0.1:8000",
+    "duration_seconds": 30,
+    "workers": {"crud": 4, "list": 8, "stats": 4, "upload": 1},
+    "list_limit": 100,
+    "stats_interval_seconds": 1.0,
+    "upload_rows": 500,
+    "ws_subscribers": 200,
+    "ws_ping_interval_seconds": 2.0,
+}
+
+
+class Recorder:
+
+    """Latencias y errores por operación"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def ok(self, operation: str, seconds: float):
+        self.latencies.setdefault(operation, []).append(seconds)
+
+    def error(self, operation: str):
+        self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    async def timed(self, operation: str, request, expected=(200,)):
+
+        """Ejecuta la petición y registra su latencia o el error"""
+
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.error(operation)
+            return None
+        if response.status_code not in expected:
+            self.error(operation)
+            return response
+        self.ok(operation, time.perf_counter() - start)
+        return response
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    operations = sorted(set(recorder.latencies) | set(recorder.errors))
+    summary = {}
+    for operation in operations:
+        values = recorder.latencies.get(operation, [])
+        errors = recorder.errors.get(operation, 0)
+        total = len(values) + errors
+        summary[operation] = {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        }
+    return summary
+
+
+#---------------------
+# Trabajadores
+#---------------------
+async def crud_worker(client: httpx.AsyncClient, recorder: Recorder, deadline: float):
+    while time.monotonic() < deadline:
+        email = f"carga-{uuid.uuid4().hex[:12]}@sena.edu.co"
+        response = await recorder.timed(
+            "users.create", client.post("/users/", json={"name": "Usuario Carga", "email": email})
+        )
+        if response is None or response.status_code != 200:
+            continue
+        user_id = response.json()["id"]
+        await recorder.timed(
+            "users.update",
+            client.put(f"/users/{user_id}", json={"name": "Usuario Editado", "email": email})
+        )
+        await recorder.timed("users.delete", client.delete(f"/users/{user_id}"))
+
+
+async def list_worker(client: httpx.AsyncClient, recorder: Recorder, deadline: float, limit: int):
+    while time.monotonic() < deadline:
+        await recorder.timed("users.list", client.get("/users/", params={"limit": limit}))
+
+
+async def stats_worker(client: httpx.AsyncClient, recorder: Recorder, deadline: float, interval: float):
+    # Sondeo como el frontend: reutiliza el ETag para recibir 304
+    etag_value: Optional[str] = None
+    while time.monotonic() < deadline:
+        headers = {"If-None-Match": etag_value} if etag_value else {}
+        response = await recorder.timed(
+            "excel.stats", client.get("/api/excel/stats", headers=headers), expected=(200, 304)
+        )
+        if response is not None and response.headers.get("etag"):
+            etag_value = response.headers["etag"]
+        await asyncio.sleep(interval)
+
+
+async def upload_worker(client: httpx.AsyncClient, recorder: Recorder, deadline: float, contents: bytes):
+    while time.monotonic() < deadline:
+        files = {"file": (
+            "carga.xlsx", contents,
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )}
+        await recorder.timed("excel.upload", client.post("/api/excel/upload", files=files))
+
+
+async def ws_subscriber(url: str, recorder: Recorder, deadline: float, interval: float):
+    start = time.perf_counter()
+    connected = False
+    try:
+        async with websockets.connect(url, open_timeout=10) as ws:
+            await ws.recv()  # Mensaje "connected"
+            recorder.ok("ws.connect", time.perf_counter() - start)
+            connected = True
+
+            while time.monotonic() < deadline:
+                sent = time.perf_counter()
+                await ws.send("ping")
+                # Ignorar mensajes de progreso hasta recibir el pong
+                while True:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                    if message.get("type") == "pong":
+                        break
+                recorder.ok("ws.delivery_lag", time.perf_counter() - sent)
+                await asyncio.sleep(interval)
+    except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+        # Un fallo después de conectar cuenta como entrega perdida
+        recorder.error("ws.delivery_lag" if connected else "ws.connect")
+
+
+def build_upload_file(rows: int) -> bytes:
+    from app.scripts.generar_datos_prueba import write_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_file(
+            os.path.join(tmp, "carga.xlsx"), rows,
+            duplicate_ratio=0.05, invalid_ratio=0.05, seed=7
+        )
+        with open(path, "rb") as f:
+            return f.read()
+
+
+async def run_scenario(scenario: dict) -> dict:
+    base_url = scenario["base_url"].rstrip("/")
+    ws_url = base_url.replace("http", "ws", 1) + "/ws/progress"
+    workers = scenario["workers"]
+    recorder = Recorder()
+
+    upload_contents = build_upload_file(scenario["upload_rows"]) if workers.get("upload") else b""
+
+    limits = httpx.Limits(max_connections=sum(workers.values()) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        deadline = time.monotonic() + scenario["duration_seconds"]
+        tasks = []
+        tasks += [crud_worker(client, recorder, deadline) for _ in range(workers.get("crud", 0))]
+        tasks += [
+            list_worker(client, recorder, deadline, scenario["list_limit"])
+            for _ in range(workers.get("list", 0))
+        ]
+        tasks += [
+            stats_worker(client, recorder, deadline, scenario["stats_interval_seconds"])
+            for _ in range(workers.get("stats", 0))
+        ]
+        tasks += [
+            upload_worker(client, recorder, deadline, upload_contents)
+            for _ in range(workers.get("upload", 0))
+        ]
+        tasks += [
+            ws_subscriber(ws_url, recorder, deadline, scenario["ws_ping_interval_seconds"])
+            for _ in range(scenario.get("ws_subscribers", 0))
+        ]
+
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "scenario": scenario,
+        "elapsed_seconds": round(elapsed, 2),
+        "operations": summarize(recorder, elapsed),
+    }
+
+
+#---------------------
+# Escenarios y reporte
+#---------------------
+def load_scenario(name_or_path: str) -> dict:
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(SCENARIOS_DIR, f"{name_or_path}.json")
+    with open(path, encoding="utf-8") as f:
+        loaded = json.load(f)
+
+    scenario = dict(DEFAULT_SCENARIO, **loaded)
+    scenario["workers"] = dict(DEFAULT_SCENARIO["workers"], **loaded.get("workers", {}))
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+def print_report(result: dict):
+    print(f"Escenario: {result['scenario']['name']} | duración: {result['elapsed_seconds']}s")
+    print(f"{'operación':<18}{'req':>8}{'req/s':>9}{'error %':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for operation, values in result["operations"].items():
+        print(
+            f"{operation:<18}{values['requests']:>8}{values['throughput_rps']:>9.1f}"
+            f"{values['error_rate'] * 100:>9.2f}{values['p50_ms']:>10.1f}"
+            f"{values['p95_ms']:>10.1f}{values['p99_ms']:>10.1f}"
+        )
+
+
+def print_comparison(result: dict, previous: dict):
+    print(f"\nComparación contra {previous['scenario'].get('name')} (anterior → actual)")
+    print(f"{'operación':<18}{'p95 ms':>22}{'req/s':>20}{'error %':>18}")
+    for operation, values in result["operations"].items():
+        before = previous["operations"].get(operation)
+        if not before:
+            continue
+        p95_change = (values["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(
+            f"{operation:<18}"
+            f"{before['p95_ms']:>8.1f} → {values['p95_ms']:<7.1f}{p95_change:>+5.0f}%"
+            f"{before['throughput_rps']:>9.1f} → {values['throughput_rps']:<8.1f}"
+            f"{before['error_rate'] * 100:>7.2f} → {values['error_rate'] * 100:<7.2f}"
+        )
+
+
+def start_server(base_url: str) -> subprocess.Popen:
+
+    """Levanta uvicorn con la app local y espera a que responda /health"""
+
+    port = base_url.rsplit(":", 1)[-1].split("/")[0]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", port, "--log-level", "warning"],
+        stdout=subprocess.DEVNULL
+    )
+    for _ in range(120):
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("El servidor terminó al iniciar")
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("El servidor no respondió /health a tiempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP + WebSocket")
+    parser.add_argument("--scenario", default="mixto", help="Nombre en escenarios_carga/ o ruta a un JSON")
+    parser.add_argument("--base-url", help="Sobrescribe base_url del escenario")
+    parser.add_argument("--duration", type=float, help="Sobrescribe duration_seconds")
+    parser.add_argument("--start-server", action="store_true", help="Levanta uvicorn con la app local")
+    parser.add_argument("--output", help="Guarda el resultado en JSON")
+    parser.add_argument("--compare", help="Resultado JSON anterior para comparar")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    if args.base_url:
+        scenario["base_url"] = args.base_url
+    if args.duration:
+        scenario["duration_seconds"] = args.duration
+
+    server = start_server(scenario["base_url"]) if args.start_server else None
+    try:
+        result = asyncio.run(run_scenario(scenario))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_report(result)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nResultado guardado en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Script para reconstruir la tabla de rollups de cargas a partir de
+excel_upload_logs (útil tras desplegar la tabla o corregir datos)
+Uso: python -m app.scripts.reconstruir_rollups
+"""
+
+from app.database import SessionLocal
+from app.utils import upload_rollup
+
+
+def main():
+    db = SessionLocal()
+    try:
+        processed = upload_rollup.backfill(db)
+        print(f"Rollups reconstruidos a partir de {processed} cargas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Script para probar localmente el ruteo lectura/escritura con dos archivos
+SQLite: copia el primario sobre la réplica, simulando la replicación.
+
+Ejemplo:
+    DATABASE_URL=sqlite:///./primario.db
+    DATABASE_REPLICA_URLS=sqlite:///./replica.db
+
+Uso: python -m app.scripts.sincronizar_replica_sqlite primario.db replica.db
+"""
+
+import sqlite3
+import sys
+
+
+def sync_replica(primary_path: str, replica_path: str):
+    """
+    Copia el contenido del primario en la réplica con la API de backup
+    de SQLite (consistente aunque el primario esté en uso)
+    """
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+        print(f"Réplica actualizada: {primary_path} → {replica_path}")
+    finally:
+        target.close()
+        source.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Uso: python -m app.scripts.sincronizar_replica_sqlite <primario.db> <replica.db>")
+        sys.exit(1)
+    sync_replica(sys.argv[1], sys.argv[2])
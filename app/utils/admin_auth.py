@@ -0,0 +1,25 @@
+import hmac
+import os
+from fastapi import HTTPException, Request
+
+
+#-------------------------------------------------------------------------
+# Operaciones de administración (p. ej. cambiar las reglas de validación).
+# Exigen la cabecera X-Admin-Token igual a ADMIN_TOKEN; sin ADMIN_TOKEN
+# configurado quedan deshabilitadas.
+#-------------------------------------------------------------------------
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+TOKEN_HEADER = "X-Admin-Token"
+
+
+def require_admin(request: Request):
+
+    """Dependencia de FastAPI: 403 si el token falta o no coincide"""
+
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Operación de administración deshabilitada (sin ADMIN_TOKEN)")
+
+    token = request.headers.get(TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
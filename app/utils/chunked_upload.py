@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from typing import AsyncIterator, Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from app.utils.logger_config import logger
+from app.utils.parse_cache import parse_cache, session_key
+
+
+#-------------------------------------------------------------------------
+# Sesiones de carga por partes. Cada parte se escribe directo a disco en
+# su propio archivo (chunk_000000.part...), así que reintentar una parte
+# la reemplaza sin tocar las demás y sin estado compartido que bloquear.
+#-------------------------------------------------------------------------
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "uploads/sessions")
+
+# Límites de la carga por partes (bytes)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Bytes que se acumulan antes de cada escritura a disco (en el threadpool)
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+# Sesiones sin finalizar se borran pasadas estas horas
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+
+ALLOWED_EXTENSIONS = (".xlsx", ".xls", ".csv", ".csv.gz", ".zip")
+
+META_FILE = "meta.json"
+FINALIZED_FILE = "finalized.json"
+FINALIZING_FILE = "finalizing.lock"
+ASSEMBLED_PREFIX = "assembled"
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessionError(Exception):
+
+    """Error de la sesión con el código HTTP que debe responder el endpoint"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _session_path(session_id: str) -> str:
+    # El id viene de la URL: validar el formato evita rutas fuera del directorio
+    if not _SESSION_ID.match(session_id or ""):
+        raise UploadSessionError(404, "Sesión de carga no encontrada")
+    path = os.path.join(UPLOAD_SESSION_DIR, session_id)
+    if not os.path.isdir(path):
+        raise UploadSessionError(404, "Sesión de carga no encontrada")
+    return path
+
+
+def _chunk_name(index: int) -> str:
+    return f"chunk_{index:06d}.part"
+
+
+def _assembled_path(path: str, meta: dict) -> str:
+    extension = os.path.splitext(meta["filename"])[1].lower()
+    return os.path.join(path, f"{ASSEMBLED_PREFIX}{extension}")
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def cleanup_expired():
+
+    """Borra sesiones más viejas que UPLOAD_SESSION_TTL_HOURS"""
+
+    if not os.path.isdir(UPLOAD_SESSION_DIR):
+        return
+    limit = time.time() - UPLOAD_SESSION_TTL_HOURS * 3600
+    for name in os.listdir(UPLOAD_SESSION_DIR):
+        path = os.path.join(UPLOAD_SESSION_DIR, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < limit:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"Sesión de carga expirada eliminada: {name}")
+        except OSError:
+            pass
+
+
+def create_session(filename: str, total_size: Optional[int] = None, total_chunks: Optional[int] = None) -> dict:
+
+    """Crea la sesión y retorna su metadata"""
+
+    if not filename or not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise UploadSessionError(400, f"Extensión no permitida. Use: {', '.join(ALLOWED_EXTENSIONS)}")
+    if total_size is not None and total_size > UPLOAD_MAX_BYTES:
+        raise UploadSessionError(413, f"El archivo excede el máximo de {UPLOAD_MAX_BYTES} bytes")
+
+    cleanup_expired()
+
+    session_id = uuid.uuid4().hex
+    path = os.path.join(UPLOAD_SESSION_DIR, session_id)
+    os.makedirs(path)
+
+    meta = {
+        "session_id": session_id,
+        "filename": os.path.basename(filename),
+        "total_size": total_size,
+        "total_chunks": total_chunks,
+        "created_at": time.time(),
+        "max_bytes": UPLOAD_MAX_BYTES,
+        "chunk_max_bytes": UPLOAD_CHUNK_MAX_BYTES,
+    }
+    _write_json(os.path.join(path, META_FILE), meta)
+    return meta
+
+
+def _received_chunks(path: str) -> Dict[int, int]:
+
+    """{índice: tamaño} de las partes ya escritas"""
+
+    chunks = {}
+    for name in os.listdir(path):
+        if name.startswith("chunk_") and name.endswith(".part"):
+            chunks[int(name[6:12])] = os.path.getsize(os.path.join(path, name))
+    return chunks
+
+
+def get_status(session_id: str) -> dict:
+
+    """Estado para reanudar: qué partes hay y cuántos bytes se recibieron"""
+
+    path = _session_path(session_id)
+    meta = _read_json(os.path.join(path, META_FILE))
+    chunks = _received_chunks(path)
+    finalized = _read_json(os.path.join(path, FINALIZED_FILE))
+    return {
+        **meta,
+        "received_chunks": sorted(chunks),
+        "received_bytes": sum(chunks.values()),
+        "finalized": finalized is not None,
+        "upload_id": finalized.get("upload_id") if finalized else None,
+    }
+
+
+def _prepare_chunk(session_id: str, index: int):
+    """
+    Verifica que la sesión acepte la parte y abre su archivo temporal.
+    Retorna (directorio, archivo abierto, ruta temporal, bytes permitidos).
+    """
+    path = _session_path(session_id)
+    if os.path.exists(os.path.join(path, FINALIZED_FILE)):
+        raise UploadSessionError(409, "La sesión ya fue finalizada")
+    if os.path.exists(os.path.join(path, FINALIZING_FILE)):
+        raise UploadSessionError(409, "La sesión se está ensamblando o finalizando")
+
+    meta = _read_json(os.path.join(path, META_FILE))
+    # El archivo ensamblado (y el preview en caché) ya no verían la parte
+    if os.path.exists(_assembled_path(path, meta)):
+        raise UploadSessionError(409, "La sesión ya fue ensamblada")
+    if index < 0 or (meta["total_chunks"] is not None and index >= meta["total_chunks"]):
+        raise UploadSessionError(400, f"Índice de parte inválido: {index}")
+
+    # Lo ya recibido sin contar esta parte (un reintento la reemplaza). Dos
+    # PUT concurrentes pueden pasar este límite juntos: assemble lo revisa
+    others = sum(size for i, size in _received_chunks(path).items() if i != index)
+    allowed = min(UPLOAD_CHUNK_MAX_BYTES, UPLOAD_MAX_BYTES - others)
+
+    tmp_path = os.path.join(path, f"{_chunk_name(index)}.{uuid.uuid4().hex[:8]}.tmp")
+    return path, open(tmp_path, "wb"), tmp_path, allowed
+
+
+def _discard_tmp(tmp_path: str):
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+async def write_chunk(
+    session_id: str,
+    index: int,
+    body: AsyncIterator[bytes],
+    expected_sha256: Optional[str] = None
+) -> dict:
+    """
+    Escribe una parte desde el stream de la petición, controlando los
+    límites mientras llegan los bytes. Reintentar el mismo índice
+    reemplaza la parte de forma atómica (idempotente). La E/S de disco
+    corre en el threadpool, en escrituras de hasta WRITE_BUFFER_BYTES.
+    """
+    path, f, tmp_path, allowed = await run_in_threadpool(_prepare_chunk, session_id, index)
+    meta = _read_json(os.path.join(path, META_FILE))
+
+    digest = hashlib.sha256()
+    written = 0
+    pending = bytearray()
+    try:
+        try:
+            async for data in body:
+                written += len(data)
+                if written > allowed:
+                    if written > UPLOAD_CHUNK_MAX_BYTES:
+                        raise UploadSessionError(413, f"La parte excede {UPLOAD_CHUNK_MAX_BYTES} bytes")
+                    raise UploadSessionError(413, f"El archivo excede el máximo de {UPLOAD_MAX_BYTES} bytes")
+                digest.update(data)
+                pending += data
+                if len(pending) >= WRITE_BUFFER_BYTES:
+                    await run_in_threadpool(f.write, bytes(pending))
+                    pending.clear()
+            if pending:
+                await run_in_threadpool(f.write, bytes(pending))
+        finally:
+            await run_in_threadpool(f.close)
+
+        if written == 0:
+            raise UploadSessionError(400, "La parte está vacía")
+
+        checksum = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != checksum:
+            raise UploadSessionError(400, "El SHA-256 de la parte no coincide")
+
+        await run_in_threadpool(os.replace, tmp_path, os.path.join(path, _chunk_name(index)))
+    finally:
+        await run_in_threadpool(_discard_tmp, tmp_path)
+
+    parse_cache.discard(session_key(session_id))
+    # Si el ensamblado empezó mientras llegaba la parte, puede no incluirla
+    if os.path.exists(_assembled_path(path, meta)):
+        raise UploadSessionError(409, "La sesión ya fue ensamblada")
+    if os.path.exists(os.path.join(path, FINALIZING_FILE)):
+        raise UploadSessionError(409, "La sesión se está ensamblando o finalizando; reintente la parte")
+
+    return {"index": index, "size": written, "sha256": checksum}
+
+
+def assemble(session_id: str, require_declared: bool = False) -> str:
+    """
+    Une las partes en un solo archivo en disco, copiando por bloques,
+    y retorna su ruta. Exige partes contiguas desde 0 y, con
+    require_declared (preview), que la sesión declare total_chunks. Las
+    partes se conservan hasta finalizar; una vez ensamblada la sesión no
+    acepta más partes y se reutiliza el archivo. Debe llamarse con la
+    sesión reservada (claim_finalize).
+    """
+    path = _session_path(session_id)
+    meta = _read_json(os.path.join(path, META_FILE))
+    assembled_path = _assembled_path(path, meta)
+    if os.path.exists(assembled_path):
+        return assembled_path
+
+    if require_declared and meta["total_chunks"] is None:
+        raise UploadSessionError(409, "Declare total_chunks al crear la sesión para pedir el preview")
+    chunks = _received_chunks(path)
+    if not chunks:
+        raise UploadSessionError(400, "La sesión no tiene partes")
+
+    expected_count = meta["total_chunks"] or (max(chunks) + 1)
+    missing = [i for i in range(expected_count) if i not in chunks]
+    if missing:
+        raise UploadSessionError(409, f"Faltan partes: {missing[:20]}")
+
+    total = sum(chunks.values())
+    # write_chunk no ve las partes que se escriben en paralelo: el límite
+    # total se confirma aquí (con la sesión reservada)
+    if total > UPLOAD_MAX_BYTES:
+        raise UploadSessionError(413, f"El archivo excede el máximo de {UPLOAD_MAX_BYTES} bytes")
+    if meta["total_size"] is not None and total != meta["total_size"]:
+        raise UploadSessionError(409, f"Tamaño recibido {total} distinto del declarado {meta['total_size']}")
+
+    tmp_path = f"{assembled_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        for index in range(expected_count):
+            with open(os.path.join(path, _chunk_name(index)), "rb") as part:
+                shutil.copyfileobj(part, out, 1024 * 1024)
+    os.replace(tmp_path, assembled_path)
+    return assembled_path
+
+
+def discard_assembled(session_id: str):
+
+    """Borra el archivo ensamblado para que la sesión vuelva a aceptar partes"""
+
+    path = _session_path(session_id)
+    try:
+        os.remove(_assembled_path(path, _read_json(os.path.join(path, META_FILE))))
+    except FileNotFoundError:
+        pass
+
+
+def claim_finalize(session_id: str) -> bool:
+    """
+    Reserva la sesión para ensamblarla (preview o finalizar) de forma
+    atómica entre procesos. Retorna False si otra petición ya la tiene.
+    """
+    lock_path = os.path.join(_session_path(session_id), FINALIZING_FILE)
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def release_finalize(session_id: str):
+    try:
+        os.remove(os.path.join(_session_path(session_id), FINALIZING_FILE))
+    except (OSError, UploadSessionError):
+        pass
+
+
+def finalized_upload_id(session_id: str) -> Optional[int]:
+
+    """upload_id si la sesión ya se finalizó (finalizar dos veces es idempotente)"""
+
+    finalized = _read_json(os.path.join(_session_path(session_id), FINALIZED_FILE))
+    return finalized.get("upload_id") if finalized else None
+
+
+def mark_finalized(session_id: str, upload_id: int):
+
+    """Registra el upload_id y borra las partes y el archivo ensamblado"""
+
+    path = _session_path(session_id)
+    _write_json(os.path.join(path, FINALIZED_FILE), {"upload_id": upload_id, "finalized_at": time.time()})
+    for name in os.listdir(path):
+        if name.startswith((ASSEMBLED_PREFIX, "chunk_")) or name == FINALIZING_FILE:
+            os.remove(os.path.join(path, name))
+
+
+def delete_session(session_id: str):
+    shutil.rmtree(_session_path(session_id), ignore_errors=True)
+
+
+def filename_of(session_id: str) -> str:
+    return _read_json(os.path.join(_session_path(session_id), META_FILE))["filename"]
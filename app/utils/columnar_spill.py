@@ -0,0 +1,208 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, Iterator, List, Optional
+from app.utils.logger_config import logger
+from app.utils.lazy_imports import pd, np
+from app.utils.validation_rules import numeric_cells
+
+
+#-------------------------------------------------------------------------
+# Volcado columnar a disco de una carga parseada. Cada columna de texto
+# se guarda como tres arreglos NumPy:
+#   <col>.offsets.npy  int64, n+1 posiciones en bytes
+#   <col>.data.bin     uint8, el UTF-8 de todas las celdas seguidas
+#   <col>.present.npy  bool, False donde la celda estaba vacía
+#   <col>.numeric.npy  bool, True donde la celda era un número
+# más index.npy (índice original, para los números de fila) y meta.json,
+# que fija el conjunto de reglas con que se validará la carga. La
+# ingesta los abre con mmap y decodifica un bloque a la vez, así que las
+# cargas en cola no ocupan RAM.
+#-------------------------------------------------------------------------
+SPILL_DIR = os.getenv("SPILL_DIR", "uploads/spill")
+
+# Volcados huérfanos (p. ej. un worker que murió) se borran pasadas estas horas
+SPILL_TTL_HOURS = float(os.getenv("SPILL_TTL_HOURS", "24"))
+
+META_FILE = "meta.json"
+INDEX_FILE = "index.npy"
+
+FORMAT_VERSION = 2
+
+# Filas que se codifican juntas al escribir una columna
+WRITE_BLOCK_ROWS = 65536
+
+# Nombres de columna seguros como nombre de archivo
+_UNSAFE = re.compile(r"[^0-9A-Za-z_.-]")
+
+
+def _column_file(column: str, suffix: str) -> str:
+    return f"{_UNSAFE.sub('_', column)}.{suffix}"
+
+
+def spill_path(upload_id: int) -> str:
+    return os.path.join(SPILL_DIR, str(int(upload_id)))
+
+
+def cleanup_expired():
+
+    """Borra volcados más viejos que SPILL_TTL_HOURS"""
+
+    if not os.path.isdir(SPILL_DIR):
+        return
+    limit = time.time() - SPILL_TTL_HOURS * 3600
+    for name in os.listdir(SPILL_DIR):
+        path = os.path.join(SPILL_DIR, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < limit:
+                shutil.rmtree(path, ignore_errors=True)
+                logger.info(f"Volcado de carga expirado eliminado: {name}")
+        except OSError:
+            pass
+
+
+def _as_number(text: str):
+
+    """Vuelve a número una celda numérica guardada como texto"""
+
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _write_column(path: str, column: str, values: "pd.Series"):
+    present = values.notna().to_numpy()
+    # La validación distingue un número de un texto de dígitos (not_numeric)
+    numeric = numeric_cells(values) & present
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+
+    # Se codifica por bloques para no duplicar la columna entera en memoria
+    with open(os.path.join(path, _column_file(column, "data.bin")), "wb") as f:
+        for start in range(0, len(values), WRITE_BLOCK_ROWS):
+            block = values.iloc[start:start + WRITE_BLOCK_ROWS]
+            # Mismo texto que ve la validación (astype(str))
+            encoded = block.where(block.notna(), "").astype(str).str.encode("utf-8").tolist()
+            offsets[start + 1:start + 1 + len(encoded)] = [len(item) for item in encoded]
+            f.write(b"".join(encoded))
+    np.cumsum(offsets, out=offsets)
+
+    np.save(os.path.join(path, _column_file(column, "offsets.npy")), offsets)
+    np.save(os.path.join(path, _column_file(column, "present.npy")), present)
+    np.save(os.path.join(path, _column_file(column, "numeric.npy")), numeric)
+
+
+def spill_dataframe(df: "pd.DataFrame", upload_id: int, rule_set: Optional[dict] = None) -> str:
+    """
+    Escribe el DataFrame en SPILL_DIR/<upload_id> y retorna la ruta.
+    rule_set es el conjunto de reglas (normalizado) con que se eligieron
+    las columnas; la ingesta valida con él aunque el activo cambie.
+    Se escribe en un directorio temporal y se renombra al final, así que
+    un volcado visible siempre está completo.
+    """
+    cleanup_expired()
+
+    path = spill_path(upload_id)
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        columns = [str(column) for column in df.columns]
+        for column in columns:
+            _write_column(tmp_path, column, df[column])
+        np.save(os.path.join(tmp_path, INDEX_FILE), df.index.to_numpy(dtype=np.int64))
+
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "upload_id": upload_id,
+                "rows": len(df),
+                "columns": columns,
+                "rule_set": rule_set,
+                "created_at": time.time(),
+            }, f)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return path
+
+
+class SpilledUpload:
+
+    """Lectura por bloques de un volcado, con los arreglos mapeados en memoria"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Versión de volcado no soportada: {self.meta.get('version')}")
+
+        self.columns: List[str] = self.meta["columns"]
+        self.index = np.load(os.path.join(path, INDEX_FILE), mmap_mode="r")
+        self._offsets: Dict[str, "np.ndarray"] = {}
+        self._present: Dict[str, "np.ndarray"] = {}
+        self._numeric: Dict[str, "np.ndarray"] = {}
+        self._data: Dict[str, "np.ndarray"] = {}
+        for column in self.columns:
+            self._offsets[column] = np.load(os.path.join(path, _column_file(column, "offsets.npy")), mmap_mode="r")
+            self._present[column] = np.load(os.path.join(path, _column_file(column, "present.npy")), mmap_mode="r")
+            self._numeric[column] = np.load(os.path.join(path, _column_file(column, "numeric.npy")), mmap_mode="r")
+            data_path = os.path.join(path, _column_file(column, "data.bin"))
+            # np.memmap no acepta archivos vacíos (columna sin texto)
+            self._data[column] = (
+                np.memmap(data_path, dtype=np.uint8, mode="r")
+                if os.path.getsize(data_path) else np.zeros(0, dtype=np.uint8)
+            )
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    @property
+    def rule_set(self) -> Optional[dict]:
+        return self.meta.get("rule_set")
+
+    def _decode(self, column: str, start: int, stop: int) -> list:
+        offsets = self._offsets[column][start:stop + 1]
+        present = self._present[column][start:stop]
+        base = int(offsets[0])
+        raw = self._data[column][base:int(offsets[-1])].tobytes()
+        bounds = (offsets - base).tolist()
+
+        text = raw.decode("utf-8")
+        if len(text) == len(raw):
+            # Todo ASCII: las posiciones en bytes sirven para el texto
+            values = [text[bounds[i]:bounds[i + 1]] for i in range(stop - start)]
+        else:
+            values = [raw[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(stop - start)]
+
+        numeric = self._numeric[column][start:stop]
+        for position in np.flatnonzero(numeric).tolist():
+            values[position] = _as_number(values[position])
+        return [value if is_present else None for value, is_present in zip(values, present.tolist())]
+
+    def chunk(self, start: int, stop: int) -> "pd.DataFrame":
+
+        """Filas [start, stop) como DataFrame con el índice original"""
+
+        stop = min(stop, len(self))
+        return pd.DataFrame(
+            {column: self._decode(column, start, stop) for column in self.columns},
+            index=pd.Index(np.asarray(self.index[start:stop])),
+            dtype=object
+        )
+
+    def iter_chunks(self, size: int) -> Iterator["pd.DataFrame"]:
+        for start in range(0, len(self), size):
+            yield self.chunk(start, start + size)
+
+
+def remove(path: str):
+    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,190 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+from app.utils.logger_config import logger
+
+
+#-------------------------------------------------------------------------
+# Presupuesto de descompresión: se controla mientras se leen los bytes,
+# no con los tamaños declarados en las cabeceras (que pueden mentir).
+#-------------------------------------------------------------------------
+DECOMPRESS_MAX_BYTES = int(os.getenv("DECOMPRESS_MAX_BYTES", str(500 * 1024 * 1024)))
+DECOMPRESS_MAX_RATIO = float(os.getenv("DECOMPRESS_MAX_RATIO", "100"))
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "20"))
+
+# Extensiones de los archivos dentro de un .zip
+ZIP_MEMBER_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# La proporción por miembro solo se exige desde este tamaño: XML pequeños
+# (estilos, relaciones) comprimen mucho sin ser un riesgo
+RATIO_CHECK_MIN_BYTES = 1024 * 1024
+
+Source = Union[str, BinaryIO]
+
+
+class DecompressionBudgetError(ValueError):
+
+    """El archivo expandido supera el tamaño o la proporción permitidos"""
+
+
+class DecompressionBudget:
+
+    """Bytes expandidos acumulados de una carga (compartido entre miembros de un zip)"""
+
+    def __init__(self, compressed_size: int):
+        self.compressed_size = max(compressed_size, 1)
+        self.max_bytes = min(DECOMPRESS_MAX_BYTES, int(self.compressed_size * DECOMPRESS_MAX_RATIO))
+        self.expanded = 0
+
+    def consume(self, size: int):
+        self.expanded += size
+        if self.expanded > self.max_bytes:
+            raise DecompressionBudgetError(
+                f"El archivo descomprimido supera el límite permitido "
+                f"({self.max_bytes} bytes, proporción máxima {DECOMPRESS_MAX_RATIO:g}:1)"
+            )
+
+
+class BudgetedReader(io.RawIOBase):
+
+    """Envuelve un stream descomprimido y descuenta cada lectura del presupuesto"""
+
+    def __init__(self, raw: BinaryIO, budget: DecompressionBudget):
+        self._raw = raw
+        self._budget = budget
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._raw.read(len(buffer))
+        self._budget.consume(len(data))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        try:
+            self._raw.close()
+        finally:
+            super().close()
+
+
+def source_size(source: Source) -> int:
+
+    """Tamaño comprimido de una ruta o de un archivo abierto"""
+
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+
+def open_gzip(source: Source) -> BinaryIO:
+
+    """Stream del .gz descomprimido, con presupuesto"""
+
+    budget = DecompressionBudget(source_size(source))
+    if isinstance(source, str):
+        raw = gzip.open(source, "rb")
+    else:
+        source.seek(0)
+        raw = gzip.GzipFile(fileobj=source, mode="rb")
+    return io.BufferedReader(BudgetedReader(raw, budget), buffer_size=1024 * 1024)
+
+
+def check_declared_sizes(members: List[zipfile.ZipInfo], budget: DecompressionBudget, label: str):
+    """
+    Rechazo con los tamaños que declara el zip, antes de leer nada: la
+    suma de file_size contra el presupuesto y la proporción de cada
+    miembro grande. zipfile no entrega más de file_size bytes por
+    miembro, así que lo declarado también acota lo que se expande.
+    """
+    for info in members:
+        if info.file_size < RATIO_CHECK_MIN_BYTES:
+            continue
+        ratio = info.file_size / max(info.compress_size, 1)
+        if ratio > DECOMPRESS_MAX_RATIO:
+            raise DecompressionBudgetError(
+                f"{label}: {info.filename} tiene proporción {ratio:.0f}:1, "
+                f"más que el máximo de {DECOMPRESS_MAX_RATIO:g}:1"
+            )
+    declared = sum(info.file_size for info in members)
+    if budget.expanded + declared > budget.max_bytes:
+        raise DecompressionBudgetError(
+            f"{label} declara {declared} bytes descomprimidos, más que el límite de {budget.max_bytes}"
+        )
+
+
+def check_xlsx(source: Source, budget: Optional[DecompressionBudget] = None):
+    """
+    Un .xlsx también es un zip que openpyxl expande entero: se revisa con
+    sus ZipInfo antes de parsearlo. Dentro de un .zip usa el presupuesto
+    del archivo externo; suelto, uno propio según su tamaño.
+    """
+    if budget is None:
+        budget = DecompressionBudget(source_size(source))
+    position = None if isinstance(source, str) else source.tell()
+    try:
+        with zipfile.ZipFile(source) as workbook:
+            members = workbook.infolist()
+    except zipfile.BadZipFile:
+        # No es un zip: que el lector de Excel reporte el error de formato
+        return
+    finally:
+        if position is not None:
+            source.seek(position)
+    check_declared_sizes(members, budget, "El .xlsx")
+    budget.consume(sum(info.file_size for info in members))
+
+
+def iter_zip_members(source: Source) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Recorre los archivos útiles de un .zip (CSV o Excel) y entrega cada
+    uno como stream con presupuesto compartido. Los Excel se extraen a
+    un temporal porque openpyxl necesita un archivo con seek.
+    """
+    budget = DecompressionBudget(source_size(source))
+    if not isinstance(source, str):
+        source.seek(0)
+
+    with zipfile.ZipFile(source) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not os.path.basename(info.filename).startswith((".", "__MACOSX"))
+            and "__MACOSX/" not in info.filename
+            and info.filename.lower().endswith(ZIP_MEMBER_EXTENSIONS)
+        ]
+        if not members:
+            raise ValueError("El .zip no contiene archivos CSV ni Excel")
+        if len(members) > ZIP_MAX_MEMBERS:
+            raise ValueError(f"El .zip tiene más de {ZIP_MAX_MEMBERS} archivos")
+
+        # Rechazo rápido con los tamaños declarados; el control real es al leer
+        check_declared_sizes(members, budget, "El .zip")
+
+        for info in members:
+            logger.info(f"Leyendo {info.filename} del .zip ({info.file_size} bytes)")
+            stream = io.BufferedReader(BudgetedReader(archive.open(info), budget), buffer_size=1024 * 1024)
+
+            if info.filename.lower().endswith(".csv"):
+                with stream:
+                    yield info.filename, stream
+                continue
+
+            suffix = os.path.splitext(info.filename)[1].lower()
+            with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+                with stream:
+                    shutil.copyfileobj(stream, tmp, 1024 * 1024)
+                tmp.flush()
+                tmp.seek(0)
+                if suffix == ".xlsx":
+                    check_xlsx(tmp, budget)
+                yield info.filename, tmp
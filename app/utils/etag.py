@@ -0,0 +1,143 @@
+import hashlib
+from typing import Any, Callable, Iterator, Tuple
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal, read_sessionmaker_for
+from app.models import ResourceVersion
+
+
+# Recursos versionados
+USERS = "users"
+UPLOAD_LOGS = "upload_logs"
+
+# Recursos modificados en la transacción en curso (Session.info)
+_CHANGED_KEY = "etag_changed"
+
+
+def mark_changed(db: Session, resource: str):
+    """
+    Registra que la transacción en curso modificó un recurso. La versión
+    se incrementa una sola vez por transacción, justo antes del commit
+    (ver _bump_on_commit): la fila del contador queda bloqueada solo
+    durante el commit y no mientras dura la escritura.
+    """
+    db.info.setdefault(_CHANGED_KEY, set()).add(resource)
+
+
+def _bump(db: Session, resource: str):
+    updated = db.query(ResourceVersion).filter(
+        ResourceVersion.name == resource
+    ).update({ResourceVersion.version: ResourceVersion.version + 1}, synchronize_session=False)
+
+    if updated:
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(ResourceVersion(name=resource, version=1))
+    except IntegrityError:
+        db.query(ResourceVersion).filter(
+            ResourceVersion.name == resource
+        ).update({ResourceVersion.version: ResourceVersion.version + 1}, synchronize_session=False)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(db: Session):
+    # Los savepoints (begin_nested) también disparan before_commit: solo
+    # cuenta el commit de la transacción externa
+    if db.in_nested_transaction():
+        return
+    for resource in sorted(db.info.pop(_CHANGED_KEY, ())):
+        _bump(db, resource)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_on_rollback(db: Session, transaction):
+    # Si la transacción externa terminó sin commit, no hubo cambios
+    if transaction.parent is None:
+        db.info.pop(_CHANGED_KEY, None)
+
+
+def get_version(db: Session, resource: str) -> int:
+
+    """Versión actual de un recurso (0 si nunca se ha escrito)"""
+
+    version = db.query(ResourceVersion.version).filter(
+        ResourceVersion.name == resource
+    ).scalar()
+    return int(version) if version is not None else 0
+
+
+def versioned_read_db(resource: str) -> Callable[[Request], Iterator[Tuple[int, Session]]]:
+    """
+    Dependencia para endpoints con ETag: retorna (versión, sesión de lectura).
+    La versión siempre se lee del primario. Si la réplica elegida todavía
+    no tiene esa versión (replicación atrasada), los datos también se leen
+    del primario: un ETag nunca describe datos más viejos que su versión,
+    así que un 304 no puede ocultar un cambio.
+    """
+    def dependency(request: Request) -> Iterator[Tuple[int, Session]]:
+        primary = SessionLocal()
+        replica = None
+        try:
+            version = get_version(primary, resource)
+            read_sessionmaker = read_sessionmaker_for(request)
+            if read_sessionmaker is not SessionLocal:
+                replica = read_sessionmaker()
+                if get_version(replica, resource) >= version:
+                    yield version, replica
+                    return
+            yield version, primary
+        finally:
+            if replica is not None:
+                replica.close()
+            primary.close()
+    
+    return dependency
+
+
+def build_etag(resource: str, version: int, *params: Any) -> str:
+
+    """ETag débil a partir de la versión y los parámetros de la consulta"""
+
+    suffix = ""
+    if params:
+        raw = "|".join(str(p) for p in params)
+        suffix = "-" + hashlib.md5(raw.encode("utf-8")).hexdigest()[:8]
+    return f'W/"{resource}-{version}{suffix}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+
+    """True si el ETag coincide con algún valor de If-None-Match"""
+
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # Comparación débil: se ignora el prefijo W/
+    current = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        if candidate.strip().removeprefix("W/") == current:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+
+    """Respuesta 304 sin cuerpo"""
+
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag_headers(response: Response, etag: str):
+
+    """Agrega ETag y obliga al navegador a revalidar en cada petición"""
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
@@ -1,10 +1,14 @@
-import pandas as pd
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 import io
 from app.schemas import ExcelPreviewRow
 import re
 from app.utils.logger_config import logger
+# pandas se importa en el primer uso (ver lazy_imports)
+from app.utils.lazy_imports import pd
+from app.utils import decompression, workbook_inspector, validation_rules
+from app.utils.validation_rules import ValidationResult
 
 
 class ExcelProcessor:
@@ -13,18 +17,32 @@ class ExcelProcessor:
     
     REQUIRED_COLUMNS = ['name', 'email']
     
+    # Formatos aceptados por /upload y la carga por partes
+    SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.csv.gz', '.zip')
+    
     # 10 MB
     MAX_FILE_SIZE = 10 * 1024 * 1024  
     
     @staticmethod
     async def validate_file_size(file: UploadFile) -> bool:
         
-        """Valida que el archivo no exceda el tamaño máximo"""
+        """Valida que el archivo no exceda el tamaño máximo sin leerlo a memoria"""
         try:
-            contents = await file.read()
-            # Regresa al inicio del archivo
-            await file.seek(0)  
-            return len(contents) <= ExcelProcessor.MAX_FILE_SIZE
+            # El parser multipart ya conoce el tamaño del archivo en disco
+            if file.size is not None:
+                return file.size <= ExcelProcessor.MAX_FILE_SIZE
+            
+            # Sin tamaño conocido: contar por bloques y cortar al pasar el límite
+            size = 0
+            while True:
+                block = await file.read(1024 * 1024)
+                if not block:
+                    break
+                size += len(block)
+                if size > ExcelProcessor.MAX_FILE_SIZE:
+                    break
+            await file.seek(0)
+            return size <= ExcelProcessor.MAX_FILE_SIZE
         except Exception as e:
             logger.error(f"Error validando tamaño: {str(e)}")
             return False
@@ -34,43 +52,94 @@ class ExcelProcessor:
         
         """Obtiene los nombres de las hojas del Excel"""
         try:
-            contents = await file.read()
-            await file.seek(0)
+            # .xlsx: solo se lee xl/workbook.xml del zip
+            if workbook_inspector.is_xlsx(file.filename):
+                info = await run_in_threadpool(workbook_inspector.inspect_workbook, file.file)
+                return [sheet["name"] for sheet in info["sheets"]]
             
-             # Leer con pandas
-            excel_file = pd.ExcelFile((contents))
+            # .xls (binario): hace falta abrir el libro con pandas
+            await file.seek(0)
+            excel_file = pd.ExcelFile(file.file)
+            await file.seek(0)
             return excel_file.sheet_names
         except Exception as e:
             logger.error(f"Error leyendo hojas: {str(e)}")
             raise
     
+    @staticmethod
+    async def inspect_file(file: UploadFile) -> Optional[Dict[str, Any]]:
+        
+        """Hojas con filas/columnas estimadas de un .xlsx; None para otros formatos"""
+        
+        if not workbook_inspector.is_xlsx(file.filename):
+            return None
+        return await run_in_threadpool(workbook_inspector.inspect_workbook, file.file)
+    
     
     @staticmethod
-    async def read_excel(file: UploadFile, sheet_name: str = None) -> pd.DataFrame:
+    async def read_excel(file: UploadFile, sheet_name: str = None) -> "pd.DataFrame":
         
         """Lee el archivo Excel y retorna un DataFrame"""
         
         try:
-            contents = await file.read()
+            # pandas lee del archivo temporal del upload, sin copiarlo a bytes
+            await file.seek(0)
+            df = pd.read_excel(file.file, sheet_name=sheet_name or 0)
             await file.seek(0)
             
-            #Leer el excel
-            df = pd.read_excel(contents, sheet_name=sheet_name or 0)
-        
-            # Limpiar nombres de columnas (quitar espacios)
-            df.columns = df.columns.str.strip().str.lower()
-            
-            #Eliminar filas completamente vacias
-            df = df.dropna(how='all')
-            
-            return df
+            return ExcelProcessor._normalize(df)
         
         except Exception as e:
             logger.error(f"Error leyendo el Excel: {str(e)}")
             raise
     
     @staticmethod
-    def validate_structure(df: pd.DataFrame) -> Tuple[bool, List[str]]:
+    def read_upload(source, filename: str) -> "pd.DataFrame":
+        """
+        Lee una carga según su extensión desde una ruta o un archivo abierto.
+        .csv.gz y .zip se descomprimen como stream con presupuesto de tamaño
+        y los .xlsx se revisan con ese presupuesto antes de parsearlos;
+        los archivos de un .zip se unen en un solo DataFrame.
+        """
+        name = (filename or "").lower()
+        
+        if name.endswith('.csv.gz'):
+            with decompression.open_gzip(source) as stream:
+                df = pd.read_csv(stream, encoding='utf-8-sig')
+        
+        elif name.endswith('.zip'):
+            frames = []
+            for member_name, stream in decompression.iter_zip_members(source):
+                if member_name.lower().endswith('.csv'):
+                    frame = pd.read_csv(stream, encoding='utf-8-sig')
+                else:
+                    frame = pd.read_excel(stream)
+                frames.append(ExcelProcessor._normalize(frame))
+            df = pd.concat(frames, ignore_index=True)
+        
+        elif name.endswith('.csv'):
+            df = pd.read_csv(source, encoding='utf-8-sig')
+        
+        else:
+            if workbook_inspector.is_xlsx(name):
+                decompression.check_xlsx(source)
+            df = pd.read_excel(source)
+        
+        return ExcelProcessor._normalize(df)
+    
+    @staticmethod
+    def _normalize(df: "pd.DataFrame") -> "pd.DataFrame":
+        
+        """Nombres de columna en minúscula y sin espacios, sin filas vacías"""
+        
+        # Limpiar nombres de columnas (quitar espacios)
+        df.columns = df.columns.str.strip().str.lower()
+        
+        #Eliminar filas completamente vacias
+        return df.dropna(how='all')
+    
+    @staticmethod
+    def validate_structure(df: "pd.DataFrame") -> Tuple[bool, List[str]]:
         
         """Valida que el Excel tenga las columnas requeridas"""
         
@@ -121,68 +190,61 @@ class ExcelProcessor:
         return True
     
     @staticmethod
-    def validate_row(row: Dict[str, Any], row_number: int) -> ExcelPreviewRow:
+    def validate_dataframe(df: "pd.DataFrame") -> ValidationResult:
         
-        """Valida una fila individual y devuelve un ExcelPreviewRow"""
+        """Valida todas las filas con el conjunto de reglas activo (vectorizado)"""
         
-        errors = []
+        return validation_rules.current_plan().evaluate(df)
+    
+    @staticmethod
+    def preview_rows(df: "pd.DataFrame", result: ValidationResult, positions) -> List[ExcelPreviewRow]:
         
-        #Obterne los valores
-        name = row.get('name', '')
-        email = row.get('email', '')
+        """ExcelPreviewRow solo para las posiciones que se van a mostrar"""
         
-        if not ExcelProcessor.validate_name(name):
-            errors.append("Email invalido")
+        names = result.values.get('name')
+        emails = result.values.get('email')
+        return [
+            ExcelPreviewRow(
+                # +2 porque Excel empieza en 1 y hay header
+                row_number=int(df.index[position]) + 2,
+                name=names[position] if names is not None else "",
+                email=emails[position] if emails is not None else "",
+                is_valid=bool(result.valid[position]),
+                errors=result.messages_for(position)
+            )
+            for position in positions
+        ]
+    
+    @staticmethod
+    def validate_row(row: Dict[str, Any], row_number: int) -> ExcelPreviewRow:
         
-        #Limpiar valores
-        clean_name = str(name).strip() if pd.notna(name) else ""
-        clean_email = str(email).strip().lower() if pd.notna(email) else ""
+        """Valida una fila individual y devuelve un ExcelPreviewRow (para filas sueltas; en lote usar validate_dataframe)"""
         
-        return ExcelPreviewRow(
-            row_number=row_number,
-            name=clean_name,
-            email=clean_email,
-            is_valid=len(errors) == 0,
-            errors=errors
-        )
+        df = pd.DataFrame([row], index=[row_number - 2])
+        return ExcelProcessor.preview_rows(df, ExcelProcessor.validate_dataframe(df), [0])[0]
     
     @staticmethod
-    def get_preview(df: pd.DataFrame, max_rows: int = 50) -> List[ExcelPreviewRow]:
+    def get_preview(df: "pd.DataFrame", max_rows: int = 50) -> List[ExcelPreviewRow]:
         
         """Obtiene un preview de las primeras filas con validación"""
         
-        preview_rows = []
-        
-        for idx, row in df.head(max_rows).iterrows():
-            validated_row = ExcelProcessor.validate_row(
-                row.to_dict(),
-                # +2 porque Excel empieza en 1 y hay header
-                idx + 2 
-            )
-            preview_rows.append(validated_row)
-            
-        return preview_rows
+        head = df.head(max_rows)
+        result = ExcelProcessor.validate_dataframe(head)
+        return ExcelProcessor.preview_rows(head, result, range(len(head)))
     
     @staticmethod
-    def get_validation_summary(df: pd.DataFrame) -> Dict[str, Any]:
+    def get_validation_summary(df: "pd.DataFrame") -> Dict[str, Any]:
         """
         Devuelve un resumen de validación del archivo completo
         """
+        result = ExcelProcessor.validate_dataframe(df)
         total_rows = len(df)
-        valid_rows = 0
-        invalid_rows = 0
-        
-        for idx, row in df.iterrows():
-            validated = ExcelProcessor.validate_row(row.to_dict(), idx + 2)
-            if validated.is_valid:
-                valid_rows += 1
-            else:
-                invalid_rows += 1
+        valid_rows = result.valid_count
         
         return {
             "total_rows": total_rows,
             "valid_rows": valid_rows,
-            "invalid_rows": invalid_rows,
-            "success_rate": (valid_rows / total_rows * 100) if total_rows > 0 else 0
+            "invalid_rows": result.invalid_count,
+            "success_rate": (valid_rows / total_rows * 100) if total_rows > 0 else 0,
+            "violations": result.violation_counts()
         }
-    
\ No newline at end of file
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List
+import orjson
+from fastapi.responses import Response
+from sqlalchemy.engine import Result
+
+
+class FastJSONResponse(Response):
+
+    """Respuesta JSON codificada con orjson (sin pasar por pydantic)"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # orjson serializa datetime, Enum y None de forma nativa
+        return orjson.dumps(content)
+
+
+def rows_as_dicts(result: Result) -> List[Dict[str, Any]]:
+
+    """Convierte filas de un select() de Core en dicts planos"""
+
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PHASES = ("parse", "validation", "dedup", "insert")
+
+# Métricas activas del hilo actual (la ingesta corre en el threadpool)
+_active = threading.local()
+
+
+def current_memory_bytes() -> Optional[int]:
+
+    """Memoria residente actual del proceso, o None si no se puede leer"""
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    if resource is not None:
+        # ru_maxrss viene en KB en Linux (pico, no actual, pero sirve de cota)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+class IngestMetrics:
+    """
+    Acumula tiempos por fase, memoria y sentencias SQL de una carga.
+    max_process_rss_bytes es el máximo de la memoria residente del proceso
+    completo (incluye otras peticiones) entre los muestreos: al empezar,
+    tras cada bloque y al terminar. No es el pico propio de la ingesta.
+    """
+
+    def __init__(self, parse_seconds: float = 0.0):
+        self.seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.seconds["parse"] = parse_seconds
+        self.db_statements = 0
+        self.max_process_rss_bytes: Optional[int] = None
+        self.rows = 0
+        self._started = time.perf_counter()
+        self.sample_memory()
+
+    def sample_memory(self):
+        current = current_memory_bytes()
+        if current is not None and (self.max_process_rss_bytes is None or current > self.max_process_rss_bytes):
+            self.max_process_rss_bytes = current
+
+    @contextmanager
+    def phase(self, name: str):
+
+        """Suma al acumulado de la fase el tiempo del bloque"""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    @contextmanager
+    def track_statements(self):
+
+        """Cuenta las sentencias SQL que ejecute este hilo dentro del bloque"""
+
+        previous = getattr(_active, "metrics", None)
+        _active.metrics = self
+        try:
+            yield self
+        finally:
+            _active.metrics = previous
+
+    @property
+    def total_seconds(self) -> float:
+        # El parseo ocurre antes de crear el objeto, por eso se suma aparte
+        return self.seconds["parse"] + (time.perf_counter() - self._started)
+
+    def as_model_kwargs(self) -> dict:
+
+        """Valores para ExcelUploadMetrics (sin upload_id)"""
+
+        self.sample_memory()
+        total = self.total_seconds
+        return {
+            "parse_seconds": round(self.seconds["parse"], 4),
+            "validation_seconds": round(self.seconds["validation"], 4),
+            "dedup_seconds": round(self.seconds["dedup"], 4),
+            "insert_seconds": round(self.seconds["insert"], 4),
+            "total_seconds": round(total, 4),
+            "rows_per_second": round(self.rows / total, 2) if total > 0 else 0.0,
+            "max_process_rss_bytes": self.max_process_rss_bytes,
+            "db_statements": self.db_statements,
+        }
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    metrics = getattr(_active, "metrics", None)
+    if metrics is not None:
+        metrics.db_statements += 1
@@ -0,0 +1,66 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from app.utils.logger_config import logger
+
+
+#-------------------------------------------------------------------------
+# pandas y openpyxl tardan ~0.5s y decenas de MB en importarse. Se cargan
+# en la primera operación de Excel, no al levantar cada worker.
+#-------------------------------------------------------------------------
+
+# Importar la pila de datos en segundo plano cuando la app esté lista
+DATA_STACK_WARMUP = os.getenv("DATA_STACK_WARMUP", "false").lower() in ("1", "true", "yes")
+
+DATA_STACK = ("pandas", "openpyxl")
+
+_import_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Módulo que se importa en el primer acceso a un atributo.
+    Uso: pd = LazyModule("pandas") y luego pd.read_excel(...)
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    already_loaded = self._name in sys.modules
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    if not already_loaded:
+                        logger.info(f"Módulo {self._name} importado en {time.perf_counter() - start:.2f}s")
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    @property
+    def loaded(self) -> bool:
+        return self._name in sys.modules
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+
+def data_stack_loaded() -> bool:
+    return all(name in sys.modules for name in DATA_STACK)
+
+
+def warm_up():
+
+    """Importa pandas y openpyxl (para llamar en el threadpool)"""
+
+    start = time.perf_counter()
+    for name in DATA_STACK:
+        LazyModule(name)._load()
+    logger.info(f"Pila de datos precargada en {time.perf_counter() - start:.2f}s")
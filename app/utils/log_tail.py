@@ -0,0 +1,164 @@
+import asyncio
+import os
+from typing import AsyncIterator, Iterator, List, Optional
+from app.utils.logger_config import LOG_FILE, LOG_BACKUP_COUNT
+
+
+# Tamaño de bloque para leer el archivo hacia atrás
+BLOCK_SIZE = 64 * 1024
+
+
+def log_files(include_rotated: bool = True) -> List[str]:
+
+    """Archivos de log existentes, del más reciente al más antiguo"""
+
+    candidates = [LOG_FILE]
+    if include_rotated:
+        candidates += [f"{LOG_FILE}.{n}" for n in range(1, LOG_BACKUP_COUNT + 1)]
+    return [path for path in candidates if os.path.exists(path)]
+
+
+def _reverse_lines(path: str) -> Iterator[str]:
+    """
+    Devuelve las líneas de un archivo desde el final hacia el inicio,
+    leyendo bloques con seek: el costo depende de lo leído, no del tamaño
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        carry = b""
+
+        while position > 0:
+            read_size = min(BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + carry
+
+            parts = block.split(b"\n")
+            # La primera parte puede ser una línea incompleta
+            carry = parts[0]
+            for line in reversed(parts[1:]):
+                if line.strip():
+                    yield line.decode("utf-8", errors="replace").rstrip("\r")
+
+        if carry.strip():
+            yield carry.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def matches(line: str, level: Optional[str] = None, contains: Optional[str] = None) -> bool:
+
+    """Filtra por nivel (formato '... - LEVEL - ...') y por texto"""
+
+    if level and f" - {level.upper()} - " not in line:
+        return False
+    if contains and contains.lower() not in line.lower():
+        return False
+    return True
+
+
+def tail(
+    lines: int,
+    level: Optional[str] = None,
+    contains: Optional[str] = None,
+    include_rotated: bool = True
+) -> List[str]:
+    """
+    Últimas N líneas que cumplen el filtro, en orden cronológico.
+    Recorre app.log y luego los respaldos rotados (.1, .2, ...) solo
+    hasta completar N líneas.
+    """
+    collected: List[str] = []
+    if lines <= 0:
+        return collected
+
+    for path in log_files(include_rotated):
+        try:
+            for line in _reverse_lines(path):
+                if matches(line, level, contains):
+                    collected.append(line)
+                    if len(collected) >= lines:
+                        return list(reversed(collected))
+        except FileNotFoundError:
+            # Rotó mientras se leía
+            continue
+
+    return list(reversed(collected))
+
+
+def _open_at_end(seek_end: bool):
+
+    """Abre app.log (al final si seek_end) y retorna (archivo, inodo), o (None, None) si no existe"""
+
+    try:
+        f = open(LOG_FILE, "rb")
+    except FileNotFoundError:
+        return None, None
+    if seek_end:
+        f.seek(0, os.SEEK_END)
+    return f, os.fstat(f.fileno()).st_ino
+
+
+def _rotated(f, inode: int) -> bool:
+
+    """Si app.log se reemplazó o se achicó desde que se abrió f"""
+
+    try:
+        stat = os.stat(LOG_FILE)
+    except FileNotFoundError:
+        return True
+    return stat.st_ino != inode or stat.st_size < f.tell()
+
+
+async def follow(
+    level: Optional[str] = None,
+    contains: Optional[str] = None,
+    poll_interval: float = 0.5,
+    heartbeat: Optional[float] = None
+) -> AsyncIterator[Optional[str]]:
+    """
+    Emite las líneas nuevas de app.log a medida que se escriben.
+    Si el archivo rota (se reemplaza o se achica) se reabre desde el inicio.
+    Con heartbeat, emite None tras ese número de segundos sin líneas, para
+    que quien consume mantenga viva la conexión sin cancelar el generador.
+    La lectura y los stat del archivo corren en un hilo, fuera del loop.
+    """
+    loop = asyncio.get_running_loop()
+    f = None
+    inode = None
+    buffer = b""
+    last_emit = loop.time()
+    # Al empezar solo interesan las líneas nuevas; si app.log aún no
+    # existía, todo lo que se escriba después lo es
+    seek_end = True
+
+    try:
+        while True:
+            if f is None:
+                f, inode = await asyncio.to_thread(_open_at_end, seek_end)
+                seek_end = False
+
+            chunk = await asyncio.to_thread(f.read, BLOCK_SIZE) if f else b""
+            if chunk:
+                buffer += chunk
+                *complete, buffer = buffer.split(b"\n")
+                for raw in complete:
+                    line = raw.decode("utf-8", errors="replace").rstrip("\r")
+                    if line.strip() and matches(line, level, contains):
+                        last_emit = loop.time()
+                        yield line
+                continue
+
+            if f and await asyncio.to_thread(_rotated, f, inode):
+                f.close()
+                f, inode = await asyncio.to_thread(_open_at_end, False)
+                buffer = b""
+                continue
+
+            if heartbeat is not None and loop.time() - last_emit >= heartbeat:
+                last_emit = loop.time()
+                yield None
+
+            await asyncio.sleep(poll_interval)
+    finally:
+        if f:
+            f.close()
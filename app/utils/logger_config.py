@@ -1,37 +1,93 @@
 import os
+import atexit
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+from collections import Counter
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import sys
 
 # Crear carpeta logs si no existe
 os.makedirs("logs", exist_ok=True)
 
+LOG_FILE = "logs/app.log"
+LOG_BACKUP_COUNT = 3
+
+LOG_LEVEL = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+
 logger = logging.getLogger("mi_proyecto_logger")
-logger.setLevel(logging.INFO)
+logger.setLevel(LOG_LEVEL)
 
 # Formatter común
 formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 
 #RotatingFileHandler para archivo
 file_handler = RotatingFileHandler(
-    "logs/app.log",
+    LOG_FILE,
     maxBytes=5*1024*1024,
-    backupCount=3,
+    backupCount=LOG_BACKUP_COUNT,
     encoding="utf-8",
     delay=False
 )
 file_handler.setFormatter(formatter)
-file_handler.setLevel(logging.INFO)
+file_handler.setLevel(LOG_LEVEL)
 
 #StreamHandler para consola (ver en terminal en tiempo real)
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(formatter)
-console_handler.setLevel(logging.INFO)
+console_handler.setLevel(LOG_LEVEL)
+
+#------------------------------------------------------------------
+# Cola + hilo escritor: quien loguea solo encola el registro, y el
+# QueueListener hace la E/S de archivo y consola en segundo plano
+#------------------------------------------------------------------
+log_queue = queue.Queue(-1)
+queue_handler = QueueHandler(log_queue)
+listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
 
 # Evitar múltiples handlers duplicados
 if not logger.handlers:
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+    # Vaciar la cola antes de salir
+    atexit.register(listener.stop)
+
+
+class LogSampler:
+    """
+    Limita los mensajes repetitivos de un bucle (p. ej. uno por fila).
+    Registra los primeros max_per_key mensajes de cada clave, cuenta el
+    resto y al final emite una sola línea de resumen con summary().
+    """
+
+    def __init__(self, target: logging.Logger = logger, max_per_key: int = 5):
+        self.target = target
+        self.max_per_key = max_per_key
+        self.counts = Counter()
+
+    def log(self, level: int, key: str, msg: str, *args):
+        self.counts[key] += 1
+        if self.counts[key] <= self.max_per_key and self.target.isEnabledFor(level):
+            # Formato perezoso: los argumentos solo se formatean si se emite
+            self.target.log(level, msg, *args)
+
+    def debug(self, key: str, msg: str, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key: str, msg: str, *args):
+        self.log(logging.INFO, key, msg, *args)
+
+    def warning(self, key: str, msg: str, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+    def error(self, key: str, msg: str, *args):
+        self.log(logging.ERROR, key, msg, *args)
+
+    def summary(self, title: str, level: int = logging.INFO):
+
+        """Una línea con el total por clave y cuántos mensajes se omitieron"""
 
-#Forzar flush inmediato para RotatingFileHandler
-file_handler.flush = file_handler.stream.flush
+        if not self.counts:
+            return
+        suppressed = sum(max(0, count - self.max_per_key) for count in self.counts.values())
+        detail = ", ".join(f"{key}={count}" for key, count in sorted(self.counts.items()))
+        self.target.log(level, "%s: %s (%d mensajes omitidos)", title, detail, suppressed)
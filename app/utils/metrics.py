@@ -0,0 +1,374 @@
+import bisect
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.ingest_metrics import current_memory_bytes
+
+
+#-----------------------------------------------------------------------
+# Métricas en proceso con formato de texto de Prometheus.
+# Cada métrica guarda sus valores por tupla de etiquetas bajo un lock;
+# actualizar es O(1) (O(log n) en histogramas) y no hay E/S.
+#-----------------------------------------------------------------------
+
+LabelValues = Tuple[str, ...]
+
+# Buckets de latencia HTTP en segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets para la espera de conexiones del pool
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+
+    """Valor que solo crece (total de eventos)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+
+    """Valor que sube y baja; opcionalmente calculado al exportar"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        if self._callback is not None:
+            items = list(self._callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+
+    """Distribución acumulada por buckets, más suma y conteo"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # {labels: [conteos por bucket (sin acumular) + inf, suma]}
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+
+    """Conjunto de métricas exportadas por /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+#-----------------
+# HTTP
+#-----------------
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta",
+    ("method", "route", "status")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight",
+    "Peticiones HTTP en curso",
+    ("method",)
+))
+
+#-----------------
+# Pool de BD
+#-----------------
+db_pool_checkouts = registry.register(Counter(
+    "db_pool_checkouts_total",
+    "Conexiones entregadas por el pool",
+    ("engine",)
+))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_wait_seconds",
+    "Tiempo esperando una conexión del pool (sin abrir conexiones nuevas)",
+    ("engine",),
+    buckets=POOL_WAIT_BUCKETS
+))
+db_pool_connect = registry.register(Histogram(
+    "db_pool_connect_seconds",
+    "Tiempo abriendo conexiones nuevas a la BD (connect y handshake)",
+    ("engine",),
+    buckets=POOL_WAIT_BUCKETS
+))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool en uso",
+    ("engine",)
+))
+
+#-----------------
+# WebSocket
+#-----------------
+websocket_connections = registry.register(Gauge(
+    "websocket_connections",
+    "Conexiones WebSocket activas"
+))
+websocket_send_queue_depth = registry.register(Gauge(
+    "websocket_send_queue_depth",
+    "Mensajes WebSocket pendientes de enviar"
+))
+
+#-----------------
+# Cargas de Excel
+#-----------------
+upload_active_jobs = registry.register(Gauge(
+    "upload_active_jobs",
+    "Cargas de Excel procesándose en este proceso"
+))
+upload_rows = registry.register(Counter(
+    "upload_rows_total",
+    "Filas procesadas por las cargas",
+    ("result",)
+))
+upload_rows_per_second = registry.register(Gauge(
+    "upload_last_rows_per_second",
+    "Filas por segundo de la última carga terminada"
+))
+
+#-----------------
+# Caché de parseo
+#-----------------
+parse_cache_requests = registry.register(Counter(
+    "parse_cache_requests_total",
+    "Consultas a la caché de archivos parseados",
+    ("result",)
+))
+
+
+def _parse_cache_hit_ratio() -> Dict[LabelValues, float]:
+    hits = parse_cache_requests.value(result="hit")
+    misses = parse_cache_requests.value(result="miss")
+    total = hits + misses
+    return {(): hits / total if total else 0.0}
+
+
+parse_cache_hit_ratio = registry.register(Gauge(
+    "parse_cache_hit_ratio",
+    "Proporción de aciertos de la caché de parseo",
+    callback=_parse_cache_hit_ratio
+))
+
+
+#-----------------
+# Proceso
+#-----------------
+process_resident_memory = registry.register(Gauge(
+    "process_resident_memory_bytes",
+    "Memoria residente del proceso",
+    callback=lambda: {(): current_memory_bytes() or 0}
+))
+app_ready_seconds = registry.register(Gauge(
+    "app_ready_seconds",
+    "Segundos desde el arranque hasta pasar /health/ready"
+))
+data_stack_loaded = registry.register(Gauge(
+    "data_stack_loaded",
+    "1 si pandas y openpyxl ya están importados en este proceso",
+    callback=lambda: {(): float("pandas" in sys.modules and "openpyxl" in sys.modules)}
+))
+
+
+def instrument_engine(target: Engine, name: str):
+    """
+    Mide checkouts y espera del pool de un motor.
+    La espera se toma alrededor de pool.connect(), que es donde se
+    bloquea el hilo cuando el pool está agotado, descontando el tiempo
+    de abrir conexiones nuevas (entre do_connect y el evento connect del
+    pool), que va a db_pool_connect_seconds.
+    """
+    pool = target.pool
+    original_connect = pool.connect
+    # Apertura de conexiones dentro del pool.connect() en curso, por hilo
+    local = threading.local()
+
+    def timed_connect():
+        local.connect_started = None
+        local.connect_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            return original_connect()
+        finally:
+            end = time.perf_counter()
+            if local.connect_started is not None:
+                # El connect falló: el resto del tiempo fue de la conexión
+                _connect_finished(end)
+            db_pool_wait.observe(max(end - start - local.connect_seconds, 0.0), engine=name)
+            local.connect_seconds = None
+
+    def _connect_finished(now: float):
+        elapsed = now - local.connect_started
+        local.connect_started = None
+        local.connect_seconds += elapsed
+        db_pool_connect.observe(elapsed, engine=name)
+
+    pool.connect = timed_connect
+
+    @event.listens_for(target, "do_connect")
+    def _on_do_connect(dialect, conn_rec, cargs, cparams):
+        if getattr(local, "connect_seconds", None) is not None:
+            local.connect_started = time.perf_counter()
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if getattr(local, "connect_started", None) is not None:
+            _connect_finished(time.perf_counter())
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(engine=name)
+        db_pool_checked_out.inc(engine=name)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        db_pool_checked_out.dec(engine=name)
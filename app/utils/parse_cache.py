@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Tuple
+from app.utils.logger_config import logger
+from app.utils.lazy_imports import pd, np
+from app.utils.validation_rules import ValidationResult, current_plan
+from app.utils import metrics as app_metrics
+
+
+#-------------------------------------------------------------------------
+# Caché en proceso de archivos ya parseados, para paginar el preview sin
+# volver a leer el Excel. La clave es el SHA-256 del contenido (o
+# "session:<id>" en la carga por partes), así que enviar el mismo archivo
+# a /preview y luego a /upload parsea una sola vez. Con varios workers
+# cada uno tiene su caché: un fallo solo significa volver a parsear.
+#-------------------------------------------------------------------------
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "8"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_MB", "512")) * 1024 * 1024
+PARSE_CACHE_TTL_SECONDS = float(os.getenv("PARSE_CACHE_TTL_SECONDS", "1800"))
+
+
+def content_key(source: BinaryIO) -> str:
+
+    """SHA-256 del archivo leyendo por bloques (deja el puntero al inicio)"""
+
+    digest = hashlib.sha256()
+    source.seek(0)
+    for block in iter(lambda: source.read(1024 * 1024), b""):
+        digest.update(block)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+class ParsedFile:
+    """
+    DataFrame parseado y su validación. La validación se recalcula solo
+    si cambió el conjunto de reglas; las posiciones de filas inválidas
+    quedan precalculadas para filtrar "solo errores" sin recorrer.
+    """
+
+    def __init__(self, key: str, filename: str, df: "pd.DataFrame", parse_seconds: float):
+        self.key = key
+        self.filename = filename
+        self.df = df
+        self.parse_seconds = parse_seconds
+        self.size_bytes = int(df.memory_usage(index=True, deep=True).sum())
+        self.created_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._plan = None
+        self._validation: Optional[ValidationResult] = None
+        self._invalid_positions: Optional["np.ndarray"] = None
+
+    def validation(self) -> Tuple[ValidationResult, "np.ndarray"]:
+        plan = current_plan()
+        with self._lock:
+            if self._plan is not plan:
+                self._validation = plan.evaluate(self.df)
+                self._invalid_positions = np.flatnonzero(~self._validation.valid)
+                self._plan = plan
+            return self._validation, self._invalid_positions
+
+    def page(self, offset: int, limit: int, errors_only: bool = False) -> Tuple["np.ndarray", int]:
+
+        """(posiciones de la página, filas que cumplen el filtro)"""
+
+        if errors_only:
+            _, invalid_positions = self.validation()
+            return invalid_positions[offset:offset + limit], len(invalid_positions)
+        total = len(self.df)
+        return np.arange(min(offset, total), min(offset + limit, total)), total
+
+
+class ParseCache:
+
+    """LRU acotado por cantidad de entradas, memoria estimada y TTL"""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, ParsedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ParsedFile]:
+
+        """Entrada vigente o None; cuenta el acierto/fallo en /metrics"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        app_metrics.parse_cache_requests.inc(result="hit" if entry is not None else "miss")
+        return entry
+
+    def put(self, key: str, filename: str, df: "pd.DataFrame", parse_seconds: float) -> ParsedFile:
+        entry = ParsedFile(key, filename, df, parse_seconds)
+        if self.max_entries <= 0 or entry.size_bytes > self.max_bytes:
+            # Demasiado grande para cachear: se usa solo en esta petición
+            return entry
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            used = sum(item.size_bytes for item in self._entries.values())
+            while len(self._entries) > self.max_entries or used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                used -= evicted.size_bytes
+                logger.debug(f"Archivo parseado expulsado de la caché: {evicted.filename}")
+        return entry
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+parse_cache = ParseCache(PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_MAX_BYTES, PARSE_CACHE_TTL_SECONDS)
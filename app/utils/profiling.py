@@ -0,0 +1,279 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import Request
+from app.utils.logger_config import logger
+
+
+#-------------------------------------------------------------------------
+# Perfilado bajo demanda. Solo se activa si PROFILE_TOKEN está configurado;
+# sin token el middleware ni siquiera se registra (costo cero).
+#-------------------------------------------------------------------------
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Perfiles que se conservan (un .prof y su resumen .txt cuentan como uno)
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+ENABLED = bool(PROFILE_TOKEN)
+
+PROFILE_HEADER = "X-Profile"
+TOKEN_HEADER = "X-Profile-Token"
+PROFILE_QUERY = "_profile"
+
+# Intervalo del muestreador de pilas (segundos)
+SAMPLE_INTERVAL = 0.005
+
+# Un solo perfil a la vez en el proceso: dos perfiles simultáneos se
+# mezclarían en el muestreador y cProfile no admite dos activos por hilo
+_busy = threading.Lock()
+
+# Ingestas en curso en este proceso que se pueden perfilar por upload_id
+_ingests: Dict[int, "IngestProfile"] = {}
+_ingests_lock = threading.Lock()
+_current = threading.local()
+
+
+def token_is_valid(request: Request) -> bool:
+
+    """Compara X-Profile-Token con PROFILE_TOKEN en tiempo constante"""
+
+    token = request.headers.get(TOKEN_HEADER, "")
+    return ENABLED and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def is_requested(request: Request) -> bool:
+    """
+    Si la petición pide perfilarse (cabecera X-Profile o ?_profile=1).
+    Exige el token de administración en la cabecera X-Profile-Token.
+    """
+    if not ENABLED:
+        return False
+
+    if not (request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY)):
+        return False
+
+    if not token_is_valid(request):
+        logger.warning("Perfilado solicitado con token inválido en %s", request.url.path)
+        return False
+    return True
+
+
+def try_begin() -> bool:
+
+    """Reserva el perfilador; False si ya hay un perfil en curso"""
+
+    return _busy.acquire(blocking=False)
+
+
+def end():
+    _busy.release()
+
+
+def _output_path(prefix: str, extension: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    safe_prefix = "".join(c if c.isalnum() or c in "-_" else "_" for c in prefix)[:80]
+    return os.path.join(PROFILE_DIR, f"{stamp}_{safe_prefix}.{extension}")
+
+
+def _prune():
+    """
+    Mantiene solo los PROFILE_MAX_FILES perfiles más recientes. Un perfil
+    de cProfile son dos archivos (.prof y .txt) con el mismo nombre base,
+    que se cuentan y se borran juntos.
+    """
+    profiles: Dict[str, List[str]] = {}
+    try:
+        for name in os.listdir(PROFILE_DIR):
+            # El prefijo saneado no tiene puntos: lo anterior al primero es el nombre base
+            profiles.setdefault(name.split(".", 1)[0], []).append(os.path.join(PROFILE_DIR, name))
+        newest_first = sorted(
+            profiles.values(),
+            key=lambda paths: max(os.path.getmtime(path) for path in paths),
+            reverse=True
+        )
+    except OSError:
+        return
+    for paths in newest_first[PROFILE_MAX_FILES:]:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class StackSampler:
+    """
+    Muestreador de pilas de todos los hilos (incluido el threadpool donde
+    corren los endpoints síncronos). Produce pilas colapsadas compatibles
+    con flamegraph.pl y speedscope: "hilo;marco;marco cuenta". Ve también
+    el trabajo de otras peticiones concurrentes; el nombre del hilo en la
+    raíz de cada pila ayuda a separarlo.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                # Los hilos ociosos del pool no aportan información
+                if stack and not stack[0].startswith(("wait ", "_wait_for_tstate_lock", "select ")):
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _dump_cprofile(profiler: cProfile.Profile, path: str):
+
+    """Guarda el .prof (para snakeviz/pstats) y un resumen legible al lado"""
+
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+
+
+class RequestProfile:
+    """
+    Perfil de una petición HTTP con el muestreador de pilas. cProfile no
+    sirve aquí: solo vería el hilo del event loop (con las corrutinas de
+    otras peticiones) y no el threadpool donde corren los endpoints.
+    Quien lo usa debe tener reservado el perfilador (try_begin).
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.path: Optional[str] = None
+        self._sampler = StackSampler()
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> str:
+
+        """Detiene el muestreo y escribe el archivo (bloqueante: llamar fuera del loop)"""
+
+        elapsed = time.perf_counter() - self._started
+        try:
+            self._sampler.stop()
+            self.path = _output_path(self.label, "collapsed.txt")
+            self._sampler.dump(self.path)
+        finally:
+            _prune()
+        logger.info("Perfil de %s (%.3fs) guardado en %s", self.label, elapsed, self.path)
+        return self.path
+
+
+class IngestProfile:
+    """
+    Perfil con cProfile de una ingesta en segundo plano. La ingesta corre
+    en un solo hilo, así que el perfil es completo desde que empieza: al
+    inicio si se pidió al subir el archivo, o desde el siguiente bloque si
+    se pidió después por upload_id (request_ingest_profile).
+    """
+
+    def __init__(self, upload_id: int, requested: bool):
+        self.upload_id = upload_id
+        self.requested = requested
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def checkpoint(self):
+        # Si otro perfil ocupa el perfilador se reintenta en el siguiente bloque
+        if self.requested and self._profiler is None and try_begin():
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finish(self):
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        path = _output_path(f"ingest_{self.upload_id}", "prof")
+        try:
+            _dump_cprofile(self._profiler, path)
+            logger.info("Perfil de la carga %s guardado en %s", self.upload_id, path)
+        finally:
+            end()
+            _prune()
+
+
+@contextmanager
+def profile_ingest(upload_id: int, requested: bool):
+    """
+    Registra la ingesta para poder perfilarla por upload_id y la perfila
+    desde el inicio si requested. Sin PROFILE_TOKEN no hace nada.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    profile = IngestProfile(upload_id, requested)
+    with _ingests_lock:
+        _ingests[upload_id] = profile
+    _current.ingest = profile
+    try:
+        profile.checkpoint()
+        yield
+    finally:
+        _current.ingest = None
+        with _ingests_lock:
+            _ingests.pop(upload_id, None)
+        profile.finish()
+
+
+def checkpoint():
+
+    """Llamado entre bloques de la ingesta: empieza el perfil si se pidió"""
+
+    profile = getattr(_current, "ingest", None)
+    if profile is not None:
+        profile.checkpoint()
+
+
+def request_ingest_profile(upload_id: int) -> bool:
+
+    """Pide perfilar una ingesta en curso en este proceso; False si no corre aquí"""
+
+    with _ingests_lock:
+        profile = _ingests.get(upload_id)
+    if profile is None:
+        return False
+    profile.requested = True
+    return True
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from app.database import Base, engine
+from app.utils.logger_config import logger
+from app.utils import lazy_imports
+from app.utils.metrics import app_ready_seconds
+
+
+#-------------------------------------------------------------------
+# Configuración del arranque
+#-------------------------------------------------------------------
+# Reintentos de conexión (MySQL puede tardar en levantar con compose)
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "30"))
+DB_CONNECT_RETRY_DELAY = float(os.getenv("DB_CONNECT_RETRY_DELAY", "2"))
+
+# Solo desarrollo: crear tablas con create_all en lugar de exigir migraciones
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "false").lower() in ("1", "true", "yes")
+
+# Conexiones que se abren al arrancar para no pagarlas en la primera petición
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "5"))
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "alembic.ini")
+
+
+class Readiness:
+    """
+    Estado de arranque del proceso. /health/ready responde 200 solo
+    cuando todas las verificaciones pasaron.
+    """
+
+    CHECKS = ("database", "schema", "pool")
+
+    def __init__(self):
+        self.checks: Dict[str, bool] = {name: False for name in self.CHECKS}
+        self.details: Dict[str, str] = {name: "pendiente" for name in self.CHECKS}
+        self.started_at = time.monotonic()
+        self.ready_after: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark(self, name: str, ok: bool, detail: str):
+        with self._lock:
+            self.checks[name] = ok
+            self.details[name] = detail
+            if self.ready_after is None and all(self.checks.values()):
+                self.ready_after = time.monotonic() - self.started_at
+                app_ready_seconds.set(self.ready_after)
+                logger.info(f"Aplicación lista en {self.ready_after:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        return all(self.checks.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {"ok": self.checks[name], "detail": self.details[name]}
+                for name in self.CHECKS
+            }
+
+
+readiness = Readiness()
+
+
+def ping_database() -> None:
+
+    """SELECT 1 sobre el primario; lanza excepción si no hay conexión"""
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def wait_for_database() -> bool:
+
+    """Reintenta la conexión sin bloquear el event loop"""
+
+    for attempt in range(1, DB_CONNECT_RETRIES + 1):
+        try:
+            await run_in_threadpool(ping_database)
+            readiness.mark("database", True, "conectada")
+            logger.info("Conexión de base de datos exitosa")
+            return True
+        except Exception as e:
+            readiness.mark("database", False, f"intento {attempt}/{DB_CONNECT_RETRIES}: {e}")
+            if attempt < DB_CONNECT_RETRIES:
+                logger.warning(f"Intento {attempt}/{DB_CONNECT_RETRIES}: "
+                               f"Espera que MySQL esté lista... (reintentando en {DB_CONNECT_RETRY_DELAY}s)")
+                await asyncio.sleep(DB_CONNECT_RETRY_DELAY)
+
+    logger.error(f"No se pudo conectar a la base de datos despues de {DB_CONNECT_RETRIES} intentos")
+    return False
+
+
+def alembic_config():
+
+    """Config de Alembic del proyecto, válida desde cualquier directorio de trabajo"""
+
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic"))
+    return config
+
+
+def _alembic_heads() -> List[str]:
+    from alembic.script import ScriptDirectory
+
+    return list(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def _database_revisions() -> List[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as conn:
+        return list(MigrationContext.configure(conn).get_current_heads())
+
+
+def check_schema() -> tuple:
+    """
+    Compara la revisión de Alembic de la base con la del código.
+    Con DB_CREATE_ALL crea las tablas faltantes y no exige la revisión.
+    """
+    if DB_CREATE_ALL:
+        Base.metadata.create_all(bind=engine)
+        return True, "create_all (DB_CREATE_ALL activo)"
+
+    expected = sorted(_alembic_heads())
+    current = sorted(_database_revisions())
+    if current == expected:
+        return True, f"revisión {', '.join(current)}"
+    return False, (
+        f"revisión de la base {current or 'ninguna'} distinta de {expected}; "
+        f"ejecuta 'alembic upgrade head'"
+    )
+
+
+def prewarm_pool(size: int) -> int:
+
+    """Abre size conexiones a la vez y las devuelve al pool"""
+
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def initialize():
+
+    """Verificaciones de arranque; corre como tarea de fondo"""
+
+    if not await wait_for_database():
+        return
+
+    try:
+        ok, detail = await run_in_threadpool(check_schema)
+    except Exception as e:
+        ok, detail = False, f"error verificando esquema: {e}"
+    readiness.mark("schema", ok, detail)
+    if ok:
+        logger.info(f"Esquema: {detail}")
+    else:
+        logger.error(f"Esquema: {detail}")
+
+    # Sin límite de pool (p. ej. SQLite en memoria) se abre al menos una
+    pool_size = getattr(engine.pool, "size", lambda: DB_POOL_PREWARM)()
+    target = max(1, min(DB_POOL_PREWARM, pool_size))
+    try:
+        opened = await run_in_threadpool(prewarm_pool, target)
+        readiness.mark("pool", True, f"{opened} conexiones precalentadas")
+    except Exception as e:
+        readiness.mark("pool", False, f"error precalentando: {e}")
+        logger.error(f"Error precalentando el pool: {str(e)}")
+    
+    # Ya listos para tráfico: cargar pandas/openpyxl sin retrasar la readiness
+    if lazy_imports.DATA_STACK_WARMUP:
+        try:
+            await run_in_threadpool(lazy_imports.warm_up)
+        except Exception as e:
+            logger.error(f"Error precargando la pila de datos: {str(e)}")
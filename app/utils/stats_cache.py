@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from typing import Any, Optional
+from app.utils.logger_config import logger
+
+
+class StatsCache:
+    """
+    Caché en memoria de vida corta para respuestas de estadísticas. Cada
+    valor guarda la versión del recurso (la del ETag) con la que se
+    calculó y solo se sirve a peticiones que leyeron esa misma versión.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._version: Optional[int] = None
+        self._value: Optional[Any] = None
+        self._expires_at = 0.0
+
+        #--------------------------------------------------------------
+        # Los background tasks corren en el threadpool, por eso el lock
+        #--------------------------------------------------------------
+        self._lock = threading.Lock()
+
+    def get(self, version: int) -> Optional[Any]:
+
+        """Devuelve el valor cacheado para esa versión o None si expiró"""
+
+        with self._lock:
+            if (
+                self._value is not None
+                and self._version == version
+                and time.monotonic() < self._expires_at
+            ):
+                return self._value
+            return None
+
+    def set(self, version: int, value: Any):
+        """
+        Guarda el valor durante ttl_seconds. Una petición que leyó una
+        versión anterior no reemplaza un valor más nuevo.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if self._value is not None and self._version is not None and self._version > version:
+                return
+            self._version = version
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def invalidate(self):
+
+        """Descarta el valor cacheado (p. ej. al terminar una carga)"""
+
+        with self._lock:
+            self._version = None
+            self._value = None
+            self._expires_at = 0.0
+        logger.debug("Caché de estadísticas invalidada")
+
+
+# TTL en segundos (0 desactiva la caché)
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "5"))
+
+stats_cache = StatsCache(STATS_CACHE_TTL)
@@ -0,0 +1,79 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models import ExcelUploadLog, UploadStatusEnum
+
+
+#-------------------------------------------------------------------------
+# Cancelación de cargas en curso. POST /uploads/{id}/cancel guarda
+# cancel_requested_at en el log (lo ve cualquier worker) y, si la ingesta
+# corre en este proceso, activa su evento. La ingesta consulta ambos
+# antes de cada bloque y antes del commit de cada tramo: un tramo sin
+# confirmar se descarta, los ya confirmados se quedan. Si la cancelación
+# llega después del último commit, la carga termina como "completed".
+#-------------------------------------------------------------------------
+_events: Dict[int, threading.Event] = {}
+_lock = threading.Lock()
+
+
+class UploadCancelled(Exception):
+
+    """La ingesta se detuvo porque se pidió cancelar la carga"""
+
+
+def register(upload_id: int) -> threading.Event:
+
+    """Evento de cancelación de una ingesta que empieza en este proceso"""
+
+    with _lock:
+        return _events.setdefault(upload_id, threading.Event())
+
+
+def unregister(upload_id: int):
+    with _lock:
+        _events.pop(upload_id, None)
+
+
+def request_cancel(db: Session, upload_id: int) -> bool:
+    """
+    Marca la carga para cancelar si sigue en curso. Retorna False si ya
+    terminó (o ya estaba marcada); la marca se confirma en la BD.
+    """
+    marked = db.execute(
+        update(ExcelUploadLog)
+        .where(
+            ExcelUploadLog.id == upload_id,
+            ExcelUploadLog.status.in_((UploadStatusEnum.PENDING, UploadStatusEnum.PROCESSING)),
+            ExcelUploadLog.cancel_requested_at.is_(None)
+        )
+        .values(cancel_requested_at=datetime.now(timezone.utc))
+    ).rowcount
+    db.commit()
+
+    with _lock:
+        event = _events.get(upload_id)
+    if event is not None:
+        event.set()
+    return bool(marked)
+
+
+def is_requested(db: Session, upload_id: int, lock: bool = False) -> bool:
+    """
+    Si se pidió cancelar: evento local o, desde otro worker, la marca en
+    la BD. Con lock la marca se lee con bloqueo compartido (la última
+    confirmada, no la foto de la transacción) y el UPDATE de
+    request_cancel espera al commit del tramo: o la cancelación se ve
+    antes del commit, o el tramo ya quedó confirmado.
+    """
+    with _lock:
+        event = _events.get(upload_id)
+    if event is not None and event.is_set():
+        return True
+
+    # Una consulta por clave primaria, dentro de la transacción del tramo
+    statement = select(ExcelUploadLog.cancel_requested_at).where(ExcelUploadLog.id == upload_id)
+    if lock:
+        statement = statement.with_for_update(read=True)
+    return db.scalar(statement) is not None
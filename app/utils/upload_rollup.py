@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models import ExcelUploadLog, UploadStatsRollup, UploadStatusEnum
+from app.utils.logger_config import logger
+
+
+GRANULARITIES = ("hour", "day")
+
+# Estados que cuentan como carga terminada
+FINAL_STATUSES = (UploadStatusEnum.COMPLETED, UploadStatusEnum.FAILED, UploadStatusEnum.CANCELLED)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+
+    """Trunca una fecha al inicio de su intervalo (hora o día)"""
+
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidad inválida: {granularity}")
+
+    # Se guarda sin zona horaria, igual que uploaded_at en MySQL
+    moment = moment.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def apply_upload(
+    db: Session,
+    uploaded_at: datetime,
+    total_rows: int,
+    successful_rows: int,
+    failed_rows: int
+):
+    """
+    Suma una carga terminada a los rollups de hora y día.
+    No hace commit: se confirma junto con el log de la carga.
+    """
+    uploaded_at = uploaded_at or datetime.now()
+
+    for granularity in GRANULARITIES:
+        start = bucket_start(uploaded_at, granularity)
+        values = {
+            UploadStatsRollup.uploads: UploadStatsRollup.uploads + 1,
+            UploadStatsRollup.total_rows: UploadStatsRollup.total_rows + (total_rows or 0),
+            UploadStatsRollup.successful_rows: UploadStatsRollup.successful_rows + (successful_rows or 0),
+            UploadStatsRollup.failed_rows: UploadStatsRollup.failed_rows + (failed_rows or 0),
+        }
+
+        updated = db.query(UploadStatsRollup).filter(
+            UploadStatsRollup.granularity == granularity,
+            UploadStatsRollup.bucket_start == start
+        ).update(values, synchronize_session=False)
+
+        if updated:
+            continue
+
+        #---------------------------------------------------------------
+        # Primer registro del intervalo. Si otro worker lo crea al mismo
+        # tiempo, el savepoint falla y se repite el UPDATE.
+        #---------------------------------------------------------------
+        try:
+            with db.begin_nested():
+                db.add(UploadStatsRollup(
+                    granularity=granularity,
+                    bucket_start=start,
+                    uploads=1,
+                    total_rows=total_rows or 0,
+                    successful_rows=successful_rows or 0,
+                    failed_rows=failed_rows or 0
+                ))
+        except IntegrityError:
+            db.query(UploadStatsRollup).filter(
+                UploadStatsRollup.granularity == granularity,
+                UploadStatsRollup.bucket_start == start
+            ).update(values, synchronize_session=False)
+
+
+def backfill(db: Session, batch_size: int = 1000) -> int:
+    """
+    Reconstruye los rollups a partir de excel_upload_logs.
+    Devuelve el número de cargas procesadas.
+    """
+    totals: Dict[Tuple[str, datetime], List[int]] = {}
+    processed = 0
+
+    rows = (
+        db.query(
+            ExcelUploadLog.uploaded_at,
+            ExcelUploadLog.total_rows,
+            ExcelUploadLog.successful_rows,
+            ExcelUploadLog.failed_rows
+        )
+        .filter(ExcelUploadLog.status.in_(FINAL_STATUSES))
+        .yield_per(batch_size)
+    )
+
+    for uploaded_at, total_rows, successful_rows, failed_rows in rows:
+        processed += 1
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(uploaded_at or datetime.now(), granularity))
+            acc = totals.setdefault(key, [0, 0, 0, 0])
+            acc[0] += 1
+            acc[1] += total_rows or 0
+            acc[2] += successful_rows or 0
+            acc[3] += failed_rows or 0
+
+    try:
+        db.query(UploadStatsRollup).delete(synchronize_session=False)
+        db.bulk_insert_mappings(UploadStatsRollup, [
+            {
+                "granularity": granularity,
+                "bucket_start": start,
+                "uploads": acc[0],
+                "total_rows": acc[1],
+                "successful_rows": acc[2],
+                "failed_rows": acc[3],
+            }
+            for (granularity, start), acc in totals.items()
+        ])
+        db.commit()
+    except Exception as e:
+        logger.error(f"Error al reconstruir rollups: {str(e)}")
+        db.rollback()
+        raise
+
+    logger.info(f"Rollups reconstruidos: {processed} cargas, {len(totals)} intervalos")
+    return processed
+
+
+def get_history(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    granularity: str
+) -> List[UploadStatsRollup]:
+    """
+    Obtiene los intervalos del rango [start, end] ordenados por fecha.
+    Solo lee la tabla de rollups, nunca excel_upload_logs.
+    """
+    return (
+        db.query(UploadStatsRollup)
+        .filter(
+            UploadStatsRollup.granularity == granularity,
+            UploadStatsRollup.bucket_start >= bucket_start(start, granularity),
+            UploadStatsRollup.bucket_start <= end.replace(tzinfo=None)
+        )
+        .order_by(UploadStatsRollup.bucket_start)
+        .all()
+    )
+
+
+# Máximo de intervalos por consulta, para acotar el costo del endpoint
+MAX_BUCKETS = {"hour": 24 * 93, "day": 3660}
+
+
+def max_range(granularity: str) -> timedelta:
+
+    """Rango máximo permitido para una granularidad"""
+
+    if granularity == "hour":
+        return timedelta(hours=MAX_BUCKETS["hour"])
+    return timedelta(days=MAX_BUCKETS["day"])
@@ -0,0 +1,105 @@
+import csv
+import io
+import os
+import tempfile
+from typing import Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from app.models import User
+from app.utils.logger_config import logger
+
+
+EXPORT_HEADERS = ["ID", "Nombre", "Email", "Activo"]
+
+# Filas que se traen de la BD por vuelta del cursor
+EXPORT_BATCH_SIZE = 2000
+
+# Tamaño de cada bloque enviado al cliente
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Límite de filas por hoja de Excel (1.048.576 menos el encabezado)
+XLSX_MAX_ROWS_PER_SHEET = 1_048_575
+
+
+def _iter_user_rows(session_factory: sessionmaker) -> Iterator[tuple]:
+    """
+    Recorre los usuarios con un cursor del lado del servidor (yield_per).
+    La sesión es propia del generador: vive mientras dura la respuesta.
+    """
+    db = session_factory()
+    try:
+        stmt = (
+            select(User.id, User.name, User.email, User.is_active)
+            .order_by(User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in db.execute(stmt):
+            yield tuple(row)
+    finally:
+        db.close()
+
+
+def iter_users_csv(session_factory: sessionmaker) -> Iterator[bytes]:
+
+    """Genera el CSV de usuarios en bloques de ~64 KB"""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM para que Excel detecte UTF-8 (tildes y ñ)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADERS)
+
+    exported = 0
+    for row in _iter_user_rows(session_factory):
+        writer.writerow(row)
+        exported += 1
+        if buffer.tell() >= STREAM_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue().encode("utf-8")
+    logger.info(f"Exportación CSV completada: {exported} usuarios")
+
+
+def iter_users_xlsx(session_factory: sessionmaker) -> Iterator[bytes]:
+    """
+    Genera el XLSX con openpyxl en modo write-only: las filas se escriben
+    a disco a medida que llegan y el archivo final se envía por bloques
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet_number = 1
+    sheet = workbook.create_sheet("usuarios")
+    sheet.append(EXPORT_HEADERS)
+    rows_in_sheet = 0
+    exported = 0
+
+    for row in _iter_user_rows(session_factory):
+        if rows_in_sheet >= XLSX_MAX_ROWS_PER_SHEET:
+            sheet_number += 1
+            sheet = workbook.create_sheet(f"usuarios_{sheet_number}")
+            sheet.append(EXPORT_HEADERS)
+            rows_in_sheet = 0
+        sheet.append(list(row))
+        rows_in_sheet += 1
+        exported += 1
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        logger.info(f"Exportación XLSX completada: {exported} usuarios")
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.error(f"No se pudo eliminar el archivo temporal {path}: {str(e)}")
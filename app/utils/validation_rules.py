@@ -0,0 +1,380 @@
+import copy
+import json
+import numbers
+import os
+import re
+import subprocess
+import sys
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.utils.logger_config import logger
+from app.utils.lazy_imports import pd, np
+
+
+#-------------------------------------------------------------------------
+# Reglas de validación declarativas. Un conjunto de reglas (JSON) se
+# compila una vez a un plan de chequeos por columna; evaluar el plan
+# sobre un DataFrame hace una operación vectorizada por regla y deja
+# los errores de cada fila como bits de un entero (un bit por regla).
+#-------------------------------------------------------------------------
+
+# Archivo del conjunto de reglas; si no existe se usan DEFAULT_RULE_SET
+VALIDATION_RULES_FILE = os.getenv("VALIDATION_RULES_FILE", "config/validation_rules.json")
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+# Reglas equivalentes a las validaciones originales de ExcelProcessor
+DEFAULT_RULE_SET = {
+    "lowercase": ["email"],
+    "rules": [
+        {"code": "name_required", "column": "name", "check": "required", "message": "Nombre invalido"},
+        {"code": "name_too_short", "column": "name", "check": "min_length", "value": 2, "message": "Nombre invalido"},
+        {"code": "name_numeric", "column": "name", "check": "not_numeric", "message": "Nombre invalido"},
+        {"code": "email_required", "column": "email", "check": "required", "message": "Email invalido"},
+        {"code": "email_format", "column": "email", "check": "pattern", "value": EMAIL_PATTERN, "message": "Email invalido"},
+    ],
+}
+
+# Chequeos disponibles y si exigen "value"
+CHECKS = {
+    "required": False,
+    "min_length": True,
+    "max_length": True,
+    "pattern": True,
+    "not_numeric": False,
+    "allowed_domains": True,
+    "blocked_domains": True,
+    "one_of": True,
+}
+
+# Columnas que la ingesta necesita limpias aunque no tengan reglas
+VALUE_COLUMNS = ("name", "email")
+
+# Un bit por regla en un uint64
+MAX_RULES = 64
+
+# Expresiones de las reglas "pattern": largo máximo y tiempo de la prueba
+# previa contra textos que disparan el backtracking catastrófico
+RULE_PATTERN_MAX_LENGTH = int(os.getenv("RULE_PATTERN_MAX_LENGTH", "200"))
+RULE_PATTERN_TIMEOUT_SECONDS = float(os.getenv("RULE_PATTERN_TIMEOUT_SECONDS", "1"))
+PATTERN_PROBE_LENGTH = 64
+
+# Expresiones propias del código, que no hace falta probar
+_TRUSTED_PATTERNS = {EMAIL_PATTERN}
+
+_PATTERN_PROBE = """
+import re, sys
+regex = re.compile(sys.stdin.read())
+chars = set("aA0 .-_@,") | {c for c in regex.pattern if c.isprintable()}
+for char in chars:
+    for tail in ("", "!", "\\x00"):
+        regex.search(char * %d + tail)
+"""
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def numeric_cells(raw: "pd.Series") -> "np.ndarray":
+    """
+    Celdas que llegaron como número y no como texto. Junto con
+    str.isdigit() reproduce la validación original del nombre (no ser
+    texto, o ser texto de solo dígitos): "12.5" escrito como texto pasa.
+    """
+    if pd.api.types.is_bool_dtype(raw.dtype):
+        return np.zeros(len(raw), dtype=bool)
+    if pd.api.types.is_numeric_dtype(raw.dtype):
+        return np.ones(len(raw), dtype=bool)
+    return raw.map(_is_number).to_numpy(dtype=bool)
+
+
+class ValidationResult:
+    """
+    Resultado vectorizado de un plan sobre un DataFrame.
+    - errors: uint64 por fila, bit i = la fila viola la regla i
+    - valid: bool por fila
+    - values: columnas limpias (texto sin espacios, minúsculas donde aplique)
+    """
+
+    def __init__(self, plan: "ValidationPlan", errors: "np.ndarray", values: Dict[str, "np.ndarray"]):
+        self.plan = plan
+        self.errors = errors
+        self.valid = errors == 0
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    @property
+    def valid_count(self) -> int:
+        return int(self.valid.sum())
+
+    @property
+    def invalid_count(self) -> int:
+        return len(self) - self.valid_count
+
+    def violation_counts(self) -> Dict[str, int]:
+
+        """Filas que violan cada regla, por código"""
+
+        return {
+            rule["code"]: int(np.count_nonzero(self.errors & np.uint64(1 << bit)))
+            for bit, rule in enumerate(self.plan.rules)
+        }
+
+    def codes_for(self, position: int) -> List[str]:
+        mask = int(self.errors[position])
+        return [rule["code"] for bit, rule in enumerate(self.plan.rules) if mask >> bit & 1]
+
+    def messages_for(self, position: int) -> List[str]:
+
+        """Mensajes de la fila sin repetir (varias reglas pueden compartir mensaje)"""
+
+        mask = int(self.errors[position])
+        messages = []
+        for bit, rule in enumerate(self.plan.rules):
+            if mask >> bit & 1 and rule["message"] not in messages:
+                messages.append(rule["message"])
+        return messages
+
+
+class ValidationPlan:
+
+    """Conjunto de reglas validado y compilado; se reutiliza entre cargas"""
+
+    def __init__(self, rule_set: Dict[str, Any]):
+        self.rule_set = rule_set
+        self.lowercase = set(rule_set.get("lowercase", []))
+        self.rules = [dict(rule) for rule in rule_set["rules"]]
+        self.columns = list(dict.fromkeys([*VALUE_COLUMNS, *(rule["column"] for rule in self.rules)]))
+        self._checks = [self._compile(rule) for rule in self.rules]
+
+    @staticmethod
+    def _compile(rule: Dict[str, Any]):
+
+        """Función (texto, presente, original) -> máscara de filas que violan la regla"""
+
+        check = rule["check"]
+        value = rule.get("value")
+
+        if check == "required":
+            return lambda text, present, raw: ~present | (text == "")
+        if check == "min_length":
+            return lambda text, present, raw: present & (text.str.len() < value)
+        if check == "max_length":
+            return lambda text, present, raw: present & (text.str.len() > value)
+        if check == "pattern":
+            regex = re.compile(value)
+            return lambda text, present, raw: present & ~text.str.match(regex, na=False)
+        if check == "not_numeric":
+            return lambda text, present, raw: present & (numeric_cells(raw) | text.str.isdigit())
+        if check in ("allowed_domains", "blocked_domains"):
+            # Un solo regex por regla: "@dominio" o ".dominio" (subdominios) al final
+            domains = "|".join(re.escape(domain.lower().lstrip("@")) for domain in value)
+            regex = re.compile(rf"[@.](?:{domains})$", re.IGNORECASE)
+            if check == "allowed_domains":
+                return lambda text, present, raw: present & ~text.str.contains(regex, na=False)
+            return lambda text, present, raw: present & text.str.contains(regex, na=False)
+        if check == "one_of":
+            allowed = {str(item) for item in value}
+            return lambda text, present, raw: present & ~text.isin(allowed)
+        raise ValueError(f"Chequeo desconocido: {check}")
+
+    def _prepare(self, df: "pd.DataFrame", column: str):
+
+        """(texto limpio, presente, columna original) de una columna; si falta, todo ausente"""
+
+        if column not in df.columns:
+            text = pd.Series([""] * len(df), index=df.index, dtype=object)
+            return text, np.zeros(len(df), dtype=bool), text
+
+        raw = df[column]
+        present = raw.notna().to_numpy()
+        text = raw.where(present, "").astype(str).str.strip()
+        if column in self.lowercase:
+            text = text.str.lower()
+        return text, present, raw
+
+    def evaluate(self, df: "pd.DataFrame") -> ValidationResult:
+        errors = np.zeros(len(df), dtype=np.uint64)
+        prepared = {column: self._prepare(df, column) for column in self.columns}
+
+        for bit, (rule, check) in enumerate(zip(self.rules, self._checks)):
+            mask = np.asarray(check(*prepared[rule["column"]]), dtype=bool)
+            errors[mask] |= np.uint64(1 << bit)
+
+        values = {column: text.to_numpy(dtype=object) for column, (text, _, _) in prepared.items()}
+        return ValidationResult(self, errors, values)
+
+
+@lru_cache(maxsize=64)
+def _pattern_is_slow(pattern: str) -> bool:
+    """
+    Prueba la expresión en un subproceso (re no admite timeout y un hilo
+    atascado en backtracking no se puede interrumpir) contra textos
+    largos de un mismo carácter. True si no termina a tiempo.
+    """
+    try:
+        subprocess.run(
+            [sys.executable, "-I", "-S", "-c", _PATTERN_PROBE % PATTERN_PROBE_LENGTH],
+            input=pattern, text=True, capture_output=True, check=False,
+            timeout=RULE_PATTERN_TIMEOUT_SECONDS
+        )
+    except subprocess.TimeoutExpired:
+        return True
+    return False
+
+
+def _check_pattern(position: int, pattern: Any):
+    if not isinstance(pattern, str):
+        raise ValueError(f"Regla {position}: 'pattern' requiere un texto")
+    if len(pattern) > RULE_PATTERN_MAX_LENGTH:
+        raise ValueError(f"Regla {position}: la expresión regular supera {RULE_PATTERN_MAX_LENGTH} caracteres")
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Regla {position}: expresión regular inválida ({e})")
+    if pattern not in _TRUSTED_PATTERNS and _pattern_is_slow(pattern):
+        raise ValueError(
+            f"Regla {position}: la expresión regular tarda más de "
+            f"{RULE_PATTERN_TIMEOUT_SECONDS:g}s con textos repetitivos (backtracking)"
+        )
+
+
+def normalize_rule_set(rule_set: Dict[str, Any]) -> Dict[str, Any]:
+
+    """Valida la estructura y completa códigos y mensajes; lanza ValueError"""
+
+    if not isinstance(rule_set, dict) or not isinstance(rule_set.get("rules"), list):
+        raise ValueError("El conjunto de reglas debe tener una lista 'rules'")
+    if len(rule_set["rules"]) > MAX_RULES:
+        raise ValueError(f"Máximo {MAX_RULES} reglas")
+
+    normalized = {"lowercase": list(rule_set.get("lowercase", [])), "rules": []}
+    codes = set()
+    for position, rule in enumerate(rule_set["rules"]):
+        if not isinstance(rule, dict) or not rule.get("column") or rule.get("check") not in CHECKS:
+            raise ValueError(f"Regla {position}: requiere 'column' y 'check' ({', '.join(CHECKS)})")
+        check = rule["check"]
+        if CHECKS[check] and rule.get("value") is None:
+            raise ValueError(f"Regla {position}: '{check}' requiere 'value'")
+        if check in ("min_length", "max_length") and not isinstance(rule["value"], int):
+            raise ValueError(f"Regla {position}: '{check}' requiere un entero")
+        if check in ("allowed_domains", "blocked_domains", "one_of") and not isinstance(rule["value"], list):
+            raise ValueError(f"Regla {position}: '{check}' requiere una lista")
+        if check == "pattern":
+            _check_pattern(position, rule["value"])
+
+        code = rule.get("code") or f"{rule['column']}_{check}"
+        if code in codes:
+            raise ValueError(f"Código de regla repetido: {code}")
+        codes.add(code)
+        normalized["rules"].append({
+            "code": code,
+            "column": str(rule["column"]).strip().lower(),
+            "check": check,
+            "value": rule.get("value"),
+            "message": rule.get("message") or f"{rule['column']}: {check}",
+        })
+    return normalized
+
+
+@lru_cache(maxsize=16)
+def _compile_cached(canonical: str) -> ValidationPlan:
+    return ValidationPlan(json.loads(canonical))
+
+
+def compile_rules(rule_set: Dict[str, Any]) -> ValidationPlan:
+
+    """Plan compilado; el mismo conjunto de reglas retorna el mismo plan"""
+
+    normalized = normalize_rule_set(rule_set)
+    return _compile_cached(json.dumps(normalized, sort_keys=True))
+
+
+#-----------------------------------------------------------------------
+# Conjunto activo: se relee el archivo solo si cambió (mtime y tamaño), así que
+# todos los workers ven la versión guardada por PUT /validation-rules. El plan
+# compilado se guarda junto al conjunto y se rehace solo al releerlo.
+#-----------------------------------------------------------------------
+_lock = threading.Lock()
+_loaded_stamp: Optional[tuple] = None
+_active_rule_set: Dict[str, Any] = normalize_rule_set(DEFAULT_RULE_SET)
+_active_plan: Optional[ValidationPlan] = None
+
+
+def _file_stamp() -> Optional[tuple]:
+    try:
+        stat = os.stat(VALIDATION_RULES_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _reload():
+
+    """Relee el conjunto activo y su plan si el archivo cambió"""
+
+    global _loaded_stamp, _active_rule_set, _active_plan
+
+    stamp = _file_stamp()
+    if stamp == _loaded_stamp and _active_plan is not None:
+        return
+
+    with _lock:
+        if stamp != _loaded_stamp or _active_plan is None:
+            if stamp is None:
+                _active_rule_set = normalize_rule_set(DEFAULT_RULE_SET)
+            elif stamp != _loaded_stamp:
+                try:
+                    with open(VALIDATION_RULES_FILE, encoding="utf-8") as f:
+                        _active_rule_set = normalize_rule_set(json.load(f))
+                    logger.info(f"Reglas de validación cargadas de {VALIDATION_RULES_FILE}")
+                except (OSError, ValueError) as e:
+                    # Un archivo roto no debe tumbar las cargas: se mantiene el anterior
+                    logger.error(f"Reglas de validación inválidas en {VALIDATION_RULES_FILE}: {str(e)}")
+            _active_plan = ValidationPlan(_active_rule_set)
+            _loaded_stamp = stamp
+
+
+def current_rule_set() -> Dict[str, Any]:
+    _reload()
+    return _active_rule_set
+
+
+def current_plan() -> ValidationPlan:
+
+    """Plan del conjunto activo; solo se compila cuando cambia el archivo"""
+
+    _reload()
+    return _active_plan
+
+
+def save_rule_set(rule_set: Dict[str, Any]) -> Dict[str, Any]:
+
+    """Valida, compila y guarda el conjunto de reglas (escritura atómica)"""
+
+    normalized = normalize_rule_set(rule_set)
+    compile_rules(normalized)
+
+    directory = os.path.dirname(VALIDATION_RULES_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{VALIDATION_RULES_FILE}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(normalized, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, VALIDATION_RULES_FILE)
+    return copy.deepcopy(normalized)
+
+
+def reset_rule_set():
+
+    """Vuelve a las reglas por defecto borrando el archivo"""
+
+    try:
+        os.remove(VALIDATION_RULES_FILE)
+    except FileNotFoundError:
+        pass
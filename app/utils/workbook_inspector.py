@@ -0,0 +1,188 @@
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+
+#-------------------------------------------------------------------------
+# Inspección de un .xlsx leyendo directo el zip: xl/workbook.xml para las
+# hojas y el <dimension> al inicio de cada hoja para estimar filas y
+# columnas. No se carga openpyxl ni pandas y no se recorren las celdas.
+#-------------------------------------------------------------------------
+
+Source = Union[str, BinaryIO]
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+WORKBOOK_PATH = "xl/workbook.xml"
+WORKBOOK_RELS_PATH = "xl/_rels/workbook.xml.rels"
+SHARED_STRINGS_PATH = "xl/sharedStrings.xml"
+
+# Celda tipo "AB123" dentro de una referencia "A1:AB123"
+_CELL_REF = re.compile(r"^\$?([A-Z]+)\$?(\d+)$")
+
+# Hojas sin <dimension> (p. ej. openpyxl en modo write_only): se estima
+# con las filas que caben en los primeros SAMPLE_BYTES del XML
+SAMPLE_BYTES = 256 * 1024
+_ROW_TAG = re.compile(rb"<(?:\w+:)?row[\s>]")
+_CELL_TAG = re.compile(rb"<(?:\w+:)?c[\s>]")
+_ROW_END = re.compile(rb"</(?:\w+:)?row>")
+
+
+class WorkbookInspectionError(ValueError):
+
+    """El archivo no es un .xlsx legible (zip o XML inválido)"""
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters:
+        number = number * 26 + (ord(letter) - ord("A") + 1)
+    return number
+
+
+def parse_dimension(ref: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+
+    """(filas, columnas) de una referencia "A1:C101"; (None, None) si no se puede leer"""
+
+    if not ref:
+        return None, None
+    parts = ref.upper().split(":")
+    start = _CELL_REF.match(parts[0])
+    end = _CELL_REF.match(parts[-1])
+    if not start or not end:
+        return None, None
+    rows = int(end.group(2)) - int(start.group(2)) + 1
+    columns = _column_number(end.group(1)) - _column_number(start.group(1)) + 1
+    return rows, columns
+
+
+def _sheet_targets(archive: zipfile.ZipFile) -> Dict[str, str]:
+
+    """{r:id: ruta dentro del zip} según xl/_rels/workbook.xml.rels"""
+
+    try:
+        root = ET.fromstring(archive.read(WORKBOOK_RELS_PATH))
+    except KeyError:
+        return {}
+    targets = {}
+    for rel in root.iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        # Las rutas son relativas a xl/ salvo que empiecen por "/"
+        if target.startswith("/"):
+            path = target.lstrip("/")
+        else:
+            path = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = path
+    return targets
+
+
+def _read_dimension(archive: zipfile.ZipFile, path: str) -> Optional[str]:
+    """
+    Lee la hoja como stream solo hasta <dimension>, que va antes de
+    <sheetData>. Si la hoja no lo trae se corta al llegar a los datos.
+    """
+    try:
+        stream = archive.open(path)
+    except KeyError:
+        return None
+    with stream:
+        for _, element in ET.iterparse(stream, events=("start",)):
+            if element.tag == f"{_NS_MAIN}dimension":
+                return element.get("ref")
+            if element.tag == f"{_NS_MAIN}sheetData":
+                return None
+    return None
+
+
+def _estimate_from_sample(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Tuple[Optional[int], Optional[int], str]:
+    """
+    (filas, columnas, origen) contando etiquetas <row> en una muestra del
+    XML y proyectando por el tamaño total. Si la hoja entera cabe en la
+    muestra el conteo es exacto.
+    """
+    with archive.open(info) as stream:
+        sample = stream.read(SAMPLE_BYTES)
+    if not sample:
+        return None, None, "sample"
+    
+    rows = len(_ROW_TAG.findall(sample))
+    first_row = _ROW_TAG.search(sample)
+    columns = None
+    if first_row:
+        end = _ROW_END.search(sample, first_row.end())
+        columns = len(_CELL_TAG.findall(sample, first_row.end(), end.start() if end else len(sample)))
+    
+    if len(sample) >= info.file_size:
+        return rows, columns, "exact"
+    return round(rows * info.file_size / len(sample)), columns, "sample"
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> Dict[str, Optional[int]]:
+
+    """Tamaño expandido de sharedStrings.xml y cantidad de textos únicos declarada"""
+
+    try:
+        info = archive.getinfo(SHARED_STRINGS_PATH)
+    except KeyError:
+        return {"bytes": 0, "unique_count": 0}
+
+    unique_count = None
+    with archive.open(info) as stream:
+        for _, element in ET.iterparse(stream, events=("start",)):
+            # Solo interesa el elemento raíz <sst uniqueCount="...">
+            value = element.get("uniqueCount") or element.get("count")
+            unique_count = int(value) if value and value.isdigit() else None
+            break
+    return {"bytes": info.file_size, "unique_count": unique_count}
+
+
+def inspect_workbook(source: Source) -> Dict:
+    """
+    Retorna las hojas de un .xlsx con filas y columnas estimadas según
+    <dimension>, o por muestreo si falta (estimated_rows descuenta la
+    fila de encabezados), y el tamaño de la tabla de textos compartidos.
+    """
+    if not isinstance(source, str):
+        source.seek(0)
+    try:
+        with zipfile.ZipFile(source) as archive:
+            root = ET.fromstring(archive.read(WORKBOOK_PATH))
+            targets = _sheet_targets(archive)
+
+            sheets: List[Dict] = []
+            for sheet in root.iter(f"{_NS_MAIN}sheet"):
+                path = targets.get(sheet.get(f"{_NS_REL}id"))
+                info = archive.NameToInfo.get(path) if path else None
+                dimension = _read_dimension(archive, path) if info else None
+                rows, columns = parse_dimension(dimension)
+                origin = "dimension"
+                if rows is None and info is not None:
+                    rows, columns, origin = _estimate_from_sample(archive, info)
+                sheets.append({
+                    "name": sheet.get("name"),
+                    "state": sheet.get("state", "visible"),
+                    "dimension": dimension,
+                    "estimated_rows": max(rows - 1, 0) if rows is not None else None,
+                    "estimated_columns": columns,
+                    "estimate_source": origin if rows is not None else None,
+                    "xml_bytes": info.file_size if info else None,
+                })
+
+            return {
+                "sheets": sheets,
+                "shared_strings": _shared_strings(archive),
+            }
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        raise WorkbookInspectionError(f"No se pudo inspeccionar el libro: {e}") from e
+    finally:
+        if not isinstance(source, str):
+            source.seek(0)
+
+
+def is_xlsx(filename: str) -> bool:
+    return os.path.splitext(filename or "")[1].lower() in (".xlsx", ".xlsm")
@@ -3,6 +3,7 @@ from fastapi import WebSocket
 import asyncio
 import json
 from app.utils.logger_config import logger
+from app.utils.metrics import websocket_connections, websocket_send_queue_depth
 
 
 class WebSocketManager:
@@ -21,6 +22,7 @@ class WebSocketManager:
         await websocket.accept()
         async with self.lock:
             self.active_connections[client_id] = websocket
+            websocket_connections.set(len(self.active_connections))
         logger.info(f"webSocket conectado: {client_id} | Total: {len(self.active_connections)}")
         
         #--------------------------------
@@ -40,6 +42,7 @@ class WebSocketManager:
         
         if client_id in self.active_connections:
             del self.active_connections[client_id]
+            websocket_connections.set(len(self.active_connections))
             logger.info(f" Cliente desconectado: {client_id} | Total: {len(self.active_connections)}")
             
             
@@ -51,11 +54,21 @@ class WebSocketManager:
         if client_id in self.active_connections:
             try:
                 websocket = self.active_connections[client_id]
-                await websocket.send_json(message)
+                await self._send(websocket, message)
             except Exception as e:
                 logger.error(f"Error al enviar mensaje a {client_id}: {str(e)}")
                 self.disconnect(client_id)
 
+    async def _send(self, websocket: WebSocket, message):
+        
+        """Envía un mensaje contando los envíos pendientes para /metrics"""
+        
+        websocket_send_queue_depth.inc()
+        try:
+            await websocket.send_json(message)
+        finally:
+            websocket_send_queue_depth.dec()
+
     async def broadcast(self, message: str):
         
         """Enviar un mensaje a todos los clientes conectados."""
@@ -68,7 +81,7 @@ class WebSocketManager:
         
         for client_id, websocket in self.active_connections.items():
             try:
-                await websocket.send_json(message)
+                await self._send(websocket, message)
                 logger.debug(f"Error de broadcast a {client_id}: {message.get('percentage', 'N/A')}%")
             except Exception as e:
                 logger.error(f"Error en broadcast a {client_id}: {str(e)}")
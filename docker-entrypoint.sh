@@ -0,0 +1,12 @@
+#!/bin/sh
+# Aplica las migraciones pendientes antes de arrancar la API:
+# /health/ready (HEALTHCHECK) exige que la base esté en la revisión head.
+# Con varias instancias de la API, migrar una sola vez como tarea aparte
+# (python -m app.scripts.migrar) y arrancar las demás con DB_MIGRATE_ON_START=false.
+set -e
+
+if [ "${DB_MIGRATE_ON_START:-true}" = "true" ]; then
+    python -m app.scripts.migrar
+fi
+
+exec "$@"
@@ -2,10 +2,11 @@ import { NgModule } from '@angular/core';
 import { BrowserModule } from '@angular/platform-browser';
 import { AppRoutingModule } from './app-routing.module';
 import { AppComponent } from './app.component';
-import { HttpClientModule } from '@angular/common/http';
+import { HTTP_INTERCEPTORS, HttpClientModule } from '@angular/common/http';
 import { FormsModule, ReactiveFormsModule } from '@angular/forms';
 import { StatsComponent } from './modules/stats/stats.component';
 import { NavbarComponent } from './modules/shared/navbar/navbar.component';
+import { ReadYourWritesInterceptor } from './modules/shared/interceptors/read-your-writes.interceptor';
 
 @NgModule({
   declarations: [
@@ -20,7 +21,9 @@ import { NavbarComponent } from './modules/shared/navbar/navbar.component';
     FormsModule,
     ReactiveFormsModule
   ],
-  providers: [],
+  providers: [
+    { provide: HTTP_INTERCEPTORS, useClass: ReadYourWritesInterceptor, multi: true }
+  ],
   bootstrap: [AppComponent]
 })
 export class AppModule { }
@@ -312,28 +312,11 @@ export class SenaComponent implements OnInit {
 
   // ==================== MÉTODOS ADICIONALES ====================
 
-  exportToCSV() {
-    // Implementación para exportar a CSV
-    const headers = ['ID', 'Nombre', 'Email'];
-    const rows = this.filteredUsers.map(user => [
-      user.id,
-      user.name,
-      user.email
-    ]);
-    
-    let csvContent = headers.join(',') + '\n';
-    rows.forEach(row => {
-      csvContent += row.join(',') + '\n';
-    });
-    
-    const blob = new Blob([csvContent], { type: 'text/csv' });
-    const url = window.URL.createObjectURL(blob);
+  // Exporta todos los usuarios desde el servidor (no solo los cargados en pantalla)
+  exportAllUsers(format: 'csv' | 'xlsx' = 'csv') {
     const link = document.createElement('a');
-    link.href = url;
-    link.download = `usuarios_sena_${new Date().getTime()}.csv`;
+    link.href = `${environment.apiUrl}/users/export?format=${format}`;
     link.click();
-    
-    this.showNotification('Archivo CSV exportado exitosamente', 'success');
   }
 
   printTable() {
@@ -0,0 +1,42 @@
+import { Injectable } from '@angular/core';
+import {
+  HttpEvent,
+  HttpHandler,
+  HttpInterceptor,
+  HttpRequest,
+  HttpResponse
+} from '@angular/common/http';
+import { Observable } from 'rxjs';
+import { tap } from 'rxjs/operators';
+
+// Cabecera con la que el backend marca una escritura reciente (read-your-writes)
+export const PRIMARY_UNTIL_HEADER = 'X-Primary-Until';
+
+// -----------------------------------------------------------------
+// El backend está en otro origen y las peticiones no usan
+// withCredentials, así que la cookie de read-your-writes no vuelve.
+// Se guarda la cabecera de las respuestas de escritura y se reenvía
+// tal cual: el backend decide con su reloj si sigue vigente.
+// -----------------------------------------------------------------
+@Injectable()
+export class ReadYourWritesInterceptor implements HttpInterceptor {
+
+  private primaryUntil: string | null = null;
+
+  intercept(request: HttpRequest<unknown>, next: HttpHandler): Observable<HttpEvent<unknown>> {
+    if (this.primaryUntil) {
+      request = request.clone({ setHeaders: { [PRIMARY_UNTIL_HEADER]: this.primaryUntil } });
+    }
+
+    return next.handle(request).pipe(
+      tap(event => {
+        if (event instanceof HttpResponse) {
+          const value = event.headers.get(PRIMARY_UNTIL_HEADER);
+          if (value) {
+            this.primaryUntil = value;
+          }
+        }
+      })
+    );
+  }
+}
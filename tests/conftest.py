@@ -0,0 +1,129 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+
+#-------------------------------------------------------------------------
+# Entorno aislado para las pruebas: base SQLite y directorios de trabajo
+# (logs/, uploads/, config/, profiles/) en una carpeta temporal. Debe
+# configurarse antes de importar app, que lee las variables al importar.
+#-------------------------------------------------------------------------
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="tests_app_")
+
+sys.path.insert(0, ROOT_DIR)
+os.chdir(WORK_DIR)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["DB_CREATE_ALL"] = "true"
+os.environ["DB_CONNECT_RETRIES"] = "1"
+os.environ["DB_POOL_PREWARM"] = "1"
+os.environ["STATS_CACHE_TTL"] = "5"
+os.environ["PROFILE_TOKEN"] = "token-de-pruebas"
+os.environ["ADMIN_TOKEN"] = "admin-de-pruebas"
+
+import logging  # noqa: E402
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.parse_cache import parse_cache  # noqa: E402
+from app.utils.stats_cache import stats_cache  # noqa: E402
+
+# echo=True en los motores llena la salida de pytest
+logging.getLogger("sqlalchemy.engine.Engine").disabled = True
+
+ADMIN_HEADERS = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        for _ in range(100):
+            if test_client.get("/health/ready").status_code == 200:
+                break
+            time.sleep(0.05)
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+
+    """Cada prueba empieza con tablas vacías y sin cachés en memoria"""
+
+    Base.metadata.create_all(bind=engine)
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(delete(table))
+    stats_cache.invalidate()
+    parse_cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class StatementCounter:
+
+    """Cuenta las sentencias SQL que ejecuta el motor primario"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def matching(self, text: str) -> int:
+        return sum(1 for statement in self.statements if text.lower() in statement.lower())
+
+
+@pytest.fixture
+def sql_statements():
+    from sqlalchemy import event
+
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+def make_xlsx(rows, columns=("name", "email")) -> bytes:
+
+    """Libro .xlsx en memoria con una hoja y las filas dadas"""
+
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(columns))
+    for row in rows:
+        sheet.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def upload_xlsx(client, content: bytes, filename: str = "usuarios.xlsx", **kwargs):
+
+    """POST /api/excel/upload; la ingesta en segundo plano termina antes de retornar"""
+
+    return client.post(
+        "/api/excel/upload",
+        files={"file": (filename, content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        **kwargs
+    )
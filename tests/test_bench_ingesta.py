@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+from app.scripts import bench_ingesta, generar_datos_prueba
+from app.scripts.generar_datos_prueba import INVALID_NAMES, generate_rows, write_file
+from conftest import ROOT_DIR
+
+
+def _expected_successful(rows, **options):
+    seen = set()
+    for name, email, *_ in generate_rows(rows, **options):
+        if name not in INVALID_NAMES and email not in seen:
+            seen.add(email)
+    return len(seen)
+
+
+def test_generador_determinista_y_con_proporciones():
+    options = dict(duplicate_ratio=0.2, invalid_ratio=0.1, extra_columns=2, seed=7)
+    rows = list(generate_rows(2000, **options))
+
+    assert rows == list(generate_rows(2000, **options))
+    assert rows != list(generate_rows(2000, **{**options, "seed": 8}))
+    assert all(len(row) == 4 for row in rows)
+
+    invalid = sum(1 for row in rows if row[0] in INVALID_NAMES)
+    duplicates = len(rows) - invalid - _expected_successful(2000, **options)
+    assert 150 <= invalid <= 250
+    assert 300 <= duplicates <= 500
+
+
+def test_archivos_xlsx_y_csv_con_el_mismo_contenido(tmp_path):
+    options = dict(duplicate_ratio=0.1, invalid_ratio=0.1, extra_columns=1, seed=3)
+    xlsx = write_file(str(tmp_path / "datos.xlsx"), 50, **options)
+    csv_path = write_file(str(tmp_path / "datos.csv"), 50, **options)
+
+    with open(csv_path, encoding="utf-8") as f:
+        csv_rows = list(csv.reader(f))
+    sheet = load_workbook(xlsx, read_only=True)["usuarios"]
+    xlsx_rows = [["" if value is None else str(value) for value in row] for row in sheet.iter_rows(values_only=True)]
+
+    assert csv_rows[0] == generar_datos_prueba.header(1) == ["name", "email", "extra_1"]
+    assert csv_rows == xlsx_rows
+    assert len(csv_rows) == 51
+
+    with pytest.raises(ValueError):
+        write_file(str(tmp_path / "datos.txt"), 5)
+
+
+def test_regresiones_respecto_al_baseline(monkeypatch):
+    monkeypatch.setattr(bench_ingesta, "load_baselines", lambda: {
+        "xlsx:1000": {"rows_per_second": 1000.0, "peak_rss_bytes": 100 * 2**20},
+    })
+    result = {"format": "xlsx", "rows": 1000, "rows_per_second": 800.0, "peak_rss_bytes": 120 * 2**20}
+
+    assert bench_ingesta.check_regressions([result], tolerance=0.25) == []
+
+    slower = {**result, "rows_per_second": 700.0, "peak_rss_bytes": 130 * 2**20}
+    messages = bench_ingesta.check_regressions([slower], tolerance=0.25)
+    assert len(messages) == 2
+    assert messages[0].startswith("xlsx:1000: 700.0 filas/s")
+
+    # Sin baseline para el caso no hay regresión
+    assert bench_ingesta.check_regressions([{**slower, "rows": 5}], tolerance=0.25) == []
+
+
+def test_caso_completo_en_subproceso():
+    completed = subprocess.run(
+        [sys.executable, "-m", "app.scripts.bench_ingesta", "--case", "200", "--format", "csv", "--seed", "5"],
+        cwd=ROOT_DIR, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "LOG_LEVEL": "WARNING"}
+    )
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    expected = _expected_successful(200, duplicate_ratio=0.05, invalid_ratio=0.05, extra_columns=3, seed=5)
+    assert result["successful_rows"] == expected
+    assert result["successful_rows"] + result["failed_rows"] == 200
+    assert set(result["stages"]) >= {"parse", "validation", "dedup", "insert"}
+    assert result["peak_rss_bytes"] > 0
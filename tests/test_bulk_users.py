@@ -0,0 +1,107 @@
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from app import crud, schemas
+from app.models import User
+
+
+def _create(client, *emails):
+    response = client.post("/users/bulk", json={"items": [{"name": "Usuario", "email": email} for email in emails]})
+    assert response.status_code == 200
+    return response.json()["ids"]
+
+
+def _emails(db):
+    return dict(db.execute(select(User.id, User.email)).all())
+
+
+def test_creacion_con_fallos_parciales(client):
+    _create(client, "existe@example.com")
+
+    body = client.post("/users/bulk", json={"items": [
+        {"name": "Ana", "email": "ana@example.com"},
+        {"name": "Dup", "email": "EXISTE@example.com"},
+        {"name": "1234", "email": "num@example.com"},
+        {"name": "Otra", "email": "ana@example.com"},
+    ]}).json()
+
+    assert body["succeeded"] == 1
+    assert body["ids"][0] is not None
+    assert body["errors"] == [[1, "duplicate_email"], [2, "invalid_name"], [3, "duplicate_in_request"]]
+
+
+def test_bloque_fallido_se_reintenta_por_item(db, monkeypatch):
+    # Otra carga inserta el email entre la consulta de existentes y el INSERT
+    db.add(User(name="Previo", email="carrera@example.com"))
+    db.commit()
+    monkeypatch.setattr(db, "scalars", lambda statement: [])
+
+    result = crud.bulk_create_users(db, [
+        schemas.UserCreate(name="Uno", email="uno@example.com"),
+        schemas.UserCreate(name="Carrera", email="carrera@example.com"),
+        schemas.UserCreate(name="Dos", email="dos@example.com"),
+    ])
+
+    assert result["succeeded"] == 2
+    assert result["errors"] == [(1, "duplicate_email")]
+    assert sorted(_emails(db).values()) == ["carrera@example.com", "dos@example.com", "uno@example.com"]
+    assert _emails(db)[result["ids"][0]] == "uno@example.com"
+
+
+def test_intercambio_de_emails(client, db):
+    first, second = _create(client, "a@example.com", "b@example.com")
+
+    body = client.patch("/users/bulk", json={"items": [
+        {"id": first, "email": "b@example.com"},
+        {"id": second, "email": "a@example.com"},
+    ]}).json()
+
+    assert body["errors"] == []
+    assert _emails(db) == {first: "b@example.com", second: "a@example.com"}
+
+
+def test_intercambio_bloqueado_no_deja_valores_provisionales(client, db):
+    first, second, third = _create(client, "a@example.com", "b@example.com", "c@example.com")
+
+    # second no puede tomar el email de third, así que tampoco cede el suyo
+    body = client.patch("/users/bulk", json={"items": [
+        {"id": first, "email": "b@example.com"},
+        {"id": second, "email": "c@example.com"},
+    ]}).json()
+
+    assert body["errors"] == [[0, "duplicate_email"], [1, "duplicate_email"]]
+    assert _emails(db) == {first: "a@example.com", second: "b@example.com", third: "c@example.com"}
+
+
+def test_actualizacion_fallida_se_reintenta_por_item(client, db, monkeypatch):
+    first, second, _ = _create(client, "a@example.com", "b@example.com", "ocupado@example.com")
+
+    # La consulta de dueños no ve el email ocupado: falla el UPDATE del bloque
+    execute = db.execute
+
+    def stale_owners(statement, *args, **kwargs):
+        if isinstance(statement, Select):
+            return []
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", stale_owners)
+    result = crud.bulk_update_users(db, [
+        schemas.UserBulkUpdateItem(id=first, name="Renombrado"),
+        schemas.UserBulkUpdateItem(id=second, email="ocupado@example.com"),
+    ])
+    monkeypatch.undo()
+
+    assert result["ids"] == [first, None]
+    assert result["errors"] == [(1, "duplicate_email")]
+    assert db.get(User, first).name == "Renombrado"
+    assert db.get(User, second).email == "b@example.com"
+
+
+def test_eliminacion_con_inexistentes(client, db):
+    first, second = _create(client, "a@example.com", "b@example.com")
+
+    body = client.request("DELETE", "/users/bulk", json={"ids": [first, 999999, first]}).json()
+
+    assert body["ids"] == [first, None, None]
+    assert body["errors"] == [[1, "not_found"], [2, "duplicate_in_request"]]
+    assert list(_emails(db)) == [second]
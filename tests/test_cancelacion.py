@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from app.models import ExcelUploadLog, UploadStatusEnum, User
+from app.routers import excel_upload
+from app.utils import upload_cancel
+
+
+@pytest.fixture
+def tramos_de_dos(monkeypatch):
+    monkeypatch.setattr(excel_upload, "INGEST_CHUNK_SIZE", 2)
+
+
+def _upload_log(db, total_rows):
+    log = ExcelUploadLog(filename="usuarios.xlsx", status=UploadStatusEnum.PROCESSING, total_rows=total_rows)
+    db.add(log)
+    db.commit()
+    return log
+
+
+def _rows(count):
+    return pd.DataFrame({
+        "name": [f"Usuario {i}" for i in range(count)],
+        "email": [f"u{i}@example.com" for i in range(count)],
+    })
+
+
+def _cancel_on(monkeypatch, upload_id, locked, call):
+
+    """Activa la cancelación justo antes de la llamada número call a is_requested(lock=locked)"""
+
+    real = upload_cancel.is_requested
+    calls = []
+
+    def is_requested(db, requested_id, lock=False):
+        if lock == locked:
+            calls.append(lock)
+            if len(calls) == call:
+                upload_cancel.register(upload_id).set()
+        return real(db, requested_id, lock=lock)
+
+    monkeypatch.setattr(upload_cancel, "is_requested", is_requested)
+
+
+def _count_users(db):
+    return db.scalar(select(func.count()).select_from(User))
+
+
+def test_cancelar_antes_del_commit_descarta_el_tramo(db, tramos_de_dos, monkeypatch):
+    log = _upload_log(db, 6)
+    _cancel_on(monkeypatch, log.id, locked=True, call=2)
+    try:
+        excel_upload.process_excel_data(_rows(6), log.id, db)
+    finally:
+        upload_cancel.unregister(log.id)
+
+    db.refresh(log)
+    assert log.status == UploadStatusEnum.CANCELLED
+    # Solo el primer tramo quedó confirmado; el segundo se deshizo
+    assert (log.successful_rows, log.failed_rows) == (2, 0)
+    assert _count_users(db) == 2
+    assert "tras procesar 2 de 6" in log.error_message
+
+
+def test_cancelacion_tardia_no_deshace_la_carga(db, tramos_de_dos, monkeypatch):
+    log = _upload_log(db, 4)
+    # La segunda consulta sin bloqueo es la de después del último tramo
+    _cancel_on(monkeypatch, log.id, locked=False, call=2)
+    try:
+        excel_upload.process_excel_data(_rows(4), log.id, db)
+    finally:
+        upload_cancel.unregister(log.id)
+
+    db.refresh(log)
+    assert log.status == UploadStatusEnum.COMPLETED
+    assert log.successful_rows == 4
+    assert _count_users(db) == 4
+
+
+def test_endpoint_de_cancelacion(client, db, tramos_de_dos):
+    log = _upload_log(db, 4)
+    url = f"/api/excel/uploads/{log.id}/cancel"
+
+    response = client.post(url)
+    assert response.status_code == 202
+    assert response.json()["status"] == "cancel_requested"
+    # Pedirlo otra vez no es error
+    assert client.post(url).status_code == 202
+
+    # La marca en la BD la ve una ingesta de otro proceso (sin evento local)
+    excel_upload.process_excel_data(_rows(4), log.id, db)
+    db.refresh(log)
+    assert log.status == UploadStatusEnum.CANCELLED
+    assert log.cancel_requested_at is not None
+    assert _count_users(db) == 0
+
+    response = client.post(url)
+    assert response.status_code == 409
+    assert "cancelled" in response.json()["error"]
+    assert client.post("/api/excel/uploads/999/cancel").status_code == 404
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.models import ExcelUploadLog, UploadStatusEnum, User
+from app.routers import excel_upload
+from app.utils import columnar_spill, validation_rules
+from app.utils.columnar_spill import SpilledUpload, spill_dataframe
+
+
+@pytest.fixture
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar_spill, "SPILL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_ida_y_vuelta_por_bloques(spill_dir):
+    df = pd.DataFrame(
+        {
+            "name": ["Ana", None, "Ñandú ☃", 123, 4.5, "", "007"],
+            "email": ["a@example.com"] * 7,
+            "vacia": [None] * 7,
+        },
+        index=[0, 1, 2, 5, 6, 7, 9],
+    )
+
+    spilled = SpilledUpload(spill_dataframe(df, 7))
+
+    assert len(spilled) == 7
+    assert spilled.columns == ["name", "email", "vacia"]
+    chunks = list(spilled.iter_chunks(3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    result = pd.concat(chunks)
+    assert list(result.index) == [0, 1, 2, 5, 6, 7, 9]
+    # Los números vuelven como números; "007" sigue siendo texto
+    assert result["name"].tolist() == ["Ana", None, "Ñandú ☃", 123, 4.5, "", "007"]
+    assert result["vacia"].isna().all()
+    assert not os.path.exists(f"{spilled.path}.tmp")
+
+
+def test_la_validacion_no_cambia_al_volcar(spill_dir):
+    df = pd.DataFrame({"name": ["Ana", "123", "12.5", 123, 4.0, 7], "email": ["a@example.com"] * 6})
+    plan = validation_rules.current_plan()
+
+    spilled = SpilledUpload(spill_dataframe(df, 8))
+
+    np.testing.assert_array_equal(plan.evaluate(spilled.chunk(0, 6)).errors, plan.evaluate(df).errors)
+
+
+def test_columna_numerica_completa(spill_dir):
+    df = pd.DataFrame({"name": [10, 20], "email": ["a@b.co", "c@d.co"]})
+
+    chunk = SpilledUpload(spill_dataframe(df, 9)).chunk(0, 2)
+
+    assert chunk["name"].tolist() == [10, 20]
+
+
+def test_la_ingesta_usa_las_reglas_fijadas_al_volcar(spill_dir, db):
+    plan = validation_rules.current_plan()
+    df = pd.DataFrame({"name": ["Ana", "Luis"], "email": ["ana@example.com", "luis@otra.com"], "area": ["x", "y"]})
+    log = ExcelUploadLog(filename="usuarios.xlsx", status=UploadStatusEnum.PROCESSING, total_rows=2)
+    db.add(log)
+    db.commit()
+    path = spill_dataframe(excel_upload._ingest_columns(df, plan), log.id, plan.rule_set)
+
+    # Las reglas cambian (y piden otra columna) antes de que corra la ingesta
+    validation_rules.save_rule_set({"rules": [
+        {"column": "email", "check": "allowed_domains", "value": ["example.com"]},
+        {"column": "area", "check": "one_of", "value": ["ventas"]},
+    ]})
+    try:
+        excel_upload.process_excel_data_safe(path, log.id)
+    finally:
+        validation_rules.reset_rule_set()
+
+    db.refresh(log)
+    assert (log.status, log.successful_rows) == (UploadStatusEnum.COMPLETED, 2)
+    assert sorted(db.scalars(select(User.email))) == ["ana@example.com", "luis@otra.com"]
+    # El volcado se borra al terminar
+    assert not os.path.exists(path)
+
+
+def test_volcados_expirados_se_borran(spill_dir, monkeypatch):
+    old = spill_dir / "1"
+    old.mkdir()
+    os.utime(old, (0, 0))
+    monkeypatch.setattr(columnar_spill, "SPILL_TTL_HOURS", 1)
+
+    spill_dataframe(pd.DataFrame({"name": ["Ana"]}), 2)
+
+    assert sorted(os.listdir(spill_dir)) == ["2"]
@@ -0,0 +1,87 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from app.utils import decompression
+from app.utils.decompression import DecompressionBudgetError
+from app.utils.excel_processor import ExcelProcessor
+from conftest import make_xlsx, upload_xlsx
+
+
+def _zip(members, compression=zipfile.ZIP_DEFLATED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _bomb_xlsx(size=4 * 1024 * 1024) -> bytes:
+    """Un libro válido más un XML de relleno que comprime ~1000:1"""
+    buffer = io.BytesIO(make_xlsx([("Ana", "ana@example.com")]))
+    with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr("xl/relleno.xml", b" " * size)
+    return buffer.getvalue()
+
+
+def test_csv_gz_se_corta_al_superar_el_presupuesto(monkeypatch):
+    monkeypatch.setattr(decompression, "DECOMPRESS_MAX_RATIO", 10)
+    source = io.BytesIO(gzip.compress(b"name,email\n" + b"a,a@example.com\n" * 100_000))
+
+    with pytest.raises(DecompressionBudgetError):
+        ExcelProcessor.read_upload(source, "datos.csv.gz")
+
+
+def test_zip_une_csv_y_excel():
+    content = _zip({
+        "a.csv": "name,email\nAna,ana@example.com\n",
+        "b.xlsx": make_xlsx([("Luis", "luis@example.com")]),
+        "__MACOSX/._a.csv": "x",
+    })
+
+    df = ExcelProcessor.read_upload(io.BytesIO(content), "datos.zip")
+
+    assert list(df["email"]) == ["ana@example.com", "luis@example.com"]
+
+
+def test_zip_rechaza_por_tamano_declarado_y_miembros(monkeypatch):
+    content = _zip({"a.csv": b"name,email\n" + b" " * (2 * 1024 * 1024)})
+    with pytest.raises(DecompressionBudgetError, match="proporción"):
+        list(decompression.iter_zip_members(io.BytesIO(content)))
+
+    monkeypatch.setattr(decompression, "ZIP_MAX_MEMBERS", 1)
+    content = _zip({"a.csv": "name\n", "b.csv": "name\n"})
+    with pytest.raises(ValueError, match="más de 1"):
+        list(decompression.iter_zip_members(io.BytesIO(content)))
+
+
+def test_xlsx_suelto_se_revisa_antes_de_parsear():
+    source = io.BytesIO(_bomb_xlsx())
+    source.seek(7)
+
+    with pytest.raises(DecompressionBudgetError, match="El .xlsx"):
+        decompression.check_xlsx(source)
+    assert source.tell() == 7
+
+    # Un libro normal pasa y descuenta sus bytes del presupuesto
+    source = io.BytesIO(make_xlsx([("Ana", "ana@example.com")]))
+    budget = decompression.DecompressionBudget(len(source.getvalue()))
+    decompression.check_xlsx(source, budget)
+    assert budget.expanded > len(source.getvalue())
+
+
+def test_xlsx_dentro_de_un_zip_usa_el_presupuesto_externo():
+    # Guardado sin comprimir: el .zip externo no delata al libro
+    content = _zip({"libro.xlsx": _bomb_xlsx()}, compression=zipfile.ZIP_STORED)
+
+    with pytest.raises(DecompressionBudgetError, match="El .xlsx"):
+        ExcelProcessor.read_upload(io.BytesIO(content), "datos.zip")
+
+
+def test_carga_de_xlsx_con_bomba_responde_413(client):
+    response = upload_xlsx(client, _bomb_xlsx())
+
+    assert response.status_code == 413
+    assert "proporción" in response.json()["error"]
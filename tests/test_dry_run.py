@@ -0,0 +1,67 @@
+from sqlalchemy import func, select
+
+from app.models import ExcelUploadLog, User
+from conftest import make_xlsx
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ROWS = [
+    ("Ana", "ana@example.com"),
+    ("Existe", "EXISTE@example.com"),
+    ("123", "num@example.com"),
+    ("Otra Ana", "ana@example.com"),
+    ("Luis", "no-es-email"),
+    ("Eva", "eva@example.com"),
+]
+
+
+def _dry_run(client, content, **params):
+    return client.post(
+        "/api/excel/dry-run",
+        files={"file": ("usuarios.xlsx", content, XLSX_TYPE)},
+        params=params
+    )
+
+
+def test_resumen_como_lo_haria_la_ingesta(client, db):
+    db.add(User(name="Previo", email="existe@example.com"))
+    db.commit()
+
+    response = _dry_run(client, make_xlsx(ROWS))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["filename"] == "usuarios.xlsx"
+    assert (body["total_rows"], body["valid_rows"], body["invalid_rows"]) == (6, 4, 2)
+    assert (body["duplicates_in_file"], body["existing_in_db"], body["would_insert"]) == (1, 1, 2)
+    assert body["violations"]["name_numeric"] == 1
+    assert body["violations"]["email_format"] == 1
+    assert [(error["row_number"], error["errors"]) for error in body["errors"]] == [
+        (3, ["Email ya registrado"]),
+        (4, ["Nombre invalido"]),
+        (5, ["Email duplicado en el archivo"]),
+        (6, ["Email invalido"]),
+    ]
+    assert body["errors_truncated"] is False
+
+
+def test_no_escribe_nada(client, db):
+    _dry_run(client, make_xlsx(ROWS))
+
+    assert db.scalar(select(func.count()).select_from(User)) == 0
+    assert db.scalar(select(func.count()).select_from(ExcelUploadLog)) == 0
+
+
+def test_errores_truncados(client):
+    body = _dry_run(client, make_xlsx(ROWS), max_errors=1).json()
+
+    assert len(body["errors"]) == 1
+    assert body["errors_truncated"] is True
+    assert body["would_insert"] == 3
+
+
+def test_archivo_sin_columnas_requeridas(client):
+    response = _dry_run(client, make_xlsx([("Ana",)], columns=("name",)))
+
+    assert response.status_code == 400
+    assert response.json()["error"] == {"errors": ["Columnas faltantes: email"]}
@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, SessionLocal
+from app.models import ResourceVersion, User
+from app.routers.excel_upload import _insert_chunk
+from app.utils import etag
+from app.utils.logger_config import LogSampler
+
+
+def _version(db, resource=etag.USERS):
+    db.expire_all()
+    return etag.get_version(db, resource)
+
+
+def test_304_sin_consultar_la_lista(client, db, sql_statements):
+    client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+    first = client.get("/users/")
+    assert first.status_code == 200
+    tag = first.headers["ETag"]
+
+    sql_statements.statements.clear()
+    second = client.get("/users/", headers={"If-None-Match": tag})
+
+    assert second.status_code == 304
+    assert second.content == b""
+    assert sql_statements.matching("FROM users") == 0
+
+
+def test_escritura_cambia_el_etag(client):
+    tag = client.get("/users/").headers["ETag"]
+    client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+
+    response = client.get("/users/", headers={"If-None-Match": tag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != tag
+
+
+def test_una_version_por_transaccion(client, db, sql_statements):
+    items = [{"name": f"Usuario {i}", "email": f"u{i}@x.com"} for i in range(50)]
+    client.post("/users/bulk", json={"items": items})
+
+    # 50 usuarios en un bloque: un solo UPDATE del contador, al hacer commit
+    assert sql_statements.matching("UPDATE resource_versions") == 1
+    assert _version(db) == 1
+
+
+def test_rollback_no_incrementa(db):
+    db.add(User(name="Ana Gomez", email="ana@x.com"))
+    etag.mark_changed(db, etag.USERS)
+    db.rollback()
+    db.commit()
+    assert _version(db) == 0
+
+
+def test_fallback_por_fila_incrementa_una_vez(db, sql_statements):
+    db.add(User(name="Existente", email="dup@x.com"))
+    db.commit()
+    start = _version(db)
+
+    rows = [
+        {"name": "Nuevo Uno", "email": "n1@x.com", "is_active": True},
+        {"name": "Repetido", "email": "dup@x.com", "is_active": True},
+        {"name": "Nuevo Dos", "email": "n2@x.com", "is_active": True},
+    ]
+    sql_statements.statements.clear()
+    assert _insert_chunk(db, rows, LogSampler()) == 2
+
+    assert sql_statements.matching("UPDATE resource_versions") == 1
+    assert _version(db) == start + 1
+    assert db.query(User).count() == 3
+
+
+@pytest.fixture
+def lagging_replica(monkeypatch, tmp_path):
+
+    """Réplica en otro archivo SQLite, elegida para todas las lecturas"""
+
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=replica_engine)
+    ReplicaSession = sessionmaker(bind=replica_engine)
+    monkeypatch.setattr(etag, "read_sessionmaker_for", lambda request: ReplicaSession)
+    yield ReplicaSession
+    replica_engine.dispose()
+
+
+def test_replica_atrasada_lee_del_primario(client, lagging_replica):
+    client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+
+    # La réplica aún no tiene la versión 1: los datos salen del primario
+    response = client.get("/users/")
+    assert [user["email"] for user in response.json()] == ["ana@x.com"]
+    assert response.headers["ETag"].startswith('W/"users-1')
+
+
+def test_replica_al_dia_se_usa(client, lagging_replica):
+    client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+    with lagging_replica() as replica:
+        replica.add(User(name="Solo Replica", email="replica@x.com"))
+        replica.add(ResourceVersion(name=etag.USERS, version=1))
+        replica.commit()
+
+    response = client.get("/users/")
+    assert [user["email"] for user in response.json()] == ["replica@x.com"]
@@ -0,0 +1,63 @@
+import threading
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.utils import ingest_metrics
+from app.utils.ingest_metrics import IngestMetrics
+from conftest import make_xlsx, upload_xlsx
+
+
+def test_fases_y_sentencias_del_hilo():
+    metrics = IngestMetrics(parse_seconds=1.5)
+    with metrics.phase("insert"):
+        pass
+    with metrics.phase("insert"):
+        pass
+
+    with metrics.track_statements():
+        with SessionLocal() as session:
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+
+        # Otro hilo no suma a estas métricas
+        def other():
+            with SessionLocal() as session:
+                session.execute(text("SELECT 3"))
+        worker = threading.Thread(target=other)
+        worker.start()
+        worker.join()
+
+    with SessionLocal() as session:
+        session.execute(text("SELECT 4"))
+
+    values = metrics.as_model_kwargs()
+    assert values["db_statements"] == 2
+    assert values["parse_seconds"] == 1.5
+    assert values["total_seconds"] >= 1.5
+    assert values["insert_seconds"] >= 0
+
+
+def test_rss_es_el_maximo_de_los_muestreos(monkeypatch):
+    samples = iter([100, 300, 200])
+    monkeypatch.setattr(ingest_metrics, "current_memory_bytes", lambda: next(samples))
+
+    metrics = IngestMetrics()
+    metrics.sample_memory()
+    metrics.sample_memory()
+
+    assert metrics.max_process_rss_bytes == 300
+
+
+def test_la_carga_guarda_sus_metricas(client):
+    rows = [(f"Usuario {i}", f"u{i}@example.com") for i in range(20)]
+    upload_id = upload_xlsx(client, make_xlsx(rows)).json()["upload_id"]
+
+    detail = client.get(f"/api/excel/logs/{upload_id}").json()
+
+    assert detail["successful_rows"] == 20
+    metrics = detail["metrics"]
+    assert metrics["db_statements"] > 0
+    assert metrics["rows_per_second"] > 0
+    assert metrics["max_process_rss_bytes"] > 0
+    assert "peak_memory_bytes" not in metrics
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.models import ExcelUploadLog, UploadStatusEnum, User
+from app.routers import excel_upload
+from app.utils.ingest_metrics import IngestMetrics
+
+
+@pytest.fixture
+def bloques_chicos(monkeypatch):
+    # Bloques de lectura de 5 filas, tramos de INSERT de 3
+    monkeypatch.setattr(excel_upload, "INGEST_READ_ROWS", 5)
+    monkeypatch.setattr(excel_upload, "INGEST_CHUNK_SIZE", 3)
+
+
+def _upload_log(db, total_rows):
+    log = ExcelUploadLog(filename="usuarios.xlsx", status=UploadStatusEnum.PROCESSING, total_rows=total_rows)
+    db.add(log)
+    db.commit()
+    return log
+
+
+def _users(db):
+    return sorted(db.scalars(select(User.email)))
+
+
+def test_ingesta_por_bloques(db, bloques_chicos):
+    db.add(User(name="Previo", email="existe@example.com"))
+    db.commit()
+    df = pd.DataFrame({
+        "name": ["Ana", "Luis", "123", "Eva", "Otra Ana", "Sol", "Existe", "Mar", "Luz", "Leo", "Paz", "Ada"],
+        "email": [
+            "ANA@example.com", "luis@example.com", "num@example.com", "eva@example.com",
+            "ana@example.com", "sol@example.com", "existe@example.com", "no-es-email",
+            "luz@example.com", "luis@example.com", "paz@example.com", "ada@example.com",
+        ],
+        "extra": range(12),
+    })
+    log = _upload_log(db, len(df))
+    metrics = IngestMetrics()
+
+    excel_upload.process_excel_data(df, log.id, db, metrics=metrics)
+
+    db.refresh(log)
+    assert log.status == UploadStatusEnum.COMPLETED
+    # 123, la segunda ana (mismo bloque), existe, no-es-email y la segunda
+    # luis (bloque posterior, ya en la BD) fallan
+    assert (log.successful_rows, log.failed_rows) == (7, 5)
+    assert _users(db) == sorted([
+        "ada@example.com", "ana@example.com", "eva@example.com", "existe@example.com",
+        "luis@example.com", "luz@example.com", "paz@example.com", "sol@example.com",
+    ])
+    assert metrics.seconds["insert"] > 0
+
+
+def test_bloque_fallido_se_reintenta_por_fila(db, monkeypatch):
+    # Otra carga inserta un email entre la consulta de existentes y el INSERT
+    db.add(User(name="Previo", email="carrera@example.com"))
+    db.commit()
+    monkeypatch.setattr(db, "scalars", lambda statement: [])
+    df = pd.DataFrame({"name": ["Uno", "Carrera", "Dos"], "email": ["uno@example.com", "carrera@example.com", "dos@example.com"]})
+    log = _upload_log(db, len(df))
+
+    excel_upload.process_excel_data(df, log.id, db)
+
+    monkeypatch.undo()
+    db.refresh(log)
+    assert (log.successful_rows, log.failed_rows) == (2, 1)
+    assert _users(db) == ["carrera@example.com", "dos@example.com", "uno@example.com"]
+
+
+def test_sin_filas_marca_la_carga_como_fallida(db):
+    log = _upload_log(db, 0)
+
+    excel_upload.process_excel_data(pd.DataFrame({"name": [], "email": []}), log.id, db)
+
+    db.refresh(log)
+    assert log.status == UploadStatusEnum.FAILED
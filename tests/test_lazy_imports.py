@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.utils.lazy_imports import LazyModule
+from conftest import ROOT_DIR
+
+_PROBE = """
+import json, sys
+import app.main
+imported = {name: name in sys.modules for name in ("pandas", "numpy", "openpyxl")}
+from fastapi.testclient import TestClient
+import time
+from app.utils.startup import readiness
+with TestClient(app.main.app) as client:
+    # El esquema se crea en segundo plano: esperar la readiness
+    deadline = time.monotonic() + 30
+    while not readiness.ready and time.monotonic() < deadline:
+        time.sleep(0.02)
+    client.get("/users/")
+    client.get("/api/excel/stats")
+after_requests = {name: name in sys.modules for name in ("pandas", "openpyxl")}
+from app.utils import lazy_imports
+lazy_imports.warm_up()
+print(json.dumps({
+    "imported": imported,
+    "after_requests": after_requests,
+    "warm": lazy_imports.data_stack_loaded(),
+}))
+"""
+
+
+def test_la_app_arranca_sin_la_pila_de_datos(tmp_path):
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT_DIR, capture_output=True, text=True, timeout=120,
+        env={
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'lazy.db'}",
+            "DATA_STACK_WARMUP": "false",
+            "LOG_LEVEL": "WARNING",
+        }
+    )
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    assert result["imported"] == {"pandas": False, "numpy": False, "openpyxl": False}
+    assert result["after_requests"] == {"pandas": False, "openpyxl": False}
+    assert result["warm"] is True
+
+
+def test_modulo_perezoso_se_importa_al_primer_acceso():
+    sys.modules.pop("colorsys", None)
+    module = LazyModule("colorsys")
+
+    assert not module.loaded
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert module.loaded
+    assert module._load() is sys.modules["colorsys"]
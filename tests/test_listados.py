@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from app import schemas
+from app.models import ExcelUploadLog, UploadStatusEnum, User
+
+
+def test_usuarios_mismo_formato_que_el_modelo(client, db):
+    db.execute(insert(User), [{"name": f"Usuario {i}", "email": f"u{i}@example.com"} for i in range(30)])
+    db.commit()
+
+    response = client.get("/users/", params={"skip": 5, "limit": 10})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+    expected = [
+        schemas.UserResponse.model_validate(user).model_dump(mode="json")
+        for user in db.scalars(select(User).order_by(User.id).offset(5).limit(10))
+    ]
+    assert response.json() == expected
+
+
+def test_logs_mismo_formato_que_el_modelo(client, db):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db.add_all([
+        ExcelUploadLog(filename="ok.xlsx", uploaded_at=start, status=UploadStatusEnum.COMPLETED,
+                       total_rows=10, successful_rows=9, failed_rows=1),
+        ExcelUploadLog(filename="mal.xlsx", uploaded_at=start + timedelta(hours=1), status=UploadStatusEnum.FAILED,
+                       total_rows=0, error_message="Archivo vacío"),
+    ])
+    db.commit()
+
+    body = client.get("/api/excel/logs").json()
+
+    assert [log["filename"] for log in body] == ["mal.xlsx", "ok.xlsx"]
+    assert body[0]["status"] == UploadStatusEnum.FAILED.value
+    assert body[0]["error_message"] == "Archivo vacío"
+    expected = [
+        schemas.UploadLogResponse.model_validate(log)
+        for log in db.scalars(select(ExcelUploadLog).order_by(ExcelUploadLog.uploaded_at.desc()))
+    ]
+    assert [schemas.UploadLogResponse.model_validate(log) for log in body] == expected
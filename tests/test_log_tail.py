@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import os
+
+import pytest
+
+from app.utils import log_tail
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.log")
+    monkeypatch.setattr(log_tail, "LOG_FILE", path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("2026-01-01 00:00:00 - INFO - anterior\n")
+    return path
+
+
+def _append(path, *lines):
+    with open(path, "a", encoding="utf-8") as f:
+        f.writelines(f"{line}\n" for line in lines)
+
+
+async def _next_line(lines, attempts=20):
+
+    """Siguiente línea saltando latidos, con un límite para no colgar la prueba"""
+
+    for _ in range(attempts):
+        line = await lines.__anext__()
+        if line is not None:
+            return line
+    raise AssertionError("follow() no emitió la línea esperada")
+
+
+def test_tail_recorre_respaldos_rotados(log_file, monkeypatch):
+    monkeypatch.setattr(log_tail, "BLOCK_SIZE", 16)
+    with open(f"{log_file}.1", "w", encoding="utf-8") as f:
+        f.writelines(f"2025-12-31 00:00:0{n} - ERROR - viejo {n}\n" for n in range(3))
+    _append(log_file, "2026-01-01 00:00:01 - ERROR - nuevo")
+
+    assert log_tail.tail(3, level="error") == [
+        "2025-12-31 00:00:01 - ERROR - viejo 1",
+        "2025-12-31 00:00:02 - ERROR - viejo 2",
+        "2026-01-01 00:00:01 - ERROR - nuevo",
+    ]
+    assert log_tail.tail(5, contains="NUEVO", include_rotated=False) == ["2026-01-01 00:00:01 - ERROR - nuevo"]
+
+
+def test_follow_sobrevive_a_la_espera_y_a_la_rotacion(log_file):
+    async def scenario():
+        lines = log_tail.follow(level="warning", poll_interval=0.01, heartbeat=0.05)
+        try:
+            # Sin líneas nuevas: latido en lugar de terminar el generador
+            assert await lines.__anext__() is None
+
+            _append(log_file, "2026-01-01 00:00:01 - INFO - filtrada", "2026-01-01 00:00:02 - WARNING - primera")
+            assert await lines.__anext__() == "2026-01-01 00:00:02 - WARNING - primera"
+
+            assert await lines.__anext__() is None
+
+            # Rotación: el archivo se reemplaza y se lee el nuevo desde el inicio
+            os.replace(log_file, f"{log_file}.1")
+            _append(log_file, "2026-01-01 00:00:03 - WARNING - tras rotar")
+            line = await _next_line(lines)
+            assert line == "2026-01-01 00:00:03 - WARNING - tras rotar"
+        finally:
+            await lines.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_follow_espera_a_que_exista_el_archivo(log_file):
+    os.remove(log_file)
+
+    async def scenario():
+        lines = log_tail.follow(poll_interval=0.01, heartbeat=0.05)
+        try:
+            assert await lines.__anext__() is None
+            _append(log_file, "2026-01-01 00:00:01 - INFO - creado")
+            line = await _next_line(lines)
+            assert line == "2026-01-01 00:00:01 - INFO - creado"
+        finally:
+            await lines.aclose()
+
+    asyncio.run(scenario())
+
+
+class _Request:
+
+    """Request mínimo para el endpoint SSE: se desconecta cuando se indica"""
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def test_stream_sse_envia_ping_y_sigue_vivo(log_file, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "SSE_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(log_tail, "follow", functools.partial(log_tail.follow, poll_interval=0.01))
+
+    async def scenario():
+        request = _Request()
+        response = await main.stream_system_logs(request, contains="sse-prueba")
+        assert response.media_type == "text/event-stream"
+        events = response.body_iterator
+
+        # Dos latidos seguidos: la espera no termina el stream
+        assert await events.__anext__() == ": ping\n\n"
+        assert await events.__anext__() == ": ping\n\n"
+
+        _append(log_file, "2026-01-01 00:00:01 - INFO - sse-prueba")
+        for _ in range(20):
+            event = await events.__anext__()
+            if event != ": ping\n\n":
+                break
+        assert event == "data: 2026-01-01 00:00:01 - INFO - sse-prueba\n\n"
+
+        request.disconnected = True
+        with pytest.raises(StopAsyncIteration):
+            await events.__anext__()
+
+    asyncio.run(scenario())
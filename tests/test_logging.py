@@ -0,0 +1,75 @@
+import logging
+from logging.handlers import QueueHandler
+
+from app.utils import logger_config
+from app.utils.logger_config import LogSampler, logger
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _target(name):
+    target = logging.getLogger(f"pruebas.{name}")
+    target.propagate = False
+    target.setLevel(logging.INFO)
+    capture = _Capture()
+    target.handlers = [capture]
+    return target, capture
+
+
+def test_muestreo_por_clave_y_resumen():
+    target, capture = _target("muestreo")
+    sampler = LogSampler(target, max_per_key=3)
+
+    for row in range(100):
+        sampler.warning("email_invalido", "Fila %d: email inválido", row)
+    sampler.error("error_insercion", "Error en fila %d", 7)
+    sampler.summary("Carga 1")
+
+    assert capture.messages[:3] == ["Fila 0: email inválido", "Fila 1: email inválido", "Fila 2: email inválido"]
+    assert capture.messages[3] == "Error en fila 7"
+    assert capture.messages[4] == "Carga 1: email_invalido=100, error_insercion=1 (97 mensajes omitidos)"
+    assert len(capture.messages) == 5
+
+
+def test_no_formatea_mensajes_omitidos_ni_deshabilitados():
+    target, capture = _target("perezoso")
+    sampler = LogSampler(target, max_per_key=1)
+    formatted = []
+
+    class Costly:
+        def __str__(self):
+            formatted.append(1)
+            return "valor"
+
+    for _ in range(10):
+        sampler.info("fila", "Fila %s", Costly())
+    for _ in range(10):
+        sampler.debug("detalle", "Detalle %s", Costly())
+
+    assert capture.messages == ["Fila valor"]
+    assert len(formatted) == 1
+
+
+def test_sin_mensajes_no_hay_resumen():
+    target, capture = _target("vacio")
+    LogSampler(target).summary("Nada")
+    assert capture.messages == []
+
+
+def test_logger_encola_y_el_hilo_escribe():
+    assert [type(handler) for handler in logger.handlers] == [QueueHandler]
+
+    logger.warning("mensaje de prueba %s", "encolado")
+    logger_config.listener.stop()
+    try:
+        with open(logger_config.LOG_FILE, encoding="utf-8") as f:
+            assert "mensaje de prueba encolado" in f.read()
+    finally:
+        logger_config.listener.start()
@@ -0,0 +1,80 @@
+import time
+
+from sqlalchemy import create_engine, event
+
+from app.utils import metrics
+from app.utils.metrics import Counter, Gauge, Histogram
+
+
+def _sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No está la muestra {prefix}")
+
+
+def test_histograma_acumula_buckets():
+    histogram = Histogram("prueba_seconds", "Prueba", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route="/x")
+
+    lines = histogram.render()
+
+    assert lines[:2] == ["# HELP prueba_seconds Prueba", "# TYPE prueba_seconds histogram"]
+    assert lines[2:] == [
+        'prueba_seconds_bucket{route="/x",le="0.1"} 2',
+        'prueba_seconds_bucket{route="/x",le="1"} 3',
+        'prueba_seconds_bucket{route="/x",le="+Inf"} 4',
+        'prueba_seconds_sum{route="/x"} 3.65',
+        'prueba_seconds_count{route="/x"} 4',
+    ]
+
+
+def test_contador_y_gauge_con_etiquetas():
+    counter = Counter("prueba_total", "Prueba", ("result",))
+    counter.inc(result='con "comillas"')
+    counter.inc(2, result='con "comillas"')
+    assert counter.render()[-1] == 'prueba_total{result="con \\"comillas\\""} 3'
+
+    # Sin etiquetas y sin valores exporta 0 en lugar de omitirse
+    assert Gauge("vacio", "Prueba").render()[-1] == "vacio 0"
+    assert Gauge("calculado", "Prueba", callback=lambda: {(): 0.25}).render()[-1] == "calculado 0.25"
+
+
+def test_endpoint_expone_latencia_por_plantilla_de_ruta(client):
+    client.get("/api/excel/logs/999999")
+
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    body = response.text
+    assert 'route="/api/excel/logs/{upload_id}",status="404"' in body
+    assert "/api/excel/logs/999999" not in body
+    assert _sample(body, 'http_requests_in_flight{method="GET"}') >= 1
+    for name in ("db_pool_checkouts_total", "websocket_connections", "upload_active_jobs",
+                 "parse_cache_hit_ratio", "process_resident_memory_bytes"):
+        assert f"# TYPE {name} " in body
+
+
+def test_checkouts_del_pool(client):
+    before = metrics.db_pool_checkouts.value(engine="primary")
+    client.get("/users/")
+    assert metrics.db_pool_checkouts.value(engine="primary") > before
+    assert metrics.db_pool_checked_out.value(engine="primary") == 0
+
+
+def test_espera_del_pool_sin_el_connect():
+    engine = create_engine("sqlite://")
+    # Un connect lento (handshake) no es espera por el pool
+    event.listen(engine, "connect", lambda dbapi_connection, connection_record: time.sleep(0.05))
+    metrics.instrument_engine(engine, "prueba")
+
+    engine.connect().close()
+    engine.connect().close()
+
+    wait = "\n".join(metrics.db_pool_wait.render())
+    connect = "\n".join(metrics.db_pool_connect.render())
+    assert _sample(wait, 'db_pool_wait_seconds_count{engine="prueba"}') == 2
+    assert _sample(wait, 'db_pool_wait_seconds_sum{engine="prueba"}') < 0.05
+    assert _sample(connect, 'db_pool_connect_seconds_count{engine="prueba"}') == 1
+    assert _sample(connect, 'db_pool_connect_seconds_sum{engine="prueba"}') >= 0.05
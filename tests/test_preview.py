@@ -0,0 +1,103 @@
+import pandas as pd
+
+from app.utils import validation_rules
+from app.utils.parse_cache import ParseCache
+from conftest import ADMIN_HEADERS, make_xlsx, upload_xlsx
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _rows(count, invalid_every=5):
+    return [
+        ("1234" if i % invalid_every == 0 else f"Usuario {i}", f"u{i}@example.com")
+        for i in range(count)
+    ]
+
+
+def _preview(client, content, **params):
+    return client.post(
+        "/api/excel/preview",
+        files={"file": ("usuarios.xlsx", content, XLSX_TYPE)},
+        params=params
+    )
+
+
+def test_paginas_del_archivo_completo(client):
+    body = _preview(client, make_xlsx(_rows(25)), limit=10).json()
+
+    assert (body["total_rows"], body["matching_rows"], body["invalid_rows"]) == (25, 25, 5)
+    assert [row["row_number"] for row in body["preview_rows"]] == list(range(2, 12))
+    assert body["has_errors"] is True
+
+    page = client.get(f"/api/excel/preview/{body['preview_id']}", params={"offset": 20, "limit": 10}).json()
+    assert [row["row_number"] for row in page["preview_rows"]] == list(range(22, 27))
+
+    page = client.get(f"/api/excel/preview/{body['preview_id']}", params={"offset": 100}).json()
+    assert page["preview_rows"] == []
+
+
+def test_solo_errores(client):
+    preview_id = _preview(client, make_xlsx(_rows(25))).json()["preview_id"]
+
+    page = client.get(f"/api/excel/preview/{preview_id}", params={"errors_only": True, "offset": 1, "limit": 2}).json()
+
+    assert page["matching_rows"] == 5
+    assert [row["row_number"] for row in page["preview_rows"]] == [7, 12]
+    assert all(not row["is_valid"] and row["errors"] == ["Nombre invalido"] for row in page["preview_rows"])
+
+
+def test_preview_inexistente(client):
+    response = client.get("/api/excel/preview/no-existe")
+
+    assert response.status_code == 404
+    assert "vuelva a enviar" in response.json()["error"]
+
+
+def test_preview_y_upload_parsean_una_vez(client, monkeypatch):
+    from app.utils.excel_processor import ExcelProcessor
+
+    content = make_xlsx(_rows(10))
+    calls = []
+    read_upload = ExcelProcessor.read_upload
+    monkeypatch.setattr(ExcelProcessor, "read_upload", staticmethod(lambda *args: calls.append(1) or read_upload(*args)))
+
+    _preview(client, content)
+    response = upload_xlsx(client, content)
+
+    assert response.status_code == 200
+    assert len(calls) == 1
+
+
+def test_la_validacion_sigue_a_las_reglas_activas(client):
+    preview_id = _preview(client, make_xlsx(_rows(10))).json()["preview_id"]
+    rules = {"rules": [{"code": "email_empresa", "column": "email", "check": "allowed_domains", "value": ["empresa.com"]}]}
+
+    try:
+        assert client.put("/api/excel/validation-rules", json=rules, headers=ADMIN_HEADERS).status_code == 200
+        page = client.get(f"/api/excel/preview/{preview_id}").json()
+    finally:
+        validation_rules.reset_rule_set()
+
+    assert page["invalid_rows"] == 10
+
+
+def test_cache_acotada_por_entradas_y_ttl():
+    cache = ParseCache(max_entries=2, max_bytes=10 * 1024 * 1024, ttl_seconds=60)
+    df = pd.DataFrame({"name": ["Ana"], "email": ["ana@example.com"]})
+    for key in ("a", "b"):
+        cache.put(key, f"{key}.xlsx", df, 0.1)
+    cache.get("a")
+    cache.put("c", "c.xlsx", df, 0.1)
+
+    # "b" era la menos usada
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    entry = cache.get("c")
+    entry.created_at -= 61
+    assert cache.get("c") is None
+
+    # Una entrada más grande que el límite no se guarda
+    small = ParseCache(max_entries=2, max_bytes=1, ttl_seconds=60)
+    assert small.put("x", "x.xlsx", df, 0.1).df is df
+    assert small.get("x") is None
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from app.utils import profiling
+from conftest import make_xlsx, upload_xlsx
+
+PROFILE_HEADERS = {"X-Profile": "1", "X-Profile-Token": os.environ["PROFILE_TOKEN"]}
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_peticion_perfilada_con_muestreador(client, profile_dir):
+    response = client.get("/users/", headers=PROFILE_HEADERS)
+
+    assert response.status_code == 200
+    path = profile_dir / response.headers["X-Profile-File"]
+    assert path.name.endswith("_GET__users_.collapsed.txt")
+    assert path.exists()
+    assert not profiling._busy.locked()
+
+
+def test_sin_token_valido_no_se_perfila(client, profile_dir):
+    response = client.get("/users/", headers={**PROFILE_HEADERS, "X-Profile-Token": "otro"})
+
+    assert response.status_code == 200
+    assert "X-Profile-File" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_un_perfil_a_la_vez(client, profile_dir):
+    assert profiling.try_begin()
+    try:
+        response = client.get("/users/", headers=PROFILE_HEADERS)
+        assert response.status_code == 409
+        # Sin pedir perfil la petición no se ve afectada
+        assert client.get("/users/").status_code == 200
+    finally:
+        profiling.end()
+
+    assert client.get("/users/", headers=PROFILE_HEADERS).status_code == 200
+
+
+def test_poda_cuenta_prof_y_txt_como_un_perfil(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 2)
+    for age, name in enumerate(["c_ingest_3", "b_ingest_2", "a_ingest_1"]):
+        for extension in ("prof", "txt"):
+            path = profile_dir / f"{name}.{extension}"
+            path.write_text("x")
+            os.utime(path, (1000 - age, 1000 - age))
+
+    profiling._prune()
+
+    assert sorted(path.name for path in profile_dir.iterdir()) == [
+        "b_ingest_2.prof", "b_ingest_2.txt", "c_ingest_3.prof", "c_ingest_3.txt",
+    ]
+
+
+def test_ingesta_perfilada_por_upload_id(profile_dir):
+    assert not profiling.request_ingest_profile(41)
+
+    with profiling.profile_ingest(41, requested=False):
+        profiling.checkpoint()
+        assert not profiling._busy.locked()
+
+        assert profiling.request_ingest_profile(41)
+        profiling.checkpoint()
+        assert profiling._busy.locked()
+        sum(range(1000))
+
+    assert not profiling._busy.locked()
+    assert not profiling.request_ingest_profile(41)
+    names = sorted(path.name for path in profile_dir.iterdir())
+    assert [name.split("_", 3)[-1] for name in names] == ["ingest_41.prof", "ingest_41.txt"]
+
+
+def test_ingesta_espera_si_el_perfilador_esta_ocupado(profile_dir):
+    assert profiling.try_begin()
+    with profiling.profile_ingest(42, requested=True):
+        # Ocupado: se reintenta en el siguiente bloque
+        profiling.end()
+        profiling.checkpoint()
+        assert profiling._busy.locked()
+    assert not profiling._busy.locked()
+    assert any(path.name.endswith("ingest_42.prof") for path in profile_dir.iterdir())
+
+
+def test_endpoint_de_perfil_por_upload_id(client):
+    url = "/api/excel/uploads/999/profile"
+    assert client.post(url, headers={"X-Profile-Token": "otro"}).status_code == 403
+    assert client.post(url, headers=PROFILE_HEADERS).status_code == 409
+
+
+def test_carga_con_cabecera_perfila_la_ingesta(client, profile_dir):
+    content = make_xlsx([(f"Usuario {i}", f"u{i}@example.com") for i in range(10)])
+    response = upload_xlsx(client, content, headers=PROFILE_HEADERS)
+
+    upload_id = response.json()["upload_id"]
+    names = [path.name for path in profile_dir.iterdir()]
+    assert response.headers["X-Profile-File"] in names
+    assert any(name.endswith(f"ingest_{upload_id}.prof") for name in names)
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import json
+import os
+
+import httpx
+
+from app.main import app
+from app.scripts import prueba_carga
+from app.scripts.prueba_carga import Recorder, load_scenario, percentile, summarize
+
+
+def test_percentiles_y_resumen():
+    values = [n / 1000 for n in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    recorder = Recorder()
+    for value in values:
+        recorder.ok("users.list", value)
+    recorder.error("users.list")
+    recorder.error("ws.connect")
+
+    summary = summarize(recorder, elapsed=10.0)
+
+    assert summary["users.list"]["requests"] == 101
+    assert summary["users.list"]["throughput_rps"] == 10.1
+    assert summary["users.list"]["error_rate"] == round(1 / 101, 4)
+    assert summary["users.list"]["p95_ms"] == 95.0
+    assert summary["ws.connect"] == {
+        "requests": 1, "throughput_rps": 0.1, "error_rate": 1.0,
+        "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0,
+    }
+
+
+def test_timed_cuenta_estados_inesperados_y_fallos_de_red():
+    def handler(request):
+        if request.url.path == "/caido":
+            raise httpx.ConnectError("sin conexión", request=request)
+        return httpx.Response(304 if request.url.path == "/cache" else 500)
+
+    async def scenario():
+        recorder = Recorder()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://prueba") as client:
+            await recorder.timed("a", client.get("/cache"), expected=(200, 304))
+            await recorder.timed("b", client.get("/error"))
+            assert await recorder.timed("c", client.get("/caido")) is None
+        return recorder
+
+    recorder = asyncio.run(scenario())
+    assert len(recorder.latencies["a"]) == 1
+    assert recorder.errors == {"b": 1, "c": 1}
+
+
+def test_escenarios_guardados_cargan_con_valores_por_defecto(tmp_path):
+    for filename in os.listdir(prueba_carga.SCENARIOS_DIR):
+        scenario = load_scenario(filename[:-len(".json")])
+        assert scenario["name"] == filename[:-len(".json")]
+        assert set(scenario["workers"]) >= set(prueba_carga.DEFAULT_SCENARIO["workers"])
+
+    path = tmp_path / "propio.json"
+    path.write_text(json.dumps({"duration_seconds": 2, "workers": {"crud": 0}}), encoding="utf-8")
+    scenario = load_scenario(str(path))
+    assert scenario["name"] == "propio"
+    assert scenario["duration_seconds"] == 2
+    assert scenario["workers"]["crud"] == 0
+    assert scenario["workers"]["list"] == prueba_carga.DEFAULT_SCENARIO["workers"]["list"]
+
+
+def test_escenario_corto_contra_la_app(client, monkeypatch):
+    # Mismo cliente que usa el script, pero hablando con la app en proceso
+    monkeypatch.setattr(
+        prueba_carga.httpx, "AsyncClient",
+        functools.partial(httpx.AsyncClient, transport=httpx.ASGITransport(app=app))
+    )
+    scenario = dict(
+        prueba_carga.DEFAULT_SCENARIO,
+        base_url="http://prueba",
+        duration_seconds=0.3,
+        workers={"crud": 1, "list": 1, "stats": 1, "upload": 0},
+        stats_interval_seconds=0.05,
+        ws_subscribers=0,
+    )
+
+    result = asyncio.run(prueba_carga.run_scenario(scenario))
+
+    operations = result["operations"]
+    assert {"users.create", "users.update", "users.delete", "users.list", "excel.stats"} <= set(operations)
+    assert all(values["error_rate"] == 0 for values in operations.values())
+    assert operations["excel.stats"]["requests"] >= 2
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import database
+from app.database import Base, READ_YOUR_WRITES_HEADER
+from app.models import ExcelUploadLog, UploadStatusEnum
+
+
+def _add_log(bind, filename):
+    with database.sessionmaker(bind=bind)() as session:
+        log = ExcelUploadLog(filename=filename, status=UploadStatusEnum.COMPLETED, total_rows=1)
+        session.add(log)
+        session.commit()
+        return log.id
+
+
+@pytest.fixture
+def replicas(client, tmp_path):
+
+    """Dos archivos SQLite como réplicas del primario de pruebas"""
+
+    urls = [f"sqlite:///{tmp_path / f'replica{n}.db'}" for n in range(2)]
+    for url in urls:
+        Base.metadata.create_all(bind=create_engine(url))
+    database.configure_replicas(urls)
+    yield database.replica_engines
+    database.configure_replicas([])
+    client.cookies.clear()
+
+
+def test_sin_replicas_lee_del_primario(client):
+    upload_id = _add_log(database.engine, "primario.xlsx")
+
+    response = client.get(f"/api/excel/logs/{upload_id}")
+    assert response.json()["filename"] == "primario.xlsx"
+
+    # Sin réplicas no hace falta marcar al cliente
+    write = client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+    assert READ_YOUR_WRITES_HEADER not in write.headers
+
+
+def test_lecturas_en_round_robin(client, replicas):
+    first, second = replicas
+    _add_log(first, "replica0.xlsx")
+    _add_log(second, "replica1.xlsx")
+
+    names = {client.get("/api/excel/logs/1").json()["filename"] for _ in range(4)}
+    assert names == {"replica0.xlsx", "replica1.xlsx"}
+
+
+def test_read_your_writes_con_la_cabecera(client, replicas):
+    write = client.post("/users/", json={"name": "Ana Gomez", "email": "ana@x.com"})
+    until = write.headers[READ_YOUR_WRITES_HEADER]
+    assert float(until) > time.time()
+    # Un cliente de otro origen sin withCredentials no devuelve la cookie
+    client.cookies.clear()
+
+    upload_id = _add_log(database.engine, "recien_escrito.xlsx")
+
+    # Las réplicas no tienen la carga: sin la cabecera la lectura falla
+    assert client.get(f"/api/excel/logs/{upload_id}").status_code == 404
+    # Reenviando la cabecera (como el interceptor del frontend) va al primario
+    response = client.get(f"/api/excel/logs/{upload_id}", headers={READ_YOUR_WRITES_HEADER: until})
+    assert response.status_code == 200
+
+
+def test_cabecera_vencida_o_fuera_de_rango(client, replicas):
+    upload_id = _add_log(database.engine, "primario.xlsx")
+
+    expired = str(time.time() - 1)
+    too_far = str(time.time() + 3600)
+    for value in (expired, too_far, "no-es-numero"):
+        response = client.get(f"/api/excel/logs/{upload_id}", headers={READ_YOUR_WRITES_HEADER: value})
+        assert response.status_code == 404
+
+
+def test_cors_expone_la_cabecera(client):
+    response = client.get("/users/", headers={"Origin": "http://localhost:4200"})
+    assert READ_YOUR_WRITES_HEADER.lower() in response.headers["access-control-expose-headers"].lower()
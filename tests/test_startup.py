@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from app.utils import startup
+from conftest import ROOT_DIR
+
+
+def _run(args, database_path, **env):
+    return subprocess.run(
+        args, cwd=ROOT_DIR, capture_output=True, text=True, timeout=120,
+        env={
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{database_path}",
+            "DB_CREATE_ALL": "false",
+            "DB_CONNECT_RETRIES": "1",
+            "LOG_LEVEL": "WARNING",
+            **env,
+        }
+    )
+
+
+def _columns(database_path, table):
+    with sqlite3.connect(database_path) as conn:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_migrar_aplica_las_pendientes(tmp_path):
+    database_path = tmp_path / "migrar.db"
+    with sqlite3.connect(database_path) as conn:
+        conn.execute("CREATE TABLE excel_upload_metrics (upload_id INTEGER PRIMARY KEY, peak_memory_bytes BIGINT)")
+        conn.execute("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        conn.execute("INSERT INTO alembic_version VALUES ('7539fc701e25')")
+
+    completed = _run([sys.executable, "-m", "app.scripts.migrar"], database_path)
+
+    assert completed.returncode == 0, completed.stderr
+    assert "max_process_rss_bytes" in _columns(database_path, "excel_upload_metrics")
+    with sqlite3.connect(database_path) as conn:
+        assert list(conn.execute("SELECT version_num FROM alembic_version")) == [(startup._alembic_heads()[0],)]
+
+
+def test_migrar_no_toca_bases_creadas_con_create_all(tmp_path):
+    database_path = tmp_path / "create_all.db"
+    with sqlite3.connect(database_path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+
+    completed = _run([sys.executable, "-m", "app.scripts.migrar"], database_path)
+
+    assert completed.returncode == 1
+    assert "alembic stamp" in completed.stderr
+    assert _columns(database_path, "alembic_version") == []
+
+
+def test_entrypoint_migra_y_luego_ejecuta_el_comando(tmp_path):
+    database_path = tmp_path / "entrypoint.db"
+    entrypoint = os.path.join(ROOT_DIR, "docker-entrypoint.sh")
+
+    completed = _run(["sh", entrypoint, "echo", "arrancando"], database_path, DB_CREATE_ALL="true")
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.splitlines() == ["DB_CREATE_ALL activo: no se aplican migraciones", "arrancando"]
+
+    completed = _run(["sh", entrypoint, "echo", "arrancando"], database_path, DB_MIGRATE_ON_START="false")
+    assert completed.stdout.splitlines() == ["arrancando"]
+
+    # Si la migración falla el contenedor no arranca la API
+    with sqlite3.connect(database_path) as conn:
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+    completed = _run(["sh", entrypoint, "echo", "arrancando"], database_path)
+    assert completed.returncode == 1
+    assert "arrancando" not in completed.stdout
+
+
+def test_readiness_exige_la_revision_head(monkeypatch):
+    monkeypatch.setattr(startup, "DB_CREATE_ALL", False)
+    head = startup._alembic_heads()
+
+    monkeypatch.setattr(startup, "_database_revisions", lambda: [])
+    ok, detail = startup.check_schema()
+    assert not ok
+    assert "alembic upgrade head" in detail
+
+    monkeypatch.setattr(startup, "_database_revisions", lambda: head)
+    assert startup.check_schema() == (True, f"revisión {head[0]}")
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from app.models import ExcelUploadLog, UploadStatsRollup, UploadStatusEnum
+from app.routers.excel_upload import _finalize_upload_log
+from app.utils import upload_rollup
+
+
+def _processing_log(db, uploaded_at, total_rows=10):
+    log = ExcelUploadLog(
+        filename="carga.xlsx",
+        status=UploadStatusEnum.PROCESSING,
+        total_rows=total_rows,
+        uploaded_at=uploaded_at
+    )
+    db.add(log)
+    db.commit()
+    return log
+
+
+def test_bucket_start_trunca_por_hora_y_dia():
+    moment = datetime(2026, 3, 4, 15, 42, 10)
+    assert upload_rollup.bucket_start(moment, "hour") == datetime(2026, 3, 4, 15)
+    assert upload_rollup.bucket_start(moment, "day") == datetime(2026, 3, 4)
+
+
+def test_finalizar_suma_una_sola_vez(db):
+    log = _processing_log(db, datetime(2026, 3, 4, 15, 30))
+
+    _finalize_upload_log(db, log, UploadStatusEnum.COMPLETED, successful=8, failed=2)
+    # Volver a cerrar la misma carga no la cuenta de nuevo
+    _finalize_upload_log(db, log, UploadStatusEnum.FAILED, error_message="otra vez")
+
+    day = db.query(UploadStatsRollup).filter_by(granularity="day").one()
+    hour = db.query(UploadStatsRollup).filter_by(granularity="hour").one()
+    assert (day.uploads, day.total_rows, day.successful_rows, day.failed_rows) == (1, 10, 8, 2)
+    assert hour.bucket_start == datetime(2026, 3, 4, 15)
+
+
+def test_historial_lee_los_rollups(client, db):
+    for hour in (9, 10):
+        log = _processing_log(db, datetime(2026, 3, 4, hour, 5))
+        _finalize_upload_log(db, log, UploadStatusEnum.COMPLETED, successful=7, failed=3)
+
+    data = client.get(
+        "/api/excel/stats/history",
+        params={"from": "2026-03-04T00:00:00", "to": "2026-03-04T23:00:00", "granularity": "hour"}
+    ).json()
+
+    assert data["labels"] == ["2026-03-04 09:00", "2026-03-04 10:00"]
+    assert data["uploads"] == [1, 1]
+    assert data["successful"] == [7, 7]
+
+
+def test_historial_rechaza_parametros_invalidos(client):
+    assert client.get("/api/excel/stats/history", params={"granularity": "week"}).status_code == 400
+    assert client.get(
+        "/api/excel/stats/history",
+        params={"from": "2026-03-05T00:00:00", "to": "2026-03-04T00:00:00"}
+    ).status_code == 400
+    assert client.get(
+        "/api/excel/stats/history",
+        params={"from": "2000-01-01T00:00:00", "to": "2026-01-01T00:00:00", "granularity": "hour"}
+    ).status_code == 400
+
+
+def test_backfill_reconstruye_desde_los_logs(db):
+    for status in (UploadStatusEnum.COMPLETED, UploadStatusEnum.FAILED, UploadStatusEnum.PROCESSING):
+        db.add(ExcelUploadLog(
+            filename="x", status=status, total_rows=4, successful_rows=3, failed_rows=1,
+            uploaded_at=datetime(2026, 3, 4, 8)
+        ))
+    db.commit()
+
+    # Solo cuentan las cargas terminadas
+    assert upload_rollup.backfill(db) == 2
+    day = db.query(UploadStatsRollup).filter_by(granularity="day").one()
+    assert (day.uploads, day.total_rows) == (2, 8)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+
+import pandas as pd
+import pytest
+
+from app.utils import chunked_upload
+from app.utils.parse_cache import parse_cache, session_key
+from conftest import make_xlsx
+
+BASE = "/api/excel/upload-sessions"
+
+
+def _create(client, **payload):
+    response = client.post(BASE, json={"filename": "usuarios.xlsx", **payload})
+    assert response.status_code == 201
+    return response.json()["session_id"]
+
+
+def _put(client, session_id, index, data, **headers):
+    return client.put(f"{BASE}/{session_id}/chunks/{index}", content=data, headers=headers)
+
+
+def _split(content, parts):
+    size = -(-len(content) // parts)
+    return [content[i:i + size] for i in range(0, len(content), size)]
+
+
+def test_reintentar_una_parte_la_reemplaza(client):
+    content = make_xlsx([(f"Usuario {i}", f"u{i}@example.com") for i in range(20)])
+    first, second = _split(content, 2)
+    session_id = _create(client, total_size=len(content), total_chunks=2)
+
+    assert _put(client, session_id, 0, b"basura").status_code == 200
+    response = _put(client, session_id, 0, first, **{"X-Chunk-SHA256": hashlib.sha256(first).hexdigest()})
+    assert response.json() == {"index": 0, "size": len(first), "sha256": hashlib.sha256(first).hexdigest()}
+    assert _put(client, session_id, 1, second).status_code == 200
+
+    status = client.get(f"{BASE}/{session_id}").json()
+    assert status["received_chunks"] == [0, 1]
+    assert status["received_bytes"] == len(content)
+
+    response = client.post(f"{BASE}/{session_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["total_rows"] == 20
+
+
+def test_parte_con_sha_distinto_no_se_guarda(client):
+    session_id = _create(client)
+
+    response = _put(client, session_id, 0, b"datos", **{"X-Chunk-SHA256": "0" * 64})
+
+    assert response.status_code == 400
+    assert client.get(f"{BASE}/{session_id}").json()["received_chunks"] == []
+
+
+def test_limites_por_parte_y_total(client, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "UPLOAD_CHUNK_MAX_BYTES", 10)
+    monkeypatch.setattr(chunked_upload, "UPLOAD_MAX_BYTES", 15)
+    session_id = _create(client)
+
+    assert _put(client, session_id, 0, b"x" * 11).status_code == 413
+    assert _put(client, session_id, 0, b"x" * 10).status_code == 200
+    # La parte 1 cabe sola pero no junto a la 0
+    assert _put(client, session_id, 1, b"x" * 6).status_code == 413
+    assert client.get(f"{BASE}/{session_id}").json()["received_chunks"] == [0]
+
+
+def test_escritura_por_bloques_en_el_threadpool(monkeypatch, tmp_path):
+    monkeypatch.setattr(chunked_upload, "UPLOAD_SESSION_DIR", str(tmp_path))
+    monkeypatch.setattr(chunked_upload, "WRITE_BUFFER_BYTES", 4)
+    session_id = chunked_upload.create_session("datos.csv")["session_id"]
+
+    async def body():
+        for data in (b"ab", b"cd", b"ef", b"g"):
+            yield data
+
+    result = asyncio.run(chunked_upload.write_chunk(session_id, 0, body()))
+
+    assert result["size"] == 7
+    path = tmp_path / session_id / "chunk_000000.part"
+    assert path.read_bytes() == b"abcdefg"
+    assert [p.name for p in (tmp_path / session_id).iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_finalizar_revisa_el_total_de_partes_concurrentes(client, monkeypatch):
+    session_id = _create(client)
+    assert _put(client, session_id, 0, b"x" * 10).status_code == 200
+    assert _put(client, session_id, 1, b"x" * 10).status_code == 200
+
+    # Dos PUT en paralelo pueden pasar el control de write_chunk a la vez
+    monkeypatch.setattr(chunked_upload, "UPLOAD_MAX_BYTES", 15)
+    response = client.post(f"{BASE}/{session_id}/finalize")
+
+    assert response.status_code == 413
+    # El bloqueo se libera para poder reintentar o borrar la sesión
+    assert chunked_upload.claim_finalize(session_id)
+    chunked_upload.release_finalize(session_id)
+
+
+def test_no_se_aceptan_partes_mientras_se_finaliza(client):
+    session_id = _create(client)
+    assert chunked_upload.claim_finalize(session_id)
+    try:
+        assert _put(client, session_id, 0, b"datos").status_code == 409
+        assert client.post(f"{BASE}/{session_id}/finalize").status_code == 409
+    finally:
+        chunked_upload.release_finalize(session_id)
+
+
+def test_finalizar_dos_veces_devuelve_el_mismo_upload(client):
+    content = make_xlsx([("Ana", "ana@example.com")])
+    session_id = _create(client)
+    _put(client, session_id, 0, content)
+
+    first = client.post(f"{BASE}/{session_id}/finalize").json()
+    second = client.post(f"{BASE}/{session_id}/finalize").json()
+
+    assert second["upload_id"] == first["upload_id"]
+    assert _put(client, session_id, 1, b"tarde").status_code == 409
+
+
+def _csv_parts(rows):
+    content = "name,email\n" + "".join(f"Usuario {i},u{i}@example.com\n" for i in range(rows))
+    return _split(content.encode(), 2)
+
+
+def test_preview_sin_total_chunks_no_ensambla(client):
+    first, second = _csv_parts(200)
+    session_id = _create(client, filename="usuarios.csv")
+    assert _put(client, session_id, 0, first).status_code == 200
+
+    response = client.get(f"{BASE}/{session_id}/preview")
+    assert response.status_code == 409
+    assert "total_chunks" in response.json()["error"]
+
+    assert _put(client, session_id, 1, second).status_code == 200
+    response = client.post(f"{BASE}/{session_id}/finalize")
+    assert response.json()["total_rows"] == 200
+
+
+def test_preview_exige_todas_las_partes_y_congela_la_sesion(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "UPLOAD_SESSION_DIR", str(tmp_path))
+    first, second = _csv_parts(200)
+    session_id = _create(client, filename="usuarios.csv", total_chunks=2)
+    assert _put(client, session_id, 0, first).status_code == 200
+
+    response = client.get(f"{BASE}/{session_id}/preview")
+    assert response.status_code == 409
+    assert "Faltan partes" in response.json()["error"]
+
+    assert _put(client, session_id, 1, second).status_code == 200
+    assert client.get(f"{BASE}/{session_id}/preview").json()["total_rows"] == 200
+    # Ya ensamblada: un reintento dejaría el preview desactualizado
+    assert _put(client, session_id, 1, second).status_code == 409
+    assert sorted(p.name for p in (tmp_path / session_id).iterdir() if p.name.startswith("chunk_")) == [
+        "chunk_000000.part", "chunk_000001.part"
+    ]
+
+    response = client.post(f"{BASE}/{session_id}/finalize")
+    assert response.json()["total_rows"] == 200
+    assert [p.name for p in (tmp_path / session_id).iterdir() if p.name.startswith("chunk_")] == []
+
+
+def test_archivo_ilegible_reabre_la_sesion(client):
+    session_id = _create(client, total_chunks=1)
+    assert _put(client, session_id, 0, b"no es un excel").status_code == 200
+    assert client.get(f"{BASE}/{session_id}/preview").status_code == 400
+
+    content = make_xlsx([("Ana", "ana@example.com")])
+    assert _put(client, session_id, 0, content).status_code == 200
+    assert client.get(f"{BASE}/{session_id}/preview").json()["total_rows"] == 1
+
+
+def test_escribir_una_parte_descarta_el_parseo(client):
+    session_id = _create(client)
+    parse_cache.put(session_key(session_id), "usuarios.xlsx", pd.DataFrame({"name": ["Ana"]}), 0.1)
+
+    assert _put(client, session_id, 0, b"datos").status_code == 200
+    assert parse_cache.get(session_key(session_id)) is None
+
+
+@pytest.mark.parametrize("session_id", ["no-es-un-id", "0" * 32])
+def test_sesion_inexistente(client, session_id):
+    assert client.get(f"{BASE}/{session_id}").status_code == 404
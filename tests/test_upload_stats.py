@@ -0,0 +1,84 @@
+from app.models import ExcelUploadLog, UploadStatusEnum
+from app.utils import etag
+from app.utils.stats_cache import StatsCache, stats_cache
+
+
+def _add_log(db, filename, successful, failed, status=UploadStatusEnum.COMPLETED):
+    log = ExcelUploadLog(
+        filename=filename,
+        status=status,
+        total_rows=successful + failed,
+        successful_rows=successful,
+        failed_rows=failed
+    )
+    db.add(log)
+    db.commit()
+    return log
+
+
+def test_totales_y_grafico(client, db):
+    _add_log(db, "a.xlsx", 10, 2)
+    _add_log(db, "b.xlsx", 5, 0)
+
+    data = client.get("/api/excel/stats").json()
+
+    assert data["total_uploads"] == 2
+    assert data["total_successful"] == 15
+    assert data["total_failed"] == 2
+    assert sorted(data["chart_data"]["labels"]) == ["a.xlsx", "b.xlsx"]
+
+
+def test_totales_en_una_sola_consulta(client, db, sql_statements):
+    _add_log(db, "a.xlsx", 1, 1)
+
+    client.get("/api/excel/stats")
+
+    # Un SELECT con count/sum para los totales (antes eran tres)
+    assert sql_statements.matching("count(excel_upload_logs.id)") == 1
+    assert sql_statements.matching("sum(excel_upload_logs.successful_rows)") == 1
+
+
+def test_respuesta_cacheada_hasta_invalidar(client, db, sql_statements):
+    _add_log(db, "a.xlsx", 1, 0)
+    first = client.get("/api/excel/stats").json()
+
+    # Escritura que no pasa por la API: la caché sigue sirviendo lo anterior
+    _add_log(db, "b.xlsx", 1, 0)
+    sql_statements.statements.clear()
+    assert client.get("/api/excel/stats").json() == first
+    assert sql_statements.matching("count(excel_upload_logs.id)") == 0
+
+    stats_cache.invalidate()
+    assert client.get("/api/excel/stats").json()["total_uploads"] == 2
+
+
+def test_valor_de_una_version_anterior_no_se_sirve(client, db):
+    _add_log(db, "a.xlsx", 1, 0)
+    version = etag.get_version(db, etag.UPLOAD_LOGS)
+    stale = client.get("/api/excel/stats").json()
+
+    # Otra carga confirma (nueva versión) y una petición que había leído la
+    # versión anterior guarda su respuesta después de la invalidación
+    _add_log(db, "b.xlsx", 1, 0)
+    etag.mark_changed(db, etag.UPLOAD_LOGS)
+    db.commit()
+    stats_cache.invalidate()
+    stats_cache.set(version, stale)
+
+    response = client.get("/api/excel/stats")
+    assert response.json()["total_uploads"] == 2
+    assert response.headers["etag"] != etag.build_etag("stats", version)
+
+
+def test_no_reemplaza_un_valor_mas_nuevo():
+    cache = StatsCache(ttl_seconds=60)
+    cache.set(2, {"total_uploads": 2})
+    cache.set(1, {"total_uploads": 1})
+    assert cache.get(2) == {"total_uploads": 2}
+    assert cache.get(1) is None
+
+
+def test_ttl_cero_desactiva_la_cache():
+    cache = StatsCache(ttl_seconds=0)
+    cache.set(1, {"total_uploads": 1})
+    assert cache.get(1) is None
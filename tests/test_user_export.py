@@ -0,0 +1,52 @@
+import csv
+import io
+
+from openpyxl import load_workbook
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.models import User
+from app.utils import user_export
+
+
+def _seed(db, count):
+    db.execute(insert(User), [{"name": f"Usuario {i}", "email": f"u{i}@example.com"} for i in range(count)])
+    db.commit()
+
+
+def test_csv_completo_en_varios_bloques(client, db, monkeypatch):
+    _seed(db, 500)
+    monkeypatch.setattr(user_export, "STREAM_CHUNK_SIZE", 1024)
+
+    chunks = list(user_export.iter_users_csv(SessionLocal))
+    assert len(chunks) > 1
+
+    response = client.get("/users/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0] == user_export.EXPORT_HEADERS
+    assert len(rows) == 501
+    assert rows[1][2] == "u0@example.com"
+    assert b"".join(chunks) == response.content
+
+
+def test_xlsx_reparte_hojas_al_limite(client, db, monkeypatch):
+    _seed(db, 25)
+    monkeypatch.setattr(user_export, "XLSX_MAX_ROWS_PER_SHEET", 10)
+
+    response = client.get("/users/export", params={"format": "XLSX"})
+    assert response.status_code == 200
+
+    workbook = load_workbook(io.BytesIO(response.content), read_only=True)
+    assert workbook.sheetnames == ["usuarios", "usuarios_2", "usuarios_3"]
+    sizes = [sum(1 for _ in sheet.iter_rows(min_row=2)) for sheet in workbook.worksheets]
+    assert sizes == [10, 10, 5]
+    first = next(workbook["usuarios"].iter_rows(min_row=2, max_row=2, values_only=True))
+    assert first[1:] == ("Usuario 0", "u0@example.com", True)
+
+
+def test_formato_no_soportado(client):
+    assert client.get("/users/export", params={"format": "pdf"}).status_code == 400
@@ -0,0 +1,122 @@
+import json
+
+import pandas as pd
+import pytest
+
+from app.utils import validation_rules
+from app.utils.validation_rules import compile_rules, current_plan, normalize_rule_set
+from conftest import ADMIN_HEADERS
+
+URL = "/api/excel/validation-rules"
+
+DOMAIN_RULES = {
+    "lowercase": ["email"],
+    "rules": [
+        {"code": "email_empresa", "column": "email", "check": "allowed_domains", "value": ["empresa.com"]},
+        {"code": "area", "column": "area", "check": "one_of", "value": ["ventas", "soporte"], "message": "Área inválida"},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def reglas_por_defecto():
+    validation_rules.reset_rule_set()
+    yield
+    validation_rules.reset_rule_set()
+
+
+def test_reglas_por_defecto_como_la_validacion_original():
+    df = pd.DataFrame({
+        "name": ["Ana", "123", "12.5", 123, 4.0, "A", None],
+        "email": ["ANA@Example.com", "x@example.com", "y@example.com", "z@example.com", "w@example.com", "no-es-email", "v@example.com"],
+    })
+
+    result = current_plan().evaluate(df)
+
+    # Texto de solo dígitos o celda numérica: inválido; "12.5" como texto pasa (isdigit)
+    assert list(result.valid) == [True, False, True, False, False, False, False]
+    assert result.codes_for(1) == ["name_numeric"]
+    assert result.codes_for(3) == ["name_numeric"]
+    assert result.codes_for(5) == ["name_too_short", "email_format"]
+    assert result.messages_for(5) == ["Nombre invalido", "Email invalido"]
+    assert result.values["email"][0] == "ana@example.com"
+    assert result.violation_counts()["name_required"] == 1
+
+
+def test_columna_numerica_completa_no_es_nombre():
+    result = current_plan().evaluate(pd.DataFrame({"name": [10, 20], "email": ["a@b.co", "c@d.co"]}))
+
+    assert result.invalid_count == 2
+
+
+def test_reglas_de_dominio_y_lista():
+    plan = compile_rules(DOMAIN_RULES)
+    df = pd.DataFrame({
+        "email": ["a@empresa.com", "b@ventas.empresa.com", "c@otra.com", "d@empresa.com.ar"],
+        "area": ["ventas", "soporte", "ventas", None],
+    })
+
+    result = plan.evaluate(df)
+
+    assert list(result.valid) == [True, True, False, False]
+    assert compile_rules(DOMAIN_RULES) is plan
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"column": "name", "check": "min_length", "value": "2"}, "entero"),
+    ({"column": "name", "check": "pattern"}, "requiere 'value'"),
+    ({"column": "name", "check": "pattern", "value": "("}, "inválida"),
+    ({"column": "name", "check": "pattern", "value": "a" * 201}, "supera 200"),
+    ({"column": "name", "check": "pattern", "value": r"^(\w+\s?)*$"}, "backtracking"),
+    ({"column": "name", "check": "desconocido"}, "requiere 'column' y 'check'"),
+])
+def test_reglas_invalidas(rule, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_rule_set({"rules": [rule]})
+
+
+def test_el_plan_se_compila_solo_cuando_cambia_el_archivo():
+    plan = current_plan()
+    assert current_plan() is plan
+
+    validation_rules.save_rule_set(DOMAIN_RULES)
+    updated = current_plan()
+    assert updated is not plan
+    assert [rule["code"] for rule in updated.rules] == ["email_empresa", "area"]
+    assert current_plan() is updated
+
+
+def test_archivo_roto_mantiene_las_reglas_anteriores():
+    validation_rules.save_rule_set(DOMAIN_RULES)
+    current_plan()
+
+    with open(validation_rules.VALIDATION_RULES_FILE, "w", encoding="utf-8") as f:
+        json.dump({"rules": "no es una lista", "relleno": "x" * 50}, f)
+
+    assert [rule["code"] for rule in current_plan().rules] == ["email_empresa", "area"]
+
+
+def test_cambiar_reglas_requiere_token_de_administracion(client):
+    assert client.put(URL, json=DOMAIN_RULES).status_code == 403
+    assert client.put(URL, json=DOMAIN_RULES, headers={"X-Admin-Token": "otro"}).status_code == 403
+    assert client.delete(URL).status_code == 403
+
+    response = client.put(URL, json=DOMAIN_RULES, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert client.get(URL).json()["rules"][0]["code"] == "email_empresa"
+
+    response = client.put(URL, json={"rules": [{"column": "name", "check": "pattern", "value": "(a+)+$"}]}, headers=ADMIN_HEADERS)
+    assert response.status_code == 400
+    assert "backtracking" in response.json()["error"]
+
+    assert client.delete(URL, headers=ADMIN_HEADERS).json()["rules"][0]["code"] == "name_required"
+
+
+def test_sin_admin_token_configurado(client, monkeypatch):
+    from app.utils import admin_auth
+
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "")
+
+    response = client.put(URL, json=DOMAIN_RULES, headers=ADMIN_HEADERS)
+    assert response.status_code == 403
+    assert "deshabilitada" in response.json()["error"]
@@ -0,0 +1,106 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from app.utils import workbook_inspector
+from app.utils.workbook_inspector import WorkbookInspectionError, inspect_workbook, parse_dimension
+from conftest import make_xlsx
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _save(workbook) -> io.BytesIO:
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _write_only(rows: int) -> io.BytesIO:
+    """openpyxl en modo write_only no escribe <dimension>"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Datos")
+    sheet.append(["name", "email", "edad"])
+    for i in range(rows):
+        sheet.append([f"Usuario {i}", f"u{i}@example.com", i])
+    return _save(workbook)
+
+
+def test_parse_dimension():
+    assert parse_dimension("A1:C101") == (101, 3)
+    assert parse_dimension("$B$2:$AB$10") == (9, 27)
+    assert parse_dimension("A1") == (1, 1)
+    assert parse_dimension("") == (None, None)
+    assert parse_dimension("hoja!") == (None, None)
+
+
+def test_hojas_y_filas_segun_dimension():
+    workbook = Workbook()
+    workbook.active.title = "Usuarios"
+    for i in range(30):
+        workbook.active.append(["nombre", f"correo{i}"])
+    hidden = workbook.create_sheet("Oculta")
+    hidden.sheet_state = "hidden"
+    hidden.append(["x"])
+
+    info = inspect_workbook(_save(workbook))
+
+    first, second = info["sheets"]
+    assert first["name"] == "Usuarios"
+    assert (first["dimension"], first["estimated_rows"], first["estimated_columns"]) == ("A1:B30", 29, 2)
+    assert first["estimate_source"] == "dimension"
+    assert second["state"] == "hidden"
+    # Los textos de openpyxl van en línea, sin sharedStrings.xml
+    assert info["shared_strings"] == {"bytes": 0, "unique_count": 0}
+
+
+def test_sin_dimension_se_cuenta_la_muestra():
+    info = inspect_workbook(_write_only(50))
+
+    sheet = info["sheets"][0]
+    assert sheet["dimension"] is None
+    assert (sheet["estimated_rows"], sheet["estimated_columns"], sheet["estimate_source"]) == (50, 3, "exact")
+
+
+def test_hoja_grande_se_proyecta_por_tamano(monkeypatch):
+    monkeypatch.setattr(workbook_inspector, "SAMPLE_BYTES", 4096)
+
+    sheet = inspect_workbook(_write_only(2000))["sheets"][0]
+
+    assert sheet["estimate_source"] == "sample"
+    assert sheet["estimated_columns"] == 3
+    assert 1800 <= sheet["estimated_rows"] <= 2200
+
+
+def test_ruta_y_archivo_abierto_dan_lo_mismo(tmp_path):
+    content = make_xlsx([("Ana", "ana@example.com")])
+    path = tmp_path / "libro.xlsx"
+    path.write_bytes(content)
+    stream = io.BytesIO(content)
+    stream.seek(10)
+
+    assert inspect_workbook(str(path)) == inspect_workbook(stream)
+    assert stream.tell() == 0
+
+
+@pytest.mark.parametrize("content", [b"no es un zip", make_xlsx([])[:200]])
+def test_archivo_invalido(content):
+    with pytest.raises(WorkbookInspectionError):
+        inspect_workbook(io.BytesIO(content))
+
+
+def test_endpoints_usan_la_inspeccion(client):
+    content = make_xlsx([(f"Usuario {i}", f"u{i}@example.com") for i in range(5)])
+    files = {"file": ("usuarios.xlsx", content, XLSX_TYPE)}
+
+    response = client.post("/api/excel/validate-file", files=files)
+    assert response.status_code == 200
+    assert response.json()["total_sheets"] == 1
+    assert response.json()["sheets"][0]["estimated_rows"] == 5
+
+    response = client.request("GET", "/api/excel/sheets", files=files)
+    assert response.json()["sheets"] == ["Sheet"]
+
+    response = client.post("/api/excel/validate-file", files={"file": ("roto.xlsx", b"basura", XLSX_TYPE)})
+    assert response.status_code == 400